@@ -0,0 +1,17 @@
+# Router modules of this package in mounting order; API key scopes name them too
+FEATURES = (
+    "info",
+    "ftp",
+    "dns",
+    "mail",
+    "mysql",
+    "pgsql",
+    "mongo",
+    "port",
+    "repo",
+    "ssl",
+    "vhost",
+    "www",
+    "lookup",
+    "admin",
+)
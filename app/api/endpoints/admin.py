@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import status
+from fastapi.responses import PlainTextResponse
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+from app.api.registry import COMMANDS
+from app.api.registry import RESPONSE_CACHE
+from app.auth import AUTH_FAILURE_TRACKER
+from app.auth import RATE_LIMITERS
+from app.compression import COMPRESSION_CACHE
+from app.logging_config import LOG_QUEUE
+from app.profiling import REQUEST_PROFILES
+from app.profiling import REQUEST_PROFILING
+from app.profiling import SORT_KEYS
+from app.services.memory import MEMORY
+from app.services.memory import MemoryDiagnosticsError
+from app.services.memory import gc_stats
+from app.services.memory import object_counts
+from app.services.memory import peak_rss_bytes
+from app.services.memory import rss_bytes
+from app.services.sampler import SAMPLER
+from app.services.sampler import render_flamegraph
+from app.services.slow_log import SLOW_COMMANDS
+from app.services.socket_client import SCHEDULER
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/auth/tracker", summary="Auth failure tracker stats")
+def admin_auth_tracker():
+    """
+    Return size, capacity, blocked count, LRU evictions and expirations of the
+    per-IP authentication failure tracker.
+    """
+    return AUTH_FAILURE_TRACKER.stats()
+
+
+@router.get("/rate-limit", summary="Rate limiter stats")
+async def admin_rate_limit():
+    """Return rate, burst, size and rejection counters of the read and write limiters."""
+    return {kind: limiter.stats() for kind, limiter in RATE_LIMITERS.items()}
+
+
+@router.get("/socket/queues", summary="Devil command queue stats")
+async def admin_socket_queues():
+    """
+    Return free daemon slots and, per API key, weight, queue depth, running
+    commands and average/maximum wait for a slot.
+    """
+    return SCHEDULER.stats()
+
+
+@router.get("/socket/slow", summary="Slow devil commands")
+async def admin_socket_slow(
+    limit: int = Query(50, ge=1, le=1000, description="Commands listed"),
+    order: str = Query(
+        "slowest", pattern="^(slowest|recent)$", description="slowest or recent"
+    ),
+):
+    """
+    Return recent devil commands slower than the threshold with their phase
+    timings, slowest or most recent first. Passwords are redacted.
+    """
+    return {
+        **SLOW_COMMANDS.stats(),
+        "commands": SLOW_COMMANDS.entries(limit, order),
+    }
+
+
+@router.get("/compression", summary="Compression cache stats")
+async def admin_compression():
+    """Return size, hit and miss counters of the compressed response cache."""
+    return COMPRESSION_CACHE.stats()
+
+
+@router.get("/logging", summary="Log queue stats")
+async def admin_logging():
+    """Return capacity, current depth and dropped records of each log queue."""
+    return LOG_QUEUE.stats()
+
+
+@router.get("/commands", summary="Registered devil commands")
+async def admin_commands():
+    """Return the command registry with cache policies, plus response cache counters."""
+    return {
+        "commands": [
+            {
+                "name": spec.name,
+                "method": spec.method,
+                "path": spec.path,
+                "read_only": spec.read_only,
+                "cache_ttl": spec.cache_ttl,
+                "timeout": spec.timeout,
+                "template": spec.template is not None,
+            }
+            for spec in COMMANDS.values()
+        ],
+        "cache": RESPONSE_CACHE.stats(),
+    }
+
+
+@router.get("/profiles", summary="Stored request profiles")
+async def admin_profiles():
+    """
+    List profiles of requests sent with ``X-Devil-Profile: 1``, newest first.
+    Profiling is available when DEVIL_REQUEST_PROFILING is enabled.
+    """
+    return {"enabled": REQUEST_PROFILING, "profiles": REQUEST_PROFILES.list()}
+
+
+@router.get("/profiles/{profile_id}", summary="Get a request profile")
+async def admin_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|prof)$", description="text or prof"),
+    sort: str = Query("cumulative", description=f"One of: {', '.join(SORT_KEYS)}"),
+    limit: int = Query(40, ge=1, le=1000, description="Functions listed in text"),
+):
+    """
+    Return a stored profile as pstats text, or as a ``.prof`` file loadable
+    with ``pstats`` or snakeviz.
+    """
+    entry = REQUEST_PROFILES.get(profile_id)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    if format == "prof":
+        return Response(
+            entry.dump(),
+            media_type="application/octet-stream",
+            headers={
+                "Content-Disposition": f'attachment; filename="{profile_id}.prof"'
+            },
+        )
+    if sort not in SORT_KEYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sort must be one of: {', '.join(SORT_KEYS)}",
+        )
+    return PlainTextResponse(entry.text(sort, limit))
+
+
+@router.get("/profiler", summary="Sampling profiler stacks")
+async def admin_profiler(
+    seconds: float | None = Query(
+        None, gt=0, description="Only the last N seconds; default the whole window"
+    ),
+    format: str = Query(
+        "stats",
+        pattern="^(stats|collapsed|svg)$",
+        description="stats, collapsed or svg",
+    ),
+):
+    """
+    Return sampling profiler counters, the sampled stacks in collapsed
+    (``flamegraph.pl``/speedscope) format, or an SVG flame graph. Sampling
+    runs when DEVIL_PROFILER_HZ is set.
+    """
+    if format == "collapsed":
+        return PlainTextResponse(SAMPLER.collapsed(seconds))
+    if format == "svg":
+        title = f"devil API, last {seconds:g}s" if seconds else "devil API"
+        return Response(
+            render_flamegraph(SAMPLER.stacks(seconds), title=title),
+            media_type="image/svg+xml",
+        )
+    return SAMPLER.stats()
+
+
+KEY_TYPE_QUERY = Query(
+    "lineno",
+    pattern="^(lineno|filename|traceback)$",
+    description="Group allocations by lineno, filename or traceback",
+)
+
+
+def _memory_conflict(exc: MemoryDiagnosticsError) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+
+@router.get("/memory", summary="Memory and gc stats")
+async def admin_memory(
+    objects: bool = Query(False, description="Also count gc-tracked objects by type"),
+    limit: int = Query(30, ge=1, le=500, description="Object types listed"),
+):
+    """
+    Return RSS, garbage collector stats, tracemalloc status and the size of
+    the worker's in-memory tables; with ``objects=true`` also the most
+    common object types, which walks the whole heap.
+
+    The tables are changed by the event loop, so they are read here on the
+    loop in one go; only the heap walk and file-backed stats run in a thread.
+    """
+    # the SQLite backend is a file shared between workers, not loop state
+    if AUTH_FAILURE_TRACKER.blocking:
+        tracker = await run_in_threadpool(AUTH_FAILURE_TRACKER.stats)
+    else:
+        tracker = AUTH_FAILURE_TRACKER.stats()
+    tables = {
+        "auth_failure_tracker": tracker["size"],
+        "rate_limiters": {k: v.stats()["size"] for k, v in RATE_LIMITERS.items()},
+        "response_cache": RESPONSE_CACHE.stats()["size"],
+        "compression_cache_bytes": COMPRESSION_CACHE.stats()["bytes"],
+        "request_profiles": len(REQUEST_PROFILES),
+        "slow_commands": len(SLOW_COMMANDS),
+    }
+    result = {
+        "rss_bytes": rss_bytes(),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "gc": gc_stats(),
+        "tracemalloc": MEMORY.status(),
+        "tables": tables,
+    }
+    if objects:
+        result["objects"] = await run_in_threadpool(object_counts, limit)
+    return result
+
+
+@router.post("/memory/tracemalloc/start", summary="Start tracemalloc")
+def admin_tracemalloc_start(
+    frames: int = Query(1, ge=1, le=100, description="Traceback frames kept"),
+):
+    """
+    Start tracing allocations. Every allocation gets slower while tracing.
+    Already tracing with another ``frames`` is a conflict: stop first.
+    """
+    try:
+        return MEMORY.start(frames)
+    except MemoryDiagnosticsError as exc:
+        raise _memory_conflict(exc) from exc
+
+
+@router.post("/memory/tracemalloc/stop", summary="Stop tracemalloc")
+def admin_tracemalloc_stop():
+    """Stop tracing allocations and drop the baseline snapshot."""
+    return MEMORY.stop()
+
+
+@router.post("/memory/snapshot", summary="Take a baseline memory snapshot")
+def admin_memory_snapshot(
+    limit: int = Query(20, ge=1, le=500), key_type: str = KEY_TYPE_QUERY
+):
+    """
+    Take a tracemalloc snapshot as the baseline for /admin/memory/diff and
+    return its largest allocation sites. Returns 409 when tracemalloc is not
+    running.
+    """
+    try:
+        return MEMORY.snapshot(limit, key_type)
+    except MemoryDiagnosticsError as exc:
+        raise _memory_conflict(exc) from exc
+
+
+@router.get("/memory/diff", summary="Memory growth since the baseline")
+def admin_memory_diff(
+    limit: int = Query(20, ge=1, le=500), key_type: str = KEY_TYPE_QUERY
+):
+    """
+    Compare a new snapshot with the baseline and return the allocation sites
+    that grew the most. Returns 409 without tracemalloc or a baseline.
+    """
+    try:
+        return MEMORY.diff(limit, key_type)
+    except MemoryDiagnosticsError as exc:
+        raise _memory_conflict(exc) from exc
@@ -2,20 +2,31 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 from fastapi import HTTPException
+from fastapi import Path
 from fastapi import Query
 from fastapi import status
 
+from app.api.registry import LIST_CACHE_TTL
+from app.api.registry import RESPONSE_CACHE
+from app.api.registry import command
 from app.schemas.dns import DNSAddRecord
 from app.schemas.dns import DNSAddZone
 from app.schemas.dns import DNSDel
+from app.schemas.dns import DNSZoneImport
+from app.schemas.dns import DNSZoneReconcile
+from app.services.dns_zone import apply_plan
+from app.services.dns_zone import build_record_args
+from app.services.dns_zone import fetch_zone
+from app.services.dns_zone import make_record
+from app.services.dns_zone import parse_zone_file
+from app.services.dns_zone import plan_zone
 from app.services.socket_client import DevilSocketError
-from app.services.socket_client import execute_devil_command
 
 router = APIRouter(prefix="/dns", tags=["dns"])
 
 
-@router.post("/add/zone", summary="Add DNS zone (load template)")
-async def dns_add_zone(data: DNSAddZone):
+@command(router, "post", "/add/zone", summary="Add DNS zone (load template)")
+def dns_add_zone(data: DNSAddZone):
     """
     Add a DNS zone for a domain, optionally loading a specific template.
 
@@ -26,115 +37,129 @@ async def dns_add_zone(data: DNSAddZone):
     args = ["--json", "dns", "add", data.dns_domain]
     if data.dns_template:
         args.append(data.dns_template)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    return args
 
 
-@router.post("/add/record", summary="Add DNS record")
-async def dns_add_record(data: DNSAddRecord):
+@command(router, "post", "/add/record", summary="Add DNS record")
+def dns_add_record(data: DNSAddRecord):
     """
     Add a DNS record to an existing zone.
 
     Maps to variations of ``devil dns add dns_domain dns_record dns_record_type ...`` including CAA, MX/SRV with priority/weight and TTL.
     """
-    args = [
-        "--json",
-        "dns",
-        "add",
-        data.dns_domain,
-        data.dns_record,
-        data.dns_record_type,
-    ]
-
-    t = data.dns_record_type.upper()
-    # CAA requires additional caa_tag before target
-    if t == "CAA":
-        if not data.caa_tag:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="caa_tag is required for CAA records",
-            )
-        if data.dns_prio is not None or data.dns_weight is not None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="dns_prio/dns_weight not applicable to CAA",
-            )
-        args.extend([data.caa_tag, data.dns_target])
-    # SRV may include prio and optionally weight
-    elif t == "SRV":
-        if data.dns_prio is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="dns_prio is required for SRV records",
-            )
-        if data.dns_weight is not None:
-            args.extend([str(data.dns_prio), str(data.dns_weight), data.dns_target])
-        else:
-            args.extend([str(data.dns_prio), data.dns_target])
-        if data.caa_tag is not None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="caa_tag not applicable to SRV",
-            )
-    # MX requires priority
-    elif t == "MX":
-        if data.dns_prio is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="dns_prio is required for MX records",
-            )
-        if data.dns_weight is not None or data.caa_tag is not None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="dns_weight/caa_tag not applicable to MX",
-            )
-        args.extend([str(data.dns_prio), data.dns_target])
-    else:
-        # Generic case: just target
-        if (
-            data.dns_prio is not None
-            or data.dns_weight is not None
-            or data.caa_tag is not None
-        ):
-            # Validate combinations to avoid sending wrong shape
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="dns_prio/dns_weight/caa_tag not applicable to this record type",
-            )
-        args.append(data.dns_target)
+    try:
+        return build_record_args(data)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
 
-    if data.ttl is not None:
-        args.append(str(data.ttl))
 
+@router.post("/import", summary="Import BIND zone file")
+async def dns_import(data: DNSZoneImport):
+    """
+    Import records from a BIND zone file, sending only the missing ones.
+
+    Maps to: ``devil dns list dns_domain`` followed by the needed ``devil dns add ...``
+    and, with prune, ``devil dns del dns_domain dns_record_id`` commands.
+    SOA and record types devil does not manage are skipped.
+    """
+    try:
+        desired = parse_zone_file(data.zone_file, data.dns_domain)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"zone file: {exc}"
+        ) from exc
     try:
-        return await execute_devil_command(args)
+        current = await fetch_zone(data.dns_domain)
     except DevilSocketError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
         ) from exc
-
-
-@router.get("/templates", summary="List DNS templates", tags=["read-only"])
-async def dns_templates():
+    plan = plan_zone(current, desired, prune=data.prune)
+    result = await apply_plan(data.dns_domain, plan)
+    RESPONSE_CACHE.invalidate("dns")
+    return result
+
+
+@router.put("/zone/{dns_domain}", summary="Reconcile DNS zone to desired records")
+async def dns_zone_reconcile(
+    data: DNSZoneReconcile,
+    dns_domain: str = Path(..., description="Existing domain/zone to reconcile"),
+    dry_run: bool = Query(
+        False, description="Only compute and return the plan, do not change anything"
+    ),
+):
     """
-    List available DNS templates.
+    Make the zone serve exactly the given records with the fewest changes.
 
-    Maps to: ``devil dns templates``.
+    Maps to: ``devil dns list dns_domain`` followed by ``devil dns add ...`` for missing
+    records and ``devil dns del dns_domain dns_record_id`` for surplus ones. Adds run
+    before deletes so changed names keep resolving throughout; deletes for a name
+    whose add failed are skipped and reported.
     """
+    desired = []
+    for position, entry in enumerate(data.records):
+        record = DNSAddRecord(dns_domain=dns_domain, **entry.model_dump())
+        try:
+            build_record_args(record)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"records[{position}]: {exc}",
+            ) from exc
+        desired.append(
+            make_record(
+                dns_domain,
+                record.dns_record,
+                record.dns_record_type.value,
+                record.dns_target,
+                prio=record.dns_prio,
+                weight=record.dns_weight,
+                caa_tag=record.caa_tag,
+                ttl=record.ttl,
+            )
+        )
     try:
-        return await execute_devil_command(["--json", "dns", "templates"])
+        current = await fetch_zone(dns_domain)
     except DevilSocketError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
         ) from exc
+    plan = plan_zone(current, desired, prune=True)
+    if dry_run:
+        return {"dry_run": True, "plan": plan.as_dict()}
+    result = await apply_plan(dns_domain, plan)
+    RESPONSE_CACHE.invalidate("dns")
+    return {"dry_run": False, **result}
+
+
+@command(
+    router,
+    "get",
+    "/templates",
+    summary="List DNS templates",
+    argv=("--json", "dns", "templates"),
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def dns_templates():
+    """
+    List available DNS templates.
+
+    Maps to: ``devil dns templates``.
+    """
 
 
-@router.get("/list", summary="List DNS zones or records", tags=["read-only"])
-async def dns_list(
+@command(
+    router,
+    "get",
+    "/list",
+    summary="List DNS zones or records",
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def dns_list(
     dns_domain: str | None = Query(
         None,
         description="Optional domain name. When supplied, returns records for that domain; when omitted, returns all zones.",
@@ -148,16 +173,11 @@ async def dns_list(
     args = ["--json", "dns", "list"]
     if dns_domain:
         args.append(dns_domain)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    return args
 
 
-@router.delete("/del", summary="Delete DNS zone or record")
-async def dns_del(data: DNSDel):
+@command(router, "delete", "/del", summary="Delete DNS zone or record")
+def dns_del(data: DNSDel):
     """
     Delete a DNS zone or a specific record.
 
@@ -166,9 +186,4 @@ async def dns_del(data: DNSDel):
     args = ["--json", "dns", "del", data.dns_domain]
     if data.dns_record_id is not None:
         args.append(str(data.dns_record_id))
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    return args
@@ -1,21 +1,19 @@
 from __future__ import annotations
 
 from fastapi import APIRouter
-from fastapi import HTTPException
 from fastapi import Path
-from fastapi import status
 
+from app.api.registry import LIST_CACHE_TTL
+from app.api.registry import command
 from app.schemas.ftp import FTPAdd
 from app.schemas.ftp import FTPPasswd
 from app.schemas.ftp import FTPQuota
-from app.services.socket_client import DevilSocketError
-from app.services.socket_client import execute_devil_command
 
 router = APIRouter(prefix="/ftp", tags=["ftp"])
 
 
-@router.post("/add", summary="Create FTP account")
-async def ftp_add(data: FTPAdd):
+@command(router, "post", "/add", summary="Create FTP account")
+def ftp_add(data: FTPAdd):
     """
     Create an FTP account.
 
@@ -31,16 +29,17 @@ async def ftp_add(data: FTPAdd):
     ]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    return args
 
 
-@router.delete("/{username}", summary="Delete FTP account")
-async def ftp_del(
+@command(
+    router,
+    "delete",
+    "/{username}",
+    summary="Delete FTP account",
+    argv=("--json", "ftp", "del", "{username}"),
+)
+def ftp_del(
     username: str = Path(..., description="FTP account username to delete"),
 ):
     """
@@ -48,17 +47,10 @@ async def ftp_del(
 
     Maps to: ``devil ftp del ftp_username``.
     """
-    args = ["--json", "ftp", "del", username]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
 
 
-@router.put("/passwd", summary="Change FTP password")
-async def ftp_passwd(data: FTPPasswd):
+@command(router, "put", "/passwd", summary="Change FTP password")
+def ftp_passwd(data: FTPPasswd):
     """
     Change FTP account password.
 
@@ -67,41 +59,36 @@ async def ftp_passwd(data: FTPPasswd):
     args = ["--json", "ftp", "passwd", data.username]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    return args
 
 
-@router.put("/quota", summary="Change FTP quota or recalc")
-async def ftp_quota(data: FTPQuota):
+@command(
+    router,
+    "put",
+    "/quota",
+    summary="Change FTP quota or recalc",
+    argv=("--json", "ftp", "quota", "{data.username}", "{data.quota}"),
+)
+def ftp_quota(data: FTPQuota):
     """
     Change or recalc FTP quota.
 
     Maps to: ``devil ftp quota ftp_username ftp_quota|recalc``.
     """
-    args = ["--json", "ftp", "quota", data.username, data.quota]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
 
 
-@router.get("/list", summary="List FTP accounts", tags=["read-only"])
-async def ftp_list():
+@command(
+    router,
+    "get",
+    "/list",
+    summary="List FTP accounts",
+    argv=("--json", "ftp", "list"),
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def ftp_list():
     """
     List all FTP accounts.
 
     Maps to: ``devil ftp list``.
     """
-    args = ["--json", "ftp", "list"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi import HTTPException
+from fastapi import Path
+from fastapi import Query
+
+from app.api.registry import read_route
+from app.services.reverse_index import REVERSE_INDEX
+from app.services.reverse_index import SOURCES
+
+router = APIRouter(prefix="/lookup", tags=["lookup"])
+
+
+@router.get("/ip/{ip}", summary="Resources using an IP address", tags=["read-only"])
+@read_route
+async def lookup_ip(ip: str = Path(..., description="IPv4 or IPv6 address")):
+    """
+    Return sites, certificates, DNS records and vhosts referencing an IP address.
+
+    Served from the reverse index; does not call devil.
+    """
+    return {
+        "ip": ip,
+        "resources": REVERSE_INDEX.lookup_ip(ip),
+        "refreshed_at": REVERSE_INDEX.refreshed_at,
+    }
+
+
+@router.get(
+    "/domain/{domain}", summary="Resources attached to a domain", tags=["read-only"]
+)
+@read_route
+async def lookup_domain(domain: str = Path(..., description="Domain name")):
+    """
+    Return the website, DNS zone, mail domain and certificates of a domain.
+
+    Served from the reverse index; does not call devil.
+    """
+    return {
+        "domain": domain,
+        "resources": REVERSE_INDEX.lookup_domain(domain),
+        "refreshed_at": REVERSE_INDEX.refreshed_at,
+    }
+
+
+@router.post("/refresh", summary="Refresh reverse lookup index")
+async def lookup_refresh(
+    source: list[str] | None = Query(
+        None,
+        description="Sources to refresh (vhost, www, ssl, dns, mail); all when omitted",
+    ),
+):
+    """
+    Re-read the given sources from devil and update the reverse index.
+
+    Maps to: ``devil vhost list all``, ``devil www list``, ``devil ssl www list``,
+    ``devil dns list [dns_domain]`` and ``devil mail list``.
+    """
+    unknown = sorted(set(source or ()) - SOURCES.keys())
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown index source(s): {', '.join(unknown)}"
+        )
+    status = await REVERSE_INDEX.refresh(source)
+    return {"status": status, **REVERSE_INDEX.stats()}
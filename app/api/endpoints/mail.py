@@ -1,44 +1,120 @@
 from __future__ import annotations
 
+import json
+
 from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Path
 from fastapi import Query
+from fastapi import Request
 from fastapi import status
-
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from app.api.registry import LIST_CACHE_TTL
+from app.api.registry import RESPONSE_CACHE
+from app.api.registry import command
+from app.api.registry import read_route
 from app.schemas.mail import MailAccountAdd
 from app.schemas.mail import MailAliasAdd
+from app.schemas.mail import MailBulkFormat
 from app.schemas.mail import MailDKIM
 from app.schemas.mail import MailOptions
 from app.schemas.mail import MailPasswd
 from app.schemas.mail import MailQuota
 from app.schemas.mail import MailWhitelist
+from app.services.concurrency import as_completed_bounded
+from app.services.devil_output import list_domains
+from app.services.mail_bulk import BulkRun
+from app.services.mail_bulk import account_add_args
+from app.services.mail_bulk import alias_add_args
+from app.services.mail_bulk import quota_args
 from app.services.socket_client import DevilSocketError
 from app.services.socket_client import execute_devil_command
 
 router = APIRouter(prefix="/mail", tags=["mail"])
 
 
-@router.post("/account/add", summary="Add mail account")
-async def mail_account_add(data: MailAccountAdd):
+@command(router, "post", "/account/add", summary="Add mail account")
+def mail_account_add(data: MailAccountAdd):
     """
     Create a mail account.
 
     Maps to: ``devil mail account add email_mailbox`` (interactive password supplied via API or generated randomly if not provided).
     """
-    args = ["--json", "mail", "account", "add", data.email_mailbox]
-    if data.password:
-        args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    return account_add_args(data)
+
+
+class _UploadStreamingResponse(StreamingResponse):
+    """
+    Streaming response sent while the request body is still being read.
 
+    StreamingResponse listens for ``http.disconnect`` on ``receive`` for ASGI
+    servers before spec 2.4, which would swallow body messages here; the body
+    reader notices a disconnect instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+@router.post(
+    "/bulk",
+    summary="Bulk add mail accounts, aliases and quotas",
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def mail_bulk(
+    request: Request,
+    fmt: MailBulkFormat | None = Query(
+        None,
+        alias="format",
+        description="Body format; detected from Content-Type (text/csv or NDJSON) when omitted",
+    ),
+):
+    """
+    Provision many mailboxes, aliases and quotas from one NDJSON or CSV upload.
 
-@router.delete("/account/{email_mailbox}", summary="Delete mail account")
-async def mail_account_del(
+    Every row carries an ``action`` (account_add, alias_add or quota) plus the fields of
+    MailAccountAdd, MailAliasAdd or MailQuota. CSV input starts with a header row.
+    Rows are read incrementally and run with bounded parallelism; the response is
+    NDJSON with one ``{"row", "action", "status", ...}`` object per row, streamed in
+    completion order while the upload is still being read.
+
+    Maps to: ``devil mail account add``, ``devil mail alias add`` and ``devil mail quota`` per row.
+    """
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = MailBulkFormat.CSV if "csv" in content_type else MailBulkFormat.NDJSON
+
+    async def results():
+        try:
+            async for line in BulkRun().results(request.stream(), fmt.value):
+                yield line
+        finally:
+            RESPONSE_CACHE.invalidate("mail")
+
+    return _UploadStreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@command(
+    router,
+    "delete",
+    "/account/{email_mailbox}",
+    summary="Delete mail account",
+    argv=("--json", "mail", "account", "del", "{email_mailbox}"),
+)
+def mail_account_del(
     email_mailbox: str = Path(..., description="Email mailbox to delete"),
 ):
     """
@@ -46,33 +122,26 @@ async def mail_account_del(
 
     Maps to: ``devil mail account del email_mailbox``.
     """
-    args = ["--json", "mail", "account", "del", email_mailbox]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
 
 
-@router.post("/alias/add", summary="Add mail alias")
-async def mail_alias_add(data: MailAliasAdd):
+@command(router, "post", "/alias/add", summary="Add mail alias")
+def mail_alias_add(data: MailAliasAdd):
     """
     Add an email alias.
 
     Maps to: ``devil mail alias add email_from email_to``.
     """
-    args = ["--json", "mail", "alias", "add", data.email_from, data.email_to]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    return alias_add_args(data)
 
 
-@router.delete("/alias/{email_from}", summary="Delete mail alias")
-async def mail_alias_del(
+@command(
+    router,
+    "delete",
+    "/alias/{email_from}",
+    summary="Delete mail alias",
+    argv=("--json", "mail", "alias", "del", "{email_from}"),
+)
+def mail_alias_del(
     email_from: str = Path(..., description="Email alias to delete"),
 ):
     """
@@ -80,17 +149,10 @@ async def mail_alias_del(
 
     Maps to: ``devil mail alias del email_from``.
     """
-    args = ["--json", "mail", "alias", "del", email_from]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
 
 
-@router.put("/passwd", summary="Change mail password")
-async def mail_passwd(data: MailPasswd):
+@command(router, "put", "/passwd", summary="Change mail password")
+def mail_passwd(data: MailPasswd):
     """
     Change password for a mail account.
 
@@ -99,87 +161,114 @@ async def mail_passwd(data: MailPasswd):
     args = ["--json", "mail", "passwd", data.email_mailbox]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    return args
 
 
 # TODO: Add validation for option values
-@router.put("/options", summary="Change mail option")
-async def mail_options(data: MailOptions):
+@command(
+    router,
+    "put",
+    "/options",
+    summary="Change mail option",
+    argv=(
+        "--json",
+        "mail",
+        "options",
+        "{data.email_domain}",
+        "{data.option}",
+        "{data.value}",
+    ),
+)
+def mail_options(data: MailOptions):
     """
     Change a mail domain option.
 
     Maps to: ``devil mail options email_domain email_option value`` where value matches option contract (on/off, restrictspf modes, IPs etc.).
     """
-    args = ["--json", "mail", "options", data.email_domain, data.option, data.value]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
 
 
-@router.put("/quota", summary="Change mail quota or recalc")
-async def mail_quota(data: MailQuota):
+@command(router, "put", "/quota", summary="Change mail quota or recalc")
+def mail_quota(data: MailQuota):
     """
     Change or recalc mail quota for an account.
 
     Maps to: ``devil mail quota email_mailbox mail_quota|recalc``.
     """
-    args = ["--json", "mail", "quota", data.email_mailbox, data.mail_quota]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    return quota_args(data)
 
 
 @router.get("/list", summary="List mail domains or accounts", tags=["read-only"])
+@read_route
 async def mail_list(
     email_domain: str | None = Query(
         None, description="Optional email domain to filter results"
     ),
+    all_domains: bool = Query(
+        False,
+        description="List mailboxes and aliases of every mail domain, streamed as NDJSON",
+    ),
 ):
     """
     List mail domains OR mailbox+aliases for a domain.
 
     Maps to: ``devil mail list [email_domain]``.
+    With all_domains=true, runs ``devil mail list`` and then ``devil mail list email_domain``
+    for every domain with bounded parallelism, streaming one NDJSON line per domain
+    (``{"domain", "status", "result"|"detail"}``) in completion order.
     """
     args = ["--json", "mail", "list"]
     if email_domain:
         args.append(email_domain)
     try:
-        return await execute_devil_command(args)
+        listing = await execute_devil_command(args)
     except DevilSocketError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
         ) from exc
+    if not all_domains or email_domain:
+        return listing
+    return StreamingResponse(
+        _stream_domain_listings(list_domains(listing)),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _list_one_domain(domain: str) -> dict:
+    try:
+        result = await execute_devil_command(["--json", "mail", "list", domain])
+    except DevilSocketError as exc:
+        return {"domain": domain, "status": "error", "detail": str(exc)}
+    return {"domain": domain, "status": "ok", "result": result}
+
 
+async def _stream_domain_listings(domains: list[str]):
+    async for entry in as_completed_bounded(map(_list_one_domain, domains)):
+        yield json.dumps(entry).encode() + b"\n"
 
-@router.post("/whitelist/add", summary="Add mail whitelist domain")
-async def mail_whitelist_add(data: MailWhitelist):
+
+@command(
+    router,
+    "post",
+    "/whitelist/add",
+    summary="Add mail whitelist domain",
+    argv=("--json", "mail", "whitelist", "add", "{data.domain}"),
+)
+def mail_whitelist_add(data: MailWhitelist):
     """
     Add a domain to mail whitelist.
 
     Maps to: ``devil mail whitelist add domain``.
     """
-    args = ["--json", "mail", "whitelist", "add", data.domain]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
 
 
-@router.delete("/whitelist/{domain}", summary="Delete mail whitelist domain")
-async def mail_whitelist_del(
+@command(
+    router,
+    "delete",
+    "/whitelist/{domain}",
+    summary="Delete mail whitelist domain",
+    argv=("--json", "mail", "whitelist", "del", "{domain}"),
+)
+def mail_whitelist_del(
     domain: str = Path(..., description="Domain to remove from whitelist"),
 ):
     """
@@ -187,51 +276,42 @@ async def mail_whitelist_del(
 
     Maps to: ``devil mail whitelist del domain``.
     """
-    args = ["--json", "mail", "whitelist", "del", domain]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
 
 
-@router.get(
-    "/whitelist/list", summary="List mail whitelist domains", tags=["read-only"]
+@command(
+    router,
+    "get",
+    "/whitelist/list",
+    summary="List mail whitelist domains",
+    argv=("--json", "mail", "whitelist", "list"),
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
 )
-async def mail_whitelist_list():
+def mail_whitelist_list():
     """
     List all whitelisted mail domains.
 
     Maps to: ``devil mail whitelist list``.
     """
-    args = ["--json", "mail", "whitelist", "list"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
 
 
-@router.post("/dkim/sign", summary="Sign domain with DKIM")
-async def mail_dkim_sign(data: MailDKIM):
+@command(
+    router,
+    "post",
+    "/dkim/sign",
+    summary="Sign domain with DKIM",
+    argv=("--json", "mail", "dkim", "sign", "{data.domain}"),
+)
+def mail_dkim_sign(data: MailDKIM):
     """
     Create DKIM key and sign a domain.
 
     Maps to: ``devil mail dkim sign domain``.
     """
-    args = ["--json", "mail", "dkim", "sign", data.domain]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
 
 
-@router.get("/dkim/dns/{domain}", summary="Get DKIM DNS record", tags=["read-only"])
-async def mail_dkim_dns(
+@command(router, "get", "/dkim/dns/{domain}", summary="Get DKIM DNS record")
+def mail_dkim_dns(
     domain: str = Path(..., description="Domain to get DKIM DNS record for"),
     print_record: bool = Query(
         False, description="Whether to print the DKIM DNS record"
@@ -246,16 +326,17 @@ async def mail_dkim_dns(
     args = ["--json", "mail", "dkim", "dns", domain]
     if print_record:
         args.append("--print")
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    return args
 
 
-@router.delete("/dkim/unsign/{domain}", summary="Remove DKIM key")
-async def mail_dkim_unsign(
+@command(
+    router,
+    "delete",
+    "/dkim/unsign/{domain}",
+    summary="Remove DKIM key",
+    argv=("--json", "mail", "dkim", "unsign", "{domain}"),
+)
+def mail_dkim_unsign(
     domain: str = Path(..., description="Domain to remove DKIM key for"),
 ):
     """
@@ -263,10 +344,3 @@ async def mail_dkim_unsign(
 
     Maps to: ``devil mail dkim unsign domain``.
     """
-    args = ["--json", "mail", "dkim", "unsign", domain]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
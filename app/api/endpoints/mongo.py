@@ -1,19 +1,18 @@
 from __future__ import annotations
 
 from fastapi import APIRouter
-from fastapi import HTTPException
 from fastapi import Path
 
+from app.api.registry import LIST_CACHE_TTL
+from app.api.registry import command
 from app.schemas.mongo import MongoDbAdd
 from app.schemas.mongo import MongoPasswd
-from app.services.socket_client import DevilSocketError
-from app.services.socket_client import execute_devil_command
 
 router = APIRouter(prefix="/mongo", tags=["mongo"])
 
 
-@router.post("/db/add", summary="Create MongoDB database")
-async def mongo_db_add(data: MongoDbAdd):
+@command(router, "post", "/db/add", summary="Create MongoDB database")
+def mongo_db_add(data: MongoDbAdd):
     """
     Create a MongoDB database (and user with same name) with supplied password.
 
@@ -22,14 +21,17 @@ async def mongo_db_add(data: MongoDbAdd):
     args = ["--json", "mongo", "db", "add", data.database_name]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.delete("/db/{database_name}", summary="Delete MongoDB database")
-async def mongo_db_del(
+@command(
+    router,
+    "delete",
+    "/db/{database_name}",
+    summary="Delete MongoDB database",
+    argv=("--json", "mongo", "db", "del", "{database_name}"),
+)
+def mongo_db_del(
     database_name: str = Path(
         ..., description="Name of the MongoDB database to delete"
     ),
@@ -39,15 +41,10 @@ async def mongo_db_del(
 
     Maps to: ``devil mongo db del database_name``.
     """
-    args = ["--json", "mongo", "db", "del", database_name]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.put("/passwd", summary="Change MongoDB password")
-async def mongo_passwd(data: MongoPasswd):
+@command(router, "put", "/passwd", summary="Change MongoDB password")
+def mongo_passwd(data: MongoPasswd):
     """
     Change MongoDB user password.
 
@@ -56,21 +53,21 @@ async def mongo_passwd(data: MongoPasswd):
     args = ["--json", "mongo", "passwd", data.user_name]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.get("/list", summary="List MongoDB databases and users", tags=["read-only"])
-async def mongo_list():
+@command(
+    router,
+    "get",
+    "/list",
+    summary="List MongoDB databases and users",
+    argv=("--json", "mongo", "list"),
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def mongo_list():
     """
     List MongoDB databases and users.
 
     Maps to: ``devil mongo list``.
     """
-    args = ["--json", "mongo", "list"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
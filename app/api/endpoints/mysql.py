@@ -3,20 +3,37 @@ from __future__ import annotations
 from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Path
+from fastapi import Query
 
+from app.api.registry import LIST_CACHE_TTL
+from app.api.registry import RESPONSE_CACHE
+from app.api.registry import command
 from app.schemas.mysql import MySQLAccessAdd
 from app.schemas.mysql import MySQLDbAdd
 from app.schemas.mysql import MySQLPasswd
 from app.schemas.mysql import MySQLPrivileges
+from app.schemas.mysql import MySQLPrivilegesReconcile
 from app.schemas.mysql import MySQLUserAdd
+from app.services.mysql_grants import apply_grants
+from app.services.mysql_grants import current_masks
+from app.services.mysql_grants import desired_masks
+from app.services.mysql_grants import plan_as_list
+from app.services.mysql_grants import plan_grants
+from app.services.mysql_grants import unread_users
 from app.services.socket_client import DevilSocketError
 from app.services.socket_client import execute_devil_command
 
 router = APIRouter(prefix="/mysql", tags=["mysql"])
 
 
-@router.post("/db/add", summary="Create MySQL database")
-async def mysql_db_add(data: MySQLDbAdd):
+@command(
+    router,
+    "post",
+    "/db/add",
+    summary="Create MySQL database",
+    error_label="mysql db add",
+)
+def mysql_db_add(data: MySQLDbAdd):
     """
     Create a MySQL database (optionally set collation).
 
@@ -25,18 +42,18 @@ async def mysql_db_add(data: MySQLDbAdd):
     args = ["--json", "mysql", "db", "add", data.database_name]
     if data.collate:
         args.append(data.collate)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(
-            status_code=400, detail=f"mysql db add error: {exc}"
-        ) from exc
-
-
-@router.delete("/db/{database_name}", summary="Delete MySQL database")
-async def mysql_db_del(
+    return args
+
+
+@command(
+    router,
+    "delete",
+    "/db/{database_name}",
+    summary="Delete MySQL database",
+    argv=("--json", "mysql", "db", "del", "{database_name}"),
+    error_label="mysql db del",
+)
+def mysql_db_del(
     database_name: str = Path(..., description="Name of the MySQL database to delete"),
 ):
     """
@@ -44,19 +61,16 @@ async def mysql_db_del(
 
     Maps to: ``devil mysql db del database_name``.
     """
-    args = ["--json", "mysql", "db", "del", database_name]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(
-            status_code=400, detail=f"mysql db del error: {exc}"
-        ) from exc
 
 
-@router.post("/user/add", summary="Create MySQL user")
-async def mysql_user_add(data: MySQLUserAdd):
+@command(
+    router,
+    "post",
+    "/user/add",
+    summary="Create MySQL user",
+    error_label="mysql user add",
+)
+def mysql_user_add(data: MySQLUserAdd):
     """
     Create a MySQL user.
 
@@ -65,18 +79,18 @@ async def mysql_user_add(data: MySQLUserAdd):
     args = ["--json", "mysql", "user", "add", data.user_name]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(
-            status_code=400, detail=f"mysql user add error: {exc}"
-        ) from exc
-
-
-@router.delete("/user/{user_name}", summary="Delete MySQL user")
-async def mysql_user_del(
+    return args
+
+
+@command(
+    router,
+    "delete",
+    "/user/{user_name}",
+    summary="Delete MySQL user",
+    argv=("--json", "mysql", "user", "del", "{user_name}"),
+    error_label="mysql user del",
+)
+def mysql_user_del(
     user_name: str = Path(..., description="Name of the MySQL user to delete"),
 ):
     """
@@ -84,37 +98,32 @@ async def mysql_user_del(
 
     Maps to: ``devil mysql user del user_name``.
     """
-    args = ["--json", "mysql", "user", "del", user_name]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(
-            status_code=400, detail=f"mysql user del error: {exc}"
-        ) from exc
 
 
-@router.post("/access/add", summary="Add MySQL host access")
-async def mysql_access_add(data: MySQLAccessAdd):
+@command(
+    router,
+    "post",
+    "/access/add",
+    summary="Add MySQL host access",
+    error_label="mysql access add",
+)
+def mysql_access_add(data: MySQLAccessAdd):
     """
     Add host access for a MySQL user.
 
     Maps to: ``devil mysql access add user_name@host_name``.
     """
-    args = ["--json", "mysql", "access", "add", f"{data.user_name}@{data.host_name}"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(
-            status_code=400, detail=f"mysql access add error: {exc}"
-        ) from exc
+    return ["--json", "mysql", "access", "add", f"{data.user_name}@{data.host_name}"]
 
 
-@router.delete("/access/{user_name}@{host_name}", summary="Remove MySQL host access")
-async def mysql_access_del(
+@command(
+    router,
+    "delete",
+    "/access/{user_name}@{host_name}",
+    summary="Remove MySQL host access",
+    error_label="mysql access del",
+)
+def mysql_access_del(
     user_name: str = Path(
         ..., description="Name of the MySQL user to remove access for"
     ),
@@ -125,19 +134,17 @@ async def mysql_access_del(
 
     Maps to: ``devil mysql access del user_name@host_name``.
     """
-    args = ["--json", "mysql", "access", "del", f"{user_name}@{host_name}"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(
-            status_code=400, detail=f"mysql access del error: {exc}"
-        ) from exc
+    return ["--json", "mysql", "access", "del", f"{user_name}@{host_name}"]
 
 
-@router.put("/privileges", summary="Set MySQL privileges")
-async def mysql_privileges(data: MySQLPrivileges):
+@command(
+    router,
+    "put",
+    "/privileges",
+    summary="Set MySQL privileges",
+    error_label="privileges",
+)
+def mysql_privileges(data: MySQLPrivileges):
     """
     Set privileges for a user (optionally host-qualified) on a database.
 
@@ -148,7 +155,7 @@ async def mysql_privileges(data: MySQLPrivileges):
         if data.host_name is None
         else f"{data.user_name}@{data.host_name}"
     )
-    args = [
+    return [
         "--json",
         "mysql",
         "privileges",
@@ -156,16 +163,62 @@ async def mysql_privileges(data: MySQLPrivileges):
         data.database_name,
         ",".join(data.mysql_privileges),
     ]
+
+
+@router.put("/privileges/reconcile", summary="Reconcile MySQL grant matrix")
+async def mysql_privileges_reconcile(
+    data: MySQLPrivilegesReconcile,
+    dry_run: bool = Query(
+        False, description="Only compute and return the plan, do not change anything"
+    ),
+):
+    """
+    Bring users x databases privileges to the desired matrix with minimal changes.
+
+    Maps to: ``devil mysql list`` followed by one
+    ``devil mysql privileges user_name[@host_name] database_name +PRIV,-PRIV...``
+    per pair whose privileges differ, run concurrently.
+
+    Users whose privileges do not appear in the listing have unknown current
+    grants: with prune the request is rejected, otherwise they are reported
+    in ``warnings`` since none of their existing privileges can be revoked.
+    """
     try:
-        return await execute_devil_command(args)
+        listing = await execute_devil_command(["--json", "mysql", "list"])
     except DevilSocketError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"privileges error: {exc}") from exc
-
-
-@router.put("/passwd", summary="Change MySQL password")
-async def mysql_passwd(data: MySQLPasswd):
+    desired = desired_masks(data)
+    unread = unread_users(listing, desired)
+    if unread and data.prune:
+        raise HTTPException(
+            status_code=400,
+            detail=f"no privileges listed for {', '.join(unread)}; cannot prune",
+        )
+    plan = plan_grants(current_masks(listing), desired, prune=data.prune)
+    warnings = [
+        f"no privileges listed for {user}; existing grants are not revoked"
+        for user in unread
+    ]
+    if dry_run:
+        return {"dry_run": True, "plan": plan_as_list(plan), "warnings": warnings}
+    results = await apply_grants(plan)
+    RESPONSE_CACHE.invalidate("mysql")
+    return {
+        "dry_run": False,
+        "results": results,
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "warnings": warnings,
+    }
+
+
+@command(
+    router,
+    "put",
+    "/passwd",
+    summary="Change MySQL password",
+    error_label="mysql passwd",
+)
+def mysql_passwd(data: MySQLPasswd):
     """
     Change password for a MySQL user (optionally host-qualified).
 
@@ -179,27 +232,22 @@ async def mysql_passwd(data: MySQLPasswd):
     args = ["--json", "mysql", "passwd", user_part]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(
-            status_code=400, detail=f"mysql passwd error: {exc}"
-        ) from exc
+    return args
 
 
-@router.get("/list", summary="List MySQL databases and users", tags=["read-only"])
-async def mysql_list():
+@command(
+    router,
+    "get",
+    "/list",
+    summary="List MySQL databases and users",
+    argv=("--json", "mysql", "list"),
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+    error_label="mysql list",
+)
+def mysql_list():
     """
     List MySQL databases and users.
 
     Maps to: ``devil mysql list -v|--verbose`` (always returning verbose output).
     """
-    args = ["--json", "mysql", "list"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"mysql list error: {exc}") from exc
@@ -4,16 +4,16 @@ from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Path
 
+from app.api.registry import LIST_CACHE_TTL
+from app.api.registry import command
 from app.schemas.port import PortAdd
 from app.schemas.port import PortType
-from app.services.socket_client import DevilSocketError
-from app.services.socket_client import execute_devil_command
 
 router = APIRouter(prefix="/port", tags=["port"])
 
 
-@router.post("/add", summary="Reserve port (or random)")
-async def port_add(data: PortAdd):
+@command(router, "post", "/add", summary="Reserve port (or random)")
+def port_add(data: PortAdd):
     """
     Reserve a TCP/UDP port (or get a random one).
 
@@ -33,14 +33,11 @@ async def port_add(data: PortAdd):
         raise HTTPException(status_code=400, detail="Provide port or set random=true")
     if data.description:
         args.append(data.description)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.delete("/{type}/{port}", summary="Release reserved port")
-async def port_del(
+@command(router, "delete", "/{type}/{port}", summary="Release reserved port")
+def port_del(
     type: PortType = Path(..., description="Port type: tcp or udp"),
     port: int = Path(..., description="Port number to release"),
 ):
@@ -49,22 +46,21 @@ async def port_del(
 
     Maps to: ``devil port del type port``.
     """
-    args = ["--json", "port", "del", type, str(port)]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return ["--json", "port", "del", type, str(port)]
 
 
-@router.get("/list", summary="List reserved ports", tags=["read-only"])
-async def port_list():
+@command(
+    router,
+    "get",
+    "/list",
+    summary="List reserved ports",
+    argv=("--json", "port", "list"),
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def port_list():
     """
     List all reserved ports.
 
     Maps to: ``devil port list``.
     """
-    args = ["--json", "port", "list"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -5,19 +5,19 @@ from fastapi import HTTPException
 from fastapi import Path
 from fastapi import Query
 
+from app.api.registry import LIST_CACHE_TTL
+from app.api.registry import command
 from app.schemas.repo import RepoAccountAdd
 from app.schemas.repo import RepoAccountPasswd
 from app.schemas.repo import RepoRepositoryAdd
 from app.schemas.repo import RepoRepositoryChange
 from app.schemas.repo import RepoType
-from app.services.socket_client import DevilSocketError
-from app.services.socket_client import execute_devil_command
 
 router = APIRouter(prefix="/repo", tags=["repo"])
 
 
-@router.post("/repository/add", summary="Create repository")
-async def repo_repository_add(data: RepoRepositoryAdd):
+@command(router, "post", "/repository/add", summary="Create repository")
+def repo_repository_add(data: RepoRepositoryAdd):
     """
     Create a repository.
 
@@ -26,7 +26,7 @@ async def repo_repository_add(data: RepoRepositoryAdd):
     """
     if data.repo_visibility is None:
         raise HTTPException(status_code=400, detail="repo_visibility required")
-    args = [
+    return [
         "--json",
         "repo",
         "repository",
@@ -35,14 +35,16 @@ async def repo_repository_add(data: RepoRepositoryAdd):
         data.repo_name,
         data.repo_visibility,
     ]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.delete("/repository/{repo_type}/{repo_name}", summary="Delete repository")
-async def repo_repository_del(
+@command(
+    router,
+    "delete",
+    "/repository/{repo_type}/{repo_name}",
+    summary="Delete repository",
+    argv=("--json", "repo", "repository", "del", "{repo_type}", "{repo_name}"),
+)
+def repo_repository_del(
     repo_type: RepoType = Path(..., description="Repository type: pub or priv"),
     repo_name: str = Path(..., description="Repository name"),
 ):
@@ -51,15 +53,10 @@ async def repo_repository_del(
 
     Maps to: ``devil repo repository del repo_type repo_name``.
     """
-    args = ["--json", "repo", "repository", "del", repo_type, repo_name]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.put("/repository/change", summary="Change repository visibility")
-async def repo_repository_change(data: RepoRepositoryChange):
+@command(router, "put", "/repository/change", summary="Change repository visibility")
+def repo_repository_change(data: RepoRepositoryChange):
     """
     Change repository visibility.
 
@@ -67,7 +64,7 @@ async def repo_repository_change(data: RepoRepositoryChange):
     """
     if data.repo_visibility is None:
         raise HTTPException(status_code=400, detail="repo_visibility required")
-    args = [
+    return [
         "--json",
         "repo",
         "repository",
@@ -76,14 +73,10 @@ async def repo_repository_change(data: RepoRepositoryChange):
         data.repo_name,
         data.repo_visibility,
     ]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.post("/account/add", summary="Add repository account")
-async def repo_account_add(data: RepoAccountAdd):
+@command(router, "post", "/account/add", summary="Add repository account")
+def repo_account_add(data: RepoAccountAdd):
     """
     Add a repository user account (password optional; system may prompt normally).
 
@@ -100,17 +93,25 @@ async def repo_account_add(data: RepoAccountAdd):
     ]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.delete(
+@command(
+    router,
+    "delete",
     "/account/{repo_type}/{repo_name}/{repo_username}",
     summary="Delete repository account",
+    argv=(
+        "--json",
+        "repo",
+        "account",
+        "del",
+        "{repo_type}",
+        "{repo_name}",
+        "{repo_username}",
+    ),
 )
-async def repo_account_del(
+def repo_account_del(
     repo_type: RepoType = Path(..., description="Repository type: pub or priv"),
     repo_name: str = Path(..., description="Repository name"),
     repo_username: str = Path(..., description="Repository username"),
@@ -120,15 +121,10 @@ async def repo_account_del(
 
     Maps to: ``devil repo account del repo_type repo_name repo_username``.
     """
-    args = ["--json", "repo", "account", "del", repo_type, repo_name, repo_username]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.put("/account/passwd", summary="Change repository account password")
-async def repo_account_passwd(data: RepoAccountPasswd):
+@command(router, "put", "/account/passwd", summary="Change repository account password")
+def repo_account_passwd(data: RepoAccountPasswd):
     """
     Change repository account password.
 
@@ -145,14 +141,18 @@ async def repo_account_passwd(data: RepoAccountPasswd):
     ]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.get("/list", summary="List repositories or accounts", tags=["read-only"])
-async def repo_list(
+@command(
+    router,
+    "get",
+    "/list",
+    summary="List repositories or accounts",
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def repo_list(
     repo_type: RepoType | None = Query(
         None,
         description="Optional repository type to filter list (requires repo_name if provided)",
@@ -174,7 +174,4 @@ async def repo_list(
         raise HTTPException(
             status_code=400, detail="Provide both repo_type and repo_name or neither"
         )
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
@@ -5,18 +5,23 @@ from fastapi import HTTPException
 from fastapi import Path
 from fastapi import Query
 
+from app.api.registry import LIST_CACHE_TTL
+from app.api.registry import command
 from app.schemas.ssl import SSLMailAdd
 from app.schemas.ssl import SSLMailGet
 from app.schemas.ssl import SSLWWWAdd
 from app.schemas.ssl import SSLWWWGet
-from app.services.socket_client import DevilSocketError
-from app.services.socket_client import execute_devil_command
 
 router = APIRouter(prefix="/ssl", tags=["ssl"])
 
+# Let's Encrypt issuance waits for domain validation
+LE_TIMEOUT = 120
 
-@router.post("/www/add", summary="Add WWW SSL certificate")
-async def ssl_www_add(data: SSLWWWAdd):
+
+@command(
+    router, "post", "/www/add", summary="Add WWW SSL certificate", timeout=LE_TIMEOUT
+)
+def ssl_www_add(data: SSLWWWAdd):
     """
     Add a WWW SSL certificate (standard or Let's Encrypt).
 
@@ -42,14 +47,11 @@ async def ssl_www_add(data: SSLWWWAdd):
         args.extend([data.ssl_cert_file, data.ssl_key_file])
         if data.domain:
             args.append(data.domain)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.delete("/www/{ssl_ip}", summary="Delete WWW SSL certificate")
-async def ssl_www_del(
+@command(router, "delete", "/www/{ssl_ip}", summary="Delete WWW SSL certificate")
+def ssl_www_del(
     ssl_ip: str = Path(..., description="SSL IP address"),
     domain: str | None = Query(None, description="Optional SNI domain"),
 ):
@@ -61,14 +63,11 @@ async def ssl_www_del(
     args = ["--json", "ssl", "www", "del", ssl_ip]
     if domain:
         args.append(domain)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.post("/www/get", summary="Get WWW SSL certificate", tags=["read-only"])
-async def ssl_www_get(data: SSLWWWGet):
+@command(router, "post", "/www/get", summary="Get WWW SSL certificate")
+def ssl_www_get(data: SSLWWWGet):
     """
     Get certificate and key for a WWW SSL entry.
 
@@ -78,85 +77,91 @@ async def ssl_www_get(data: SSLWWWGet):
     if data.domain:
         args.append(data.domain)
     args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.get("/www/list", summary="List WWW SSL certificates", tags=["read-only"])
-async def ssl_www_list():
+@command(
+    router,
+    "get",
+    "/www/list",
+    summary="List WWW SSL certificates",
+    argv=("--json", "ssl", "www", "list"),
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def ssl_www_list():
     """
     List all WWW SSL certificates.
 
     Maps to: ``devil ssl www list``.
     """
-    args = ["--json", "ssl", "www", "list"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.post("/mail/add", summary="Add mail SSL certificate")
-async def ssl_mail_add(data: SSLMailAdd):
+@command(
+    router,
+    "post",
+    "/mail/add",
+    summary="Add mail SSL certificate",
+    argv=(
+        "--json",
+        "ssl",
+        "mail",
+        "add",
+        "{data.ssl_ip}",
+        "{data.ssl_cert_file}",
+        "{data.ssl_key_file}",
+    ),
+)
+def ssl_mail_add(data: SSLMailAdd):
     """
     Add a mail SSL certificate.
 
     Maps to: ``devil ssl mail add ssl_ip ssl_cert_file ssl_key_file``.
     """
-    args = [
-        "--json",
-        "ssl",
-        "mail",
-        "add",
-        data.ssl_ip,
-        data.ssl_cert_file,
-        data.ssl_key_file,
-    ]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.delete("/mail/{ssl_ip}", summary="Delete mail SSL certificate")
-async def ssl_mail_del(ssl_ip: str = Path(..., description="SSL IP address")):
+@command(
+    router,
+    "delete",
+    "/mail/{ssl_ip}",
+    summary="Delete mail SSL certificate",
+    argv=("--json", "ssl", "mail", "del", "{ssl_ip}"),
+)
+def ssl_mail_del(ssl_ip: str = Path(..., description="SSL IP address")):
     """
     Delete a mail SSL certificate.
 
     Maps to: ``devil ssl mail del ssl_ip``.
     """
-    args = ["--json", "ssl", "mail", "del", ssl_ip]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.post("/mail/get", summary="Get mail SSL certificate", tags=["read-only"])
-async def ssl_mail_get(data: SSLMailGet):
+@command(
+    router,
+    "post",
+    "/mail/get",
+    summary="Get mail SSL certificate",
+    argv=("--json", "ssl", "mail", "get", "{data.ssl_ip}", "{data.password}"),
+)
+def ssl_mail_get(data: SSLMailGet):
     """
     Get certificate and key for a mail SSL entry.
 
     Maps to: ``devil ssl mail get ssl_ip``.
     """
-    args = ["--json", "ssl", "mail", "get", data.ssl_ip, data.password]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.get("/mail/list", summary="List mail SSL certificates", tags=["read-only"])
-async def ssl_mail_list():
+@command(
+    router,
+    "get",
+    "/mail/list",
+    summary="List mail SSL certificates",
+    argv=("--json", "ssl", "mail", "list"),
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def ssl_mail_list():
     """
     List all mail SSL certificates.
 
     Maps to: ``devil ssl mail list``.
     """
-    args = ["--json", "ssl", "mail", "list"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
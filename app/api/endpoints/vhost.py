@@ -1,18 +1,24 @@
 from __future__ import annotations
 
 from fastapi import APIRouter
-from fastapi import HTTPException
 from fastapi import Query
 
+from app.api.registry import LIST_CACHE_TTL
+from app.api.registry import command
 from app.schemas.vhost import VHostType
-from app.services.socket_client import DevilSocketError
-from app.services.socket_client import execute_devil_command
 
 router = APIRouter(prefix="/vhost", tags=["vhost"])
 
 
-@router.get("/list", summary="List IP addresses", tags=["read-only"])
-async def vhost_list(
+@command(
+    router,
+    "get",
+    "/list",
+    summary="List IP addresses",
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def vhost_list(
     vhost_type: VHostType | None = Query(
         None, description="Vhost type: private, public or all"
     ),
@@ -25,7 +31,4 @@ async def vhost_list(
     args = ["--json", "vhost", "list"]
     if vhost_type:
         args.append(vhost_type)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
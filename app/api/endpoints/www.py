@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from fastapi import APIRouter
-from fastapi import HTTPException
 from fastapi import Path
 
+from app.api.registry import LIST_CACHE_TTL
+from app.api.registry import command
 from app.schemas.www import WWWAdd
 from app.schemas.www import WWWDel
 from app.schemas.www import WWWOptions
@@ -14,14 +15,12 @@ from app.schemas.www import WWWStatsAccountDel
 from app.schemas.www import WWWStatsAccountPasswd
 from app.schemas.www import WWWStatsDomainAdd
 from app.schemas.www import WWWStatsDomainDel
-from app.services.socket_client import DevilSocketError
-from app.services.socket_client import execute_devil_command
 
 router = APIRouter(prefix="/www", tags=["www"])
 
 
-@router.post("/add", summary="Add website")
-async def www_add(data: WWWAdd):
+@command(router, "post", "/add", summary="Add website")
+def www_add(data: WWWAdd):
     """
     Add a website (standard, pointer, proxy, or passenger app).
 
@@ -49,14 +48,11 @@ async def www_add(data: WWWAdd):
         args.append(data.www_type)
     else:
         args.append("php")
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.delete("/del/{www_domain}", summary="Delete website")
-async def www_del(data: WWWDel):
+@command(router, "delete", "/del/{www_domain}", summary="Delete website")
+def www_del(data: WWWDel):
     """
     Delete a website (optionally removing data).
 
@@ -65,56 +61,65 @@ async def www_del(data: WWWDel):
     args = ["--json", "www", "del", data.www_domain]
     if data.remove:
         args.append("--remove")
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
 # TODO: Add validation for option values
-@router.put("/options", summary="Change website option")
-async def www_options(data: WWWOptions):
+@command(
+    router,
+    "put",
+    "/options",
+    summary="Change website option",
+    argv=(
+        "--json",
+        "www",
+        "options",
+        "{data.www_domain}",
+        "{data.www_option}",
+        "{data.value}",
+    ),
+)
+def www_options(data: WWWOptions):
     """
     Change website option.
 
     Maps to: ``devil www options www_domain www_option value`` (value semantic depends on option).
     """
-    args = ["--json", "www", "options", data.www_domain, data.www_option, data.value]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.post("/restart/{www_domain}", summary="Restart passenger app")
-async def www_restart(www_domain: str = Path(..., description="Website domain")):
+@command(
+    router,
+    "post",
+    "/restart/{www_domain}",
+    summary="Restart passenger app",
+    argv=("--json", "www", "restart", "{www_domain}"),
+)
+def www_restart(www_domain: str = Path(..., description="Website domain")):
     """
     Restart a passenger hosted app (python/node/ruby).
 
     Maps to: ``devil www restart www_domain``.
     """
-    args = ["--json", "www", "restart", www_domain]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.get("/list", summary="List websites", tags=["read-only"])
-async def www_list():
+@command(
+    router,
+    "get",
+    "/list",
+    summary="List websites",
+    argv=("--json", "www", "list"),
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def www_list():
     """List websites.
 
     Maps to: ``devil www list -v|--verbose`` (always returning verbose output).
     """
-    args = ["--json", "www", "list"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.post("/stats/account/add", summary="Add stats account")
-async def www_stats_account_add(data: WWWStatsAccountAdd):
+@command(router, "post", "/stats/account/add", summary="Add stats account")
+def www_stats_account_add(data: WWWStatsAccountAdd):
     """
     Create a Matomo stats account.
 
@@ -123,28 +128,28 @@ async def www_stats_account_add(data: WWWStatsAccountAdd):
     args = ["--json", "www", "stats", "account", "add", data.user_name]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.delete("/stats/account/{user_name}", summary="Delete stats account")
-async def www_stats_account_del(data: WWWStatsAccountDel):
+@command(
+    router,
+    "delete",
+    "/stats/account/{user_name}",
+    summary="Delete stats account",
+    argv=("--json", "www", "stats", "account", "del", "{data.user_name}"),
+)
+def www_stats_account_del(data: WWWStatsAccountDel):
     """
     Delete a Matomo stats account.
 
     Maps to: ``devil www stats account del user_name``.
     """
-    args = ["--json", "www", "stats", "account", "del", data.user_name]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.put("/stats/account/passwd", summary="Change stats account password")
-async def www_stats_account_passwd(data: WWWStatsAccountPasswd):
+@command(
+    router, "put", "/stats/account/passwd", summary="Change stats account password"
+)
+def www_stats_account_passwd(data: WWWStatsAccountPasswd):
     """
     Change password for a Matomo stats account.
 
@@ -160,77 +165,97 @@ async def www_stats_account_passwd(data: WWWStatsAccountPasswd):
     ]
     if data.password:
         args.append(data.password)
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return args
 
 
-@router.post("/stats/access/add", summary="Grant stats access")
-async def www_stats_access_add(data: WWWStatsAccessAdd):
+@command(
+    router,
+    "post",
+    "/stats/access/add",
+    summary="Grant stats access",
+    argv=(
+        "--json",
+        "www",
+        "stats",
+        "access",
+        "add",
+        "{data.www_domain}",
+        "{data.user_name}",
+    ),
+)
+def www_stats_access_add(data: WWWStatsAccessAdd):
     """
     Grant Matomo stats access for a website to a stats user.
 
     Maps to: ``devil www stats access add www_domain user_name``.
     """
-    args = ["--json", "www", "stats", "access", "add", data.www_domain, data.user_name]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.delete("/stats/access/{www_domain}/{user_name}", summary="Revoke stats access")
-async def www_stats_access_del(data: WWWStatsAccessDel):
+@command(
+    router,
+    "delete",
+    "/stats/access/{www_domain}/{user_name}",
+    summary="Revoke stats access",
+    argv=(
+        "--json",
+        "www",
+        "stats",
+        "access",
+        "del",
+        "{data.www_domain}",
+        "{data.user_name}",
+    ),
+)
+def www_stats_access_del(data: WWWStatsAccessDel):
     """
     Revoke Matomo stats access.
 
     Maps to: ``devil www stats access del www_domain user_name``.
     """
-    args = ["--json", "www", "stats", "access", "del", data.www_domain, data.user_name]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.post("/stats/domain/add", summary="Add stats domain")
-async def www_stats_domain_add(data: WWWStatsDomainAdd):
+@command(
+    router,
+    "post",
+    "/stats/domain/add",
+    summary="Add stats domain",
+    argv=("--json", "www", "stats", "domain", "add", "{data.www_domain}"),
+)
+def www_stats_domain_add(data: WWWStatsDomainAdd):
     """
     Add a domain to Matomo stats tracking.
 
     Maps to: ``devil www stats domain add www_domain``.
     """
-    args = ["--json", "www", "stats", "domain", "add", data.www_domain]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.delete("/stats/domain/{www_domain}", summary="Delete stats domain")
-async def www_stats_domain_del(data: WWWStatsDomainDel):
+@command(
+    router,
+    "delete",
+    "/stats/domain/{www_domain}",
+    summary="Delete stats domain",
+    argv=("--json", "www", "stats", "domain", "del", "{data.www_domain}"),
+)
+def www_stats_domain_del(data: WWWStatsDomainDel):
     """
     Remove a domain from Matomo stats tracking.
 
     Maps to: ``devil www stats domain del www_domain``.
     """
-    args = ["--json", "www", "stats", "domain", "del", data.www_domain]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.get("/stats/list", summary="List stats users/domains", tags=["read-only"])
-async def www_stats_list():
+@command(
+    router,
+    "get",
+    "/stats/list",
+    summary="List stats users/domains",
+    argv=("--json", "www", "stats", "list"),
+    read_only=True,
+    cache_ttl=LIST_CACHE_TTL,
+)
+def www_stats_list():
     """
     List Matomo stats users and domains.
 
     Maps to: ``devil www stats list``.
     """
-    args = ["--json", "www", "stats", "list"]
-    try:
-        return await execute_devil_command(args)
-    except DevilSocketError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
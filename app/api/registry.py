@@ -0,0 +1,263 @@
+"""
+Declarative registry of devil commands exposed as API routes.
+
+Each command is declared once on the function describing it::
+
+    @command(router, "get", "/list", summary="List FTP accounts", read_only=True,
+             argv=("--json", "ftp", "list"))
+    def ftp_list():
+        \"\"\"List all FTP accounts.\"\"\"
+
+The function's parameters become the route parameters and its docstring the
+route description. Commands whose argv is a plain substitution declare a
+static template where ``{name}`` is a parameter and ``{name.attr}`` an
+attribute of one (usually of the request body); templates are compiled at
+import time, so dispatch only fills in values. Commands with conditional
+arguments return their argv from the function instead and may raise
+HTTPException for invalid combinations.
+
+Every generated route goes through ``run_command``, which applies the
+command's timeout and cache policy and maps devil errors to HTTP 400.
+
+Authorization does not look at HTTP methods or tags: a route is a read, open
+to ``read`` and ``<family>:read`` keys, only when it is registered as one,
+with ``read_only=True`` or, for hand-written routes, ``@read_route``.
+Register only routes without side effects whose responses carry no secrets.
+"""
+
+from __future__ import annotations
+
+import inspect
+import os
+import time
+import typing
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Sequence
+from dataclasses import dataclass
+from dataclasses import field
+from operator import attrgetter
+from typing import Any
+
+from fastapi import APIRouter
+from fastapi import HTTPException
+from fastapi import status
+
+from app.services.socket_client import DevilSocketError
+from app.services.socket_client import execute_devil_command
+
+# Seconds list responses are served from cache; 0 disables caching
+LIST_CACHE_TTL = float(os.getenv("DEVIL_LIST_CACHE_TTL", "0"))
+RESPONSE_CACHE_ENTRIES = int(os.getenv("DEVIL_RESPONSE_CACHE_ENTRIES", "256"))
+
+READ_ONLY_TAG = "read-only"
+
+# Endpoints of routes registered as reads, see ``read_route``
+READ_ENDPOINTS: set[Callable[..., Any]] = set()
+
+ArgPart = str | Callable[[dict[str, Any]], Any]
+
+
+def compile_argv(template: Sequence[str]) -> tuple[ArgPart, ...]:
+    """Turn ``{name}``/``{name.attr}`` placeholders into getters over route values."""
+    parts: list[ArgPart] = []
+    for item in template:
+        if not (item.startswith("{") and item.endswith("}")):
+            parts.append(item)
+            continue
+        name, _, attrs = item[1:-1].partition(".")
+        if attrs:
+            getter = attrgetter(attrs)
+            parts.append(lambda values, n=name, g=getter: g(values[n]))
+        else:
+            parts.append(lambda values, n=name: values[n])
+    return tuple(parts)
+
+
+@dataclass(frozen=True, slots=True)
+class Command:
+    name: str
+    method: str
+    path: str
+    build: Callable[..., list[str] | None]
+    read_only: bool = False
+    cache_ttl: float = 0.0
+    timeout: float | None = None
+    error_label: str | None = None
+    template: tuple[ArgPart, ...] | None = field(default=None, compare=False)
+
+    def argv(self, values: dict[str, Any]) -> list[str]:
+        if self.template is not None:
+            return [p if isinstance(p, str) else p(values) for p in self.template]
+        args = self.build(**values)
+        if args is None:
+            raise TypeError(f"command {self.name} has neither argv nor a builder")
+        return args
+
+
+class ResponseCache:
+    """
+    TTL cache of read-only command results keyed by argv.
+
+    A successful write drops cached results of the same command family
+    (``devil <family> ...``) so clients read their own changes.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, ...], tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def get(self, key: tuple[str, ...], now: float) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= now:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: tuple[str, ...], value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, family: str) -> None:
+        for key in [k for k in self._entries if len(k) > 1 and k[1] == family]:
+            del self._entries[key]
+
+
+COMMANDS: dict[str, Command] = {}
+RESPONSE_CACHE = ResponseCache()
+
+
+async def run_command(spec: Command, args: list[str]) -> dict[str, Any]:
+    """Execute ``args`` for ``spec``, applying its cache policy and timeout."""
+    key = tuple(str(a) for a in args)
+    if spec.cache_ttl > 0:
+        cached = RESPONSE_CACHE.get(key, time.monotonic())
+        if cached is not None:
+            return cached
+    try:
+        if spec.timeout is None:
+            result = await execute_devil_command(args)
+        else:
+            result = await execute_devil_command(args, timeout=spec.timeout)
+    except DevilSocketError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+    except Exception as exc:
+        if spec.error_label is None:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{spec.error_label} error: {exc}",
+        ) from exc
+    if spec.cache_ttl > 0:
+        RESPONSE_CACHE.put(key, result, time.monotonic() + spec.cache_ttl)
+    elif not spec.read_only and len(key) > 1:
+        RESPONSE_CACHE.invalidate(key[1])
+    return result
+
+
+def _route_signature(func: Callable[..., Any]) -> inspect.Signature:
+    # resolve postponed annotations against the declaring module
+    hints = typing.get_type_hints(func, include_extras=True)
+    signature = inspect.signature(func)
+    return signature.replace(
+        parameters=[
+            p.replace(annotation=hints.get(p.name, p.annotation))
+            for p in signature.parameters.values()
+        ],
+        return_annotation=inspect.Signature.empty,
+    )
+
+
+def command(
+    router: APIRouter,
+    method: str,
+    path: str,
+    *,
+    summary: str,
+    argv: Sequence[str] | None = None,
+    read_only: bool = False,
+    cache_ttl: float = 0.0,
+    timeout: float | None = None,
+    error_label: str | None = None,
+    **route_kwargs: Any,
+) -> Callable[[Callable[..., list[str] | None]], Callable[..., list[str] | None]]:
+    """
+    Register a devil command and mount its route on ``router``.
+
+    ``read_only`` registers the route as a read (see ``read_route``) and
+    tags it read-only in the docs.
+    """
+
+    def decorator(
+        func: Callable[..., list[str] | None],
+    ) -> Callable[..., list[str] | None]:
+        spec = Command(
+            name=func.__name__,
+            method=method.upper(),
+            path=router.prefix + path,
+            build=func,
+            read_only=read_only,
+            cache_ttl=cache_ttl,
+            timeout=timeout,
+            error_label=error_label,
+            template=compile_argv(argv) if argv is not None else None,
+        )
+        if spec.name in COMMANDS:
+            raise RuntimeError(f"devil command {spec.name} registered twice")
+        COMMANDS[spec.name] = spec
+
+        async def endpoint(**values: Any) -> dict[str, Any]:
+            return await run_command(spec, spec.argv(values))
+
+        endpoint.__signature__ = _route_signature(func)  # type: ignore[attr-defined]
+        endpoint.__name__ = endpoint.__qualname__ = func.__name__
+        endpoint.__module__ = func.__module__
+        endpoint.__doc__ = func.__doc__
+        if read_only:
+            READ_ENDPOINTS.add(endpoint)
+        tags = [READ_ONLY_TAG] if read_only else None
+        router.add_api_route(
+            path,
+            endpoint,
+            methods=[spec.method],
+            summary=summary,
+            tags=tags,
+            **route_kwargs,
+        )
+        return func
+
+    return decorator
+
+
+def read_route(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Register a hand-written route endpoint as a read.
+
+    Reads are allowed for ``read`` and ``<family>:read`` keys and use the
+    read rate limit; apply below the route decorator to routes without side
+    effects whose responses carry no secrets.
+    """
+    READ_ENDPOINTS.add(func)
+    return func
+
+
+def is_read_route(route: Any) -> bool:
+    return getattr(route, "endpoint", None) in READ_ENDPOINTS
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
-import time
+from collections.abc import Callable
+from typing import Any
 
 from dotenv import load_dotenv
 from fastapi import HTTPException
@@ -13,22 +15,81 @@ from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.security import HTTPBearer
 from fastapi.security.api_key import APIKeyHeader
 
+from app.api.registry import is_read_route
+from app.services.api_keys import APIKey
+from app.services.api_keys import APIKeyStore
+from app.services.api_keys import current_key_name
+from app.services.api_keys import hash_key
+from app.services.auth_tracker import DEFAULT_STATE_PATH
+from app.services.auth_tracker import make_tracker
+from app.services.rate_limit import TokenBucketLimiter
+from app.services.rate_limit import retry_after
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 expected_api_key = os.getenv("DEVIL_API_KEY")
-if not expected_api_key:
+API_KEYS_FILE = os.getenv("DEVIL_API_KEYS_FILE") or None
+API_KEYS_RELOAD_SECONDS = float(os.getenv("DEVIL_API_KEYS_RELOAD_SECONDS", "2"))
+if not expected_api_key and not API_KEYS_FILE:
     raise RuntimeError(
-        "DEVIL_API_KEY environment variable must be set before starting the API server"
+        "DEVIL_API_KEY or DEVIL_API_KEYS_FILE environment variable must be set "
+        "before starting the API server"
     )
 
+# DEVIL_API_KEY stays a full-access key named "default"
+API_KEYS = APIKeyStore(
+    API_KEYS_FILE,
+    static=(
+        {hash_key(expected_api_key): APIKey("default", frozenset({"*"}))}
+        if expected_api_key
+        else None
+    ),
+    reload_seconds=API_KEYS_RELOAD_SECONDS,
+)
+
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 BearerScheme = HTTPBearer(auto_error=False)
 
-AUTH_FAILURE_TRACKER: dict[str, dict[str, float | int]] = {}
 AUTH_FAIL_THRESHOLD = int(os.getenv("DEVIL_AUTH_FAIL_THRESHOLD", "5"))
 AUTH_BLOCK_SECONDS = int(os.getenv("DEVIL_AUTH_BLOCK_SECONDS", "300"))
+AUTH_FAIL_WINDOW = int(os.getenv("DEVIL_AUTH_FAIL_WINDOW", str(AUTH_BLOCK_SECONDS)))
+AUTH_TRACKER_MAX_ENTRIES = int(os.getenv("DEVIL_AUTH_TRACKER_MAX_ENTRIES", "10000"))
+AUTH_STATE = os.getenv("DEVIL_AUTH_STATE", "memory").strip().lower()
+AUTH_STATE_PATH = os.getenv("DEVIL_AUTH_STATE_PATH", DEFAULT_STATE_PATH)
+
+AUTH_FAILURE_TRACKER = make_tracker(
+    AUTH_STATE,
+    AUTH_FAIL_THRESHOLD,
+    AUTH_BLOCK_SECONDS,
+    window=AUTH_FAIL_WINDOW,
+    max_entries=AUTH_TRACKER_MAX_ENTRIES,
+    path=AUTH_STATE_PATH,
+)
+
+# Requests per second for authenticated calls; 0 disables the limit
+RATE_LIMIT_READ = float(os.getenv("DEVIL_RATE_LIMIT_READ", "0"))
+RATE_LIMIT_READ_BURST = float(
+    os.getenv("DEVIL_RATE_LIMIT_READ_BURST", str(RATE_LIMIT_READ * 2))
+)
+RATE_LIMIT_WRITE = float(os.getenv("DEVIL_RATE_LIMIT_WRITE", "0"))
+RATE_LIMIT_WRITE_BURST = float(
+    os.getenv("DEVIL_RATE_LIMIT_WRITE_BURST", str(RATE_LIMIT_WRITE * 2))
+)
+RATE_LIMIT_MAX_ENTRIES = int(os.getenv("DEVIL_RATE_LIMIT_MAX_ENTRIES", "10000"))
+
+# Router family only keys with this scope (or "*") may use, reads included
+ADMIN_SCOPE = "admin"
+
+RATE_LIMITERS = {
+    "read": TokenBucketLimiter(
+        RATE_LIMIT_READ, RATE_LIMIT_READ_BURST, max_entries=RATE_LIMIT_MAX_ENTRIES
+    ),
+    "write": TokenBucketLimiter(
+        RATE_LIMIT_WRITE, RATE_LIMIT_WRITE_BURST, max_entries=RATE_LIMIT_MAX_ENTRIES
+    ),
+}
 
 
 def _client_ip(request: Request) -> str:
@@ -39,45 +100,58 @@ def _client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def _register_auth_failure(ip: str) -> tuple[bool, float]:
+async def _tracker_call(method: Callable[..., Any], *args: Any) -> Any:
+    """Call an auth tracker method, in a thread when its backend does file I/O."""
+    if AUTH_FAILURE_TRACKER.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+async def _register_auth_failure(ip: str) -> tuple[bool, float]:
     """
     Register a failed authentication attempt for the given IP.
     Returns (blocked: bool, blocked_until: float).
     If threshold is reached, sets block timer.
     """
-    now = time.time()
-    rec = AUTH_FAILURE_TRACKER.get(ip)
-    if rec is None:
-        rec = {"fail_count": 1, "first_fail_ts": now, "blocked_until": 0.0}
-        AUTH_FAILURE_TRACKER[ip] = rec
-    else:
-        if rec.get("blocked_until", 0.0) and now >= rec["blocked_until"]:
-            rec["fail_count"] = 0
-            rec["blocked_until"] = 0.0
-            rec["first_fail_ts"] = now
-        rec["fail_count"] = int(rec.get("fail_count", 0)) + 1
-    if rec["fail_count"] >= AUTH_FAIL_THRESHOLD:
-        rec["blocked_until"] = now + AUTH_BLOCK_SECONDS
-        return True, rec["blocked_until"]
-    return False, 0.0
-
-
-def _is_blocked(ip: str) -> bool:
+    return await _tracker_call(AUTH_FAILURE_TRACKER.register_failure, ip)
+
+
+def _route_feature(request: Request) -> str:
+    """Return the router family of the request, i.e. the first path segment."""
+    path = getattr(request.scope.get("route"), "path", None) or request.url.path
+    return path.strip("/").split("/", 1)[0]
+
+
+def _request_class(request: Request) -> str:
+    """
+    Classify a request as "read" or "write" for scopes and rate limiting.
+
+    Only routes registered as reads in ``app.api.registry`` are reads.
+    """
+    return "read" if is_read_route(request.scope.get("route")) else "write"
+
+
+def _check_rate_limit(kind: str, ip: str, key_id: str) -> None:
+    """
+    Take a token from the per-key and per-IP buckets of the request class.
+    Raises HTTP 429 with Retry-After when either bucket is empty.
+    """
+    wait = RATE_LIMITERS[kind].take(("key", key_id), ("ip", ip))
+    if wait:
+        logger.warning("Rate limit exceeded ip=%s key=%s class=%s", ip, key_id, kind)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": retry_after(wait)},
+        )
+
+
+async def _is_blocked(ip: str) -> bool:
     """
     Check if the given IP is currently blocked due to repeated auth failures.
     Returns True if blocked, False otherwise.
     """
-    rec = AUTH_FAILURE_TRACKER.get(ip)
-    if not rec:
-        return False
-    blocked_until = rec.get("blocked_until", 0.0) or 0.0
-    now = time.time()
-    if blocked_until and now < blocked_until:
-        return True
-    if blocked_until and now >= blocked_until:
-        rec["blocked_until"] = 0.0
-        rec["fail_count"] = 0
-    return False
+    return await _tracker_call(AUTH_FAILURE_TRACKER.is_blocked, ip)
 
 
 async def verify_api_key(
@@ -87,12 +161,15 @@ async def verify_api_key(
 ) -> None:
     """
     FastAPI dependency for API authentication.
-    Accepts either X-API-Key header or Authorization: Bearer token.
-    Applies per-IP rate limiting and logs failures.
-    Raises HTTP 401 for auth errors, 429 for rate limit blocks.
+    Accepts either X-API-Key header or Authorization: Bearer token, checked
+    against DEVIL_API_KEY and the scoped keys of DEVIL_API_KEYS_FILE.
+    Applies per-IP blocking of repeated failures, logs failures and applies
+    token-bucket rate limits per key and per IP to authenticated requests.
+    Raises HTTP 401 for auth errors, 403 for keys without the route's scope,
+    429 for rate limit blocks.
     """
     ip = _client_ip(request)
-    if _is_blocked(ip):
+    if await _is_blocked(ip):
         logger.warning("Auth attempt while blocked ip=%s", ip)
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -101,12 +178,14 @@ async def verify_api_key(
     supplied = x_api_key or (
         bearer.credentials if bearer and bearer.scheme.lower() == "bearer" else None
     )
-    if not supplied or supplied != expected_api_key:
-        blocked, until = _register_auth_failure(ip)
+    key = API_KEYS.lookup(supplied) if supplied else None
+    if key is None:
+        blocked, until = await _register_auth_failure(ip)
+        rec = await _tracker_call(AUTH_FAILURE_TRACKER.get, ip)
         logger.warning(
             "Authentication failed ip=%s fail_count=%s blocked=%s until=%s",
             ip,
-            AUTH_FAILURE_TRACKER.get(ip, {}).get("fail_count"),
+            rec.fail_count if rec else None,
             blocked,
             int(until) if until else 0,
         )
@@ -119,15 +198,25 @@ async def verify_api_key(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or missing API key",
         )
-    rec = AUTH_FAILURE_TRACKER.get(ip)
-    if rec:
-        rec["fail_count"] = 0
-        rec["blocked_until"] = 0.0
+    await _tracker_call(AUTH_FAILURE_TRACKER.reset, ip)
+    kind = _request_class(request)
+    feature = _route_feature(request)
+    if not key.allows(feature, kind == "read" and feature != ADMIN_SCOPE):
+        logger.warning("API key not allowed ip=%s key=%s", ip, key.name)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="API key is not allowed to access this route",
+        )
+    request.state.api_key = key.name
+    current_key_name.set(key.name)
+    _check_rate_limit(kind, ip, key.name)
 
 
 __all__ = [
+    "API_KEYS",
     "AUTH_BLOCK_SECONDS",
     "AUTH_FAILURE_TRACKER",
     "AUTH_FAIL_THRESHOLD",
+    "RATE_LIMITERS",
     "verify_api_key",
 ]
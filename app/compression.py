@@ -0,0 +1,202 @@
+"""
+Negotiated response compression.
+
+Complete response bodies of at least ``minimum_size`` bytes are compressed
+with the best encoding the client accepts: zstd, then brotli, then gzip.
+zstd and brotli are used only when the ``zstandard`` and ``brotli`` packages
+are installed. Streaming responses (such as NDJSON) are passed through
+unchanged so rows keep arriving as soon as they are produced.
+
+Compressed bodies are kept in a small LRU cache keyed by encoding and body
+digest. Hashing is far cheaper than compressing, so a list that is polled
+repeatedly and has not changed is compressed once.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Enabled encodings in order of preference; empty disables compression
+COMPRESSION = os.getenv("DEVIL_COMPRESSION", "zstd,br,gzip")
+COMPRESSION_MIN_SIZE = int(os.getenv("DEVIL_COMPRESSION_MIN_SIZE", "1024"))
+# Defaults favour low CPU use over ratio
+GZIP_LEVEL = int(os.getenv("DEVIL_COMPRESSION_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("DEVIL_COMPRESSION_BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.getenv("DEVIL_COMPRESSION_ZSTD_LEVEL", "3"))
+COMPRESSION_CACHE_ENTRIES = int(os.getenv("DEVIL_COMPRESSION_CACHE_ENTRIES", "256"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def available_encoders() -> dict[str, Callable[[bytes], bytes]]:
+    encoders: dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        zstd = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        encoders["zstd"] = zstd.compress
+    if brotli is not None:
+        encoders["br"] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    encoders["gzip"] = lambda body: gzip.compress(body, GZIP_LEVEL, mtime=0)
+    return encoders
+
+
+def enabled_encoders(value: str | None) -> dict[str, Callable[[bytes], bytes]]:
+    """
+    Return encoders named in a comma-separated list, in that order.
+
+    Names whose library is not installed are skipped.
+    """
+    encoders = available_encoders()
+    names = [name.strip().lower() for name in (value or "").split(",")]
+    return {name: encoders[name] for name in names if name in encoders}
+
+
+def negotiate(accept_encoding: str, encodings: list[str]) -> str | None:
+    """Pick the first of ``encodings`` the Accept-Encoding header allows."""
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for name in encodings:
+        if accepted.get(name, wildcard) > 0:
+            return name
+    return None
+
+
+class CompressedCache:
+    def __init__(self, max_entries: int = COMPRESSION_CACHE_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, bytes], bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": sum(len(v) for v in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def compress(
+        self, encoding: str, body: bytes, encoder: Callable[[bytes], bytes]
+    ) -> bytes:
+        if self.max_entries <= 0:
+            return encoder(body)
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self._entries.get(key)
+        if compressed is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return compressed
+        self.misses += 1
+        compressed = encoder(body)
+        self._entries[key] = compressed
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return compressed
+
+
+COMPRESSION_CACHE = CompressedCache()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        encoders: dict[str, Callable[[bytes], bytes]],
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        cache: CompressedCache = COMPRESSION_CACHE,
+    ) -> None:
+        self.app = app
+        self.encoders = encoders
+        self.encodings = list(encoders)
+        self.minimum_size = minimum_size
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            initial, start = start, None
+            passthrough = True
+            if initial is None:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=initial["headers"])
+            if (
+                message["type"] != "http.response.body"
+                or message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(initial)
+                await send(message)
+                return
+            compressed = self.cache.compress(encoding, body, self.encoders[encoding])
+            if len(compressed) < len(body):
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(compressed))
+                body = compressed
+            headers.add_vary_header("Accept-Encoding")
+            await send(initial)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,215 @@
+"""
+Queued logging.
+
+Handlers write to stderr/stdout, which blocks the event loop whenever the
+pipe or journal is slow. Instead, loggers get a ``DroppingQueueHandler``
+that only puts the record on a bounded queue; a ``QueueListener`` thread
+per queue runs the real handlers. When a queue is full the record is
+dropped and counted instead of waiting, so logging can never stall a
+request.
+
+The optional access log (DEVIL_ACCESS_LOG=json) writes one JSON object per
+request to stdout through the same mechanism.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import sys
+import time
+from datetime import UTC
+from datetime import datetime
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from typing import Any
+
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Records buffered per queue before new ones are dropped; 0 logs synchronously
+LOG_QUEUE_SIZE = int(os.getenv("DEVIL_LOG_QUEUE_SIZE", "10000"))
+# "json" enables the structured access log
+ACCESS_LOG = os.getenv("DEVIL_ACCESS_LOG", "").strip().lower()
+
+ACCESS_LOGGER = "devil_api.access"
+# uvicorn's own loggers, queued when uvicorn has configured handlers for them
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.access")
+
+
+class DroppingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue[Any]) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # block at shutdown so a full queue is drained rather than raising
+        self.queue.put(self._sentinel)
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+
+
+class LogQueue:
+    """Queues and listener threads installed by ``setup_logging``."""
+
+    def __init__(self, maxsize: int = LOG_QUEUE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._queues: dict[str, tuple[DroppingQueueHandler, _Listener]] = {}
+
+    def attach(
+        self, logger: logging.Logger, handlers: list[logging.Handler]
+    ) -> DroppingQueueHandler:
+        """Replace ``logger``'s handlers with a queue feeding ``handlers``."""
+        self.detach(logger)
+        handler = DroppingQueueHandler(queue.Queue(self.maxsize))
+        listener = _Listener(handler.queue, *handlers, respect_handler_level=True)
+        logger.handlers = [handler]
+        listener.start()
+        self._queues[logger.name] = (handler, listener)
+        return handler
+
+    def detach(self, logger: logging.Logger) -> None:
+        """Flush ``logger``'s queue and give it back its original handlers."""
+        entry = self._queues.pop(logger.name, None)
+        if entry is None:
+            return
+        handler, listener = entry
+        listener.stop()
+        if handler in logger.handlers:
+            logger.handlers = list(listener.handlers)
+
+    def stop(self) -> None:
+        for _, listener in self._queues.values():
+            listener.stop()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queue_size": self.maxsize,
+            "loggers": {
+                name: {"queued": handler.queue.qsize(), "dropped": handler.dropped}
+                for name, (handler, _) in self._queues.items()
+            },
+        }
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; ``extra={"fields": {...}}`` is merged in."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+LOG_QUEUE = LogQueue()
+
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    *,
+    access_log: str = ACCESS_LOG,
+    log_queue: LogQueue = LOG_QUEUE,
+) -> None:
+    """
+    Configure the root, uvicorn and access loggers to log through ``log_queue``.
+
+    Like ``logging.basicConfig``, the root logger is left alone when the
+    embedding process already gave it handlers.
+    """
+    root = logging.getLogger()
+    if not root.handlers:
+        root.setLevel(getattr(logging, level.upper(), logging.INFO))
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        _install(log_queue, root, [stream])
+    for name in UVICORN_LOGGERS:
+        logger = logging.getLogger(name)
+        if logger.handlers and not isinstance(logger.handlers[0], QueueHandler):
+            _install(log_queue, logger, list(logger.handlers))
+    if access_log.lower() == "json":
+        access = logging.getLogger(ACCESS_LOGGER)
+        access.setLevel(logging.INFO)
+        access.propagate = False
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JSONFormatter())
+        _install(log_queue, access, [stream])
+
+
+def _install(
+    log_queue: LogQueue, logger: logging.Logger, handlers: list[logging.Handler]
+) -> None:
+    if log_queue.maxsize <= 0:
+        logger.handlers = handlers
+    else:
+        log_queue.attach(logger, handlers)
+
+
+class AccessLogMiddleware:
+    """Log method, path, status, size, duration and API key of each request."""
+
+    def __init__(self, app: ASGIApp, *, logger_name: str = ACCESS_LOGGER) -> None:
+        self.app = app
+        self.logger = logging.getLogger(logger_name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_logged(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_logged)
+        finally:
+            client = scope.get("client")
+            self.logger.info(
+                "%s %s %d",
+                scope["method"],
+                scope["path"],
+                status,
+                extra={
+                    "fields": {
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status,
+                        "bytes": size,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                        "client": client[0] if client else None,
+                        "key": scope.get("state", {}).get("api_key"),
+                    }
+                },
+            )
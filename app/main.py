@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-import logging
+import asyncio
+import atexit
+import contextlib
+import importlib
 import os
+from contextlib import asynccontextmanager
 from importlib.metadata import PackageNotFoundError
 from importlib.metadata import version
 
@@ -10,25 +14,48 @@ from fastapi import FastAPI
 from fastapi import Request
 from fastapi.responses import JSONResponse
 
-from app.api.endpoints import dns
-from app.api.endpoints import ftp
-from app.api.endpoints import info
-from app.api.endpoints import mail
-from app.api.endpoints import mongo
-from app.api.endpoints import mysql
-from app.api.endpoints import pgsql
-from app.api.endpoints import port
-from app.api.endpoints import repo
-from app.api.endpoints import ssl
-from app.api.endpoints import vhost
-from app.api.endpoints import www
+from app.api.endpoints import FEATURES
+from app.auth import API_KEYS
 from app.auth import verify_api_key
+from app.compression import COMPRESSION
+from app.compression import CompressionMiddleware
+from app.compression import enabled_encoders
+from app.logging_config import ACCESS_LOG
+from app.logging_config import LOG_QUEUE
+from app.logging_config import AccessLogMiddleware
+from app.logging_config import setup_logging
+from app.openapi import OPENAPI_PRECOMPUTE
+from app.openapi import install_docs
+from app.profiling import REQUEST_PROFILING
+from app.profiling import ProfilingMiddleware
+from app.services.sampler import SAMPLER
 from app.services.socket_client import DevilSocketConnectionError
 from app.services.socket_client import DevilSocketError
 from app.services.socket_client import DevilSocketProtocolError
 
-log_level = os.getenv("LOG_LEVEL", "INFO").upper()
-logging.basicConfig(level=getattr(logging, log_level, logging.INFO))
+# Log through bounded queues drained by background threads, see app.logging_config
+setup_logging()
+atexit.register(LOG_QUEUE.stop)
+
+
+def enabled_features(value: str | None) -> list[str]:
+    """
+    Parse a comma-separated DEVIL_API_FEATURES value, keeping mounting order.
+
+    An empty or missing value enables every feature.
+    """
+    if not value or not value.strip():
+        return list(FEATURES)
+    requested = {name.strip().lower() for name in value.split(",") if name.strip()}
+    unknown = requested.difference(FEATURES)
+    if unknown:
+        raise RuntimeError(
+            f"Unknown DEVIL_API_FEATURES entries: {', '.join(sorted(unknown))}"
+        )
+    return [name for name in FEATURES if name in requested]
+
+
+ENABLED_FEATURES = enabled_features(os.getenv("DEVIL_API_FEATURES"))
 
 # Get package version
 try:
@@ -36,24 +63,60 @@ try:
 except PackageNotFoundError:
     __version__ = "0.0.1"
 
-app = FastAPI(title="devil API", version=__version__)
-
 
-# Include routers
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    refresher = reloader = None
+    if API_KEYS.path and API_KEYS.reload_seconds > 0:
+        reloader = asyncio.create_task(API_KEYS.run_reloader())
+    if "lookup" in ENABLED_FEATURES:
+        from app.services.reverse_index import INDEX_REFRESH_SECONDS
+        from app.services.reverse_index import REVERSE_INDEX
+
+        if INDEX_REFRESH_SECONDS > 0:
+            refresher = asyncio.create_task(
+                REVERSE_INDEX.run_refresher(INDEX_REFRESH_SECONDS)
+            )
+    if OPENAPI_PRECOMPUTE and openapi_cache is not None:
+        openapi_cache.get()
+    # samples this (the event loop) thread when DEVIL_PROFILER_HZ is set
+    SAMPLER.start()
+    yield
+    SAMPLER.stop()
+    for task in (refresher, reloader):
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+
+# openapi_url=None: docs and schema routes are mounted by install_docs below
+app = FastAPI(
+    title="devil API", version=__version__, lifespan=lifespan, openapi_url=None
+)
+
+# Response compression, configured by DEVIL_COMPRESSION*
+compression_encoders = enabled_encoders(COMPRESSION)
+if compression_encoders:
+    app.add_middleware(CompressionMiddleware, encoders=compression_encoders)
+
+# Per-request profiling on demand, see app.profiling; not installed unless enabled
+if REQUEST_PROFILING:
+    app.add_middleware(ProfilingMiddleware)
+
+# Added last so it is outermost and times the whole request
+if ACCESS_LOG == "json":
+    app.add_middleware(AccessLogMiddleware)
+
+
+# Include routers; router modules (and their schemas) are imported only when enabled
 protected_dependency = [Depends(verify_api_key)]
 
-app.include_router(info.router, dependencies=protected_dependency)
-app.include_router(ftp.router, dependencies=protected_dependency)
-app.include_router(dns.router, dependencies=protected_dependency)
-app.include_router(mail.router, dependencies=protected_dependency)
-app.include_router(mysql.router, dependencies=protected_dependency)
-app.include_router(pgsql.router, dependencies=protected_dependency)
-app.include_router(mongo.router, dependencies=protected_dependency)
-app.include_router(port.router, dependencies=protected_dependency)
-app.include_router(repo.router, dependencies=protected_dependency)
-app.include_router(ssl.router, dependencies=protected_dependency)
-app.include_router(vhost.router, dependencies=protected_dependency)
-app.include_router(www.router, dependencies=protected_dependency)
+for feature in ENABLED_FEATURES:
+    module = importlib.import_module(f"app.api.endpoints.{feature}")
+    app.include_router(module.router, dependencies=protected_dependency)
+
+openapi_cache = install_docs(app)
 
 
 # Health check endpoint
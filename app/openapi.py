@@ -0,0 +1,114 @@
+"""
+OpenAPI document and interactive docs serving.
+
+The schema is serialized once per process (or read from a file produced by
+``python -m app.openapi``) and served as raw bytes. With DEVIL_API_PRODUCTION
+set, no docs or schema routes are mounted and the schema is never generated.
+
+Usage:
+    python -m app.openapi [output.json]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.openapi.docs import get_redoc_html
+from fastapi.openapi.docs import get_swagger_ui_html
+from fastapi.openapi.docs import get_swagger_ui_oauth2_redirect_html
+from fastapi.responses import Response
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+PRODUCTION = os.getenv("DEVIL_API_PRODUCTION", "").lower() in TRUE_VALUES
+OPENAPI_FILE = os.getenv("DEVIL_OPENAPI_FILE") or None
+OPENAPI_PRECOMPUTE = os.getenv("DEVIL_OPENAPI_PRECOMPUTE", "").lower() in TRUE_VALUES
+
+OPENAPI_URL = "/openapi.json"
+
+
+def render_openapi(app: FastAPI) -> bytes:
+    """Serialize the app schema compactly, dropping FastAPI's cached dict."""
+    body = json.dumps(app.openapi(), separators=(",", ":")).encode()
+    app.openapi_schema = None
+    return body
+
+
+class OpenAPICache:
+    """Holds the serialized schema, filled from file or generated on first use."""
+
+    def __init__(self, app: FastAPI, schema_file: str | None = None) -> None:
+        self.app = app
+        self.schema_file = schema_file
+        self.body: bytes | None = None
+
+    def get(self) -> bytes:
+        if self.body is None:
+            if self.schema_file and Path(self.schema_file).is_file():
+                self.body = Path(self.schema_file).read_bytes()
+            else:
+                self.body = render_openapi(self.app)
+        return self.body
+
+
+def install_docs(
+    app: FastAPI,
+    *,
+    production: bool = PRODUCTION,
+    schema_file: str | None = OPENAPI_FILE,
+) -> OpenAPICache | None:
+    """
+    Mount /openapi.json, /docs and /redoc unless running in production mode.
+
+    The app must be created with ``openapi_url=None`` so FastAPI does not
+    mount its own per-request serializing routes.
+    """
+    if production:
+        return None
+    cache = OpenAPICache(app, schema_file)
+    title = f"{app.title} - Swagger UI"
+    oauth2_redirect_url = "/docs/oauth2-redirect"
+
+    @app.get(OPENAPI_URL, include_in_schema=False)
+    async def openapi_json():
+        return Response(cache.get(), media_type="application/json")
+
+    @app.get("/docs", include_in_schema=False)
+    async def swagger_ui():
+        return get_swagger_ui_html(
+            openapi_url=OPENAPI_URL,
+            title=title,
+            oauth2_redirect_url=oauth2_redirect_url,
+        )
+
+    @app.get(oauth2_redirect_url, include_in_schema=False)
+    async def swagger_ui_redirect():
+        return get_swagger_ui_oauth2_redirect_html()
+
+    @app.get("/redoc", include_in_schema=False)
+    async def redoc():
+        return get_redoc_html(openapi_url=OPENAPI_URL, title=f"{app.title} - ReDoc")
+
+    return cache
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Write the OpenAPI document to the given path (stdout when omitted)."""
+    argv = sys.argv[1:] if argv is None else argv
+    os.environ.setdefault("DEVIL_API_KEY", "openapi-build")
+    from app.main import app
+
+    body = render_openapi(app)
+    if argv:
+        Path(argv[0]).write_bytes(body)
+    else:
+        sys.stdout.write(body.decode())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+"""
+Opt-in profiling of single requests.
+
+With DEVIL_REQUEST_PROFILING enabled, a request carrying ``X-Devil-Profile: 1``
+and an API key with the ``admin`` scope runs under cProfile. The profile
+covers middleware, authentication, validation, the handler and the wait for
+the devil socket (visible as time in the event loop's selector). It is kept
+in a small in-memory store and its id is returned in the
+``X-Devil-Profile-Id`` response header; fetch it from
+``GET /admin/profiles/{id}`` as text or as a ``.prof`` file for pstats or
+snakeviz.
+
+cProfile is per thread, so only one request is profiled at a time; others
+asking for a profile meanwhile get ``X-Devil-Profile-Id: busy``. Work done
+for concurrent requests while the profiled one awaits is recorded too, so
+profile on a quiet worker for clean numbers. When the setting is off the
+middleware is not installed at all.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from app.auth import API_KEYS
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+REQUEST_PROFILING = os.getenv("DEVIL_REQUEST_PROFILING", "").lower() in TRUE_VALUES
+# Profiles kept in memory; the oldest is dropped first
+REQUEST_PROFILE_KEEP = int(os.getenv("DEVIL_REQUEST_PROFILE_KEEP", "20"))
+
+PROFILE_HEADER = "x-devil-profile"
+PROFILE_ID_HEADER = "X-Devil-Profile-Id"
+PROFILE_SCOPE = "admin"
+SORT_KEYS = ("cumulative", "tottime", "calls")
+
+
+@dataclass(slots=True)
+class RequestProfile:
+    id: str
+    created: float
+    method: str
+    path: str
+    status: int
+    duration_ms: float
+    profile: cProfile.Profile
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "created": self.created,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+        }
+
+    def text(self, sort: str = "cumulative", limit: int = 40) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self) -> bytes:
+        """The profile in the format of ``pstats.Stats.dump_stats``."""
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)  # type: ignore[attr-defined]
+
+
+class ProfileStore:
+    def __init__(self, keep: int = REQUEST_PROFILE_KEEP) -> None:
+        self.keep = keep
+        self._profiles: OrderedDict[str, RequestProfile] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def add(self, entry: RequestProfile) -> None:
+        self._profiles[entry.id] = entry
+        while len(self._profiles) > self.keep:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> RequestProfile | None:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> list[dict[str, Any]]:
+        return [entry.summary() for entry in reversed(self._profiles.values())]
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+
+REQUEST_PROFILES = ProfileStore()
+
+
+def _authorized(headers: Headers) -> bool:
+    supplied = headers.get("x-api-key")
+    if not supplied:
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        supplied = token.strip() if scheme.lower() == "bearer" else None
+    key = API_KEYS.lookup(supplied) if supplied else None
+    return key is not None and key.allows(PROFILE_SCOPE, False)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, *, store: ProfileStore = REQUEST_PROFILES) -> None:
+        self.app = app
+        self.store = store
+        self._active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER, "").lower() not in TRUE_VALUES or not (
+            _authorized(headers)
+        ):
+            await self.app(scope, receive, send)
+            return
+        profile_id = "busy" if self._active else secrets.token_hex(8)
+        status = 500
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(raw=message["headers"])[PROFILE_ID_HEADER] = profile_id
+            await send(message)
+
+        if self._active:
+            await self.app(scope, receive, send_with_id)
+            return
+
+        self._active = True
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.disable()
+            self._active = False
+            self.store.add(
+                RequestProfile(
+                    id=profile_id,
+                    created=time.time(),
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status,
+                    duration_ms=round((time.perf_counter() - started) * 1000, 3),
+                    profile=profile,
+                )
+            )
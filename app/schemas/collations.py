@@ -0,0 +1,46 @@
+"""
+Collation names accepted by devil for MySQL and PostgreSQL databases.
+
+The lists hold hundreds of entries, so they are kept in data files and read on
+first validation or OpenAPI generation instead of being built at import time.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+from pathlib import Path
+from typing import Annotated
+from typing import Any
+
+from pydantic import AfterValidator
+from pydantic import Field
+
+__all__ = ["collation_names", "collation_set", "collation_type"]
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+@cache
+def collation_names(engine: str) -> tuple[str, ...]:
+    """Return the collation names for ``engine`` (mysql, pgsql) in file order."""
+    text = (DATA_DIR / f"{engine}_collations.txt").read_text(encoding="utf-8")
+    return tuple(line.strip() for line in text.splitlines() if line.strip())
+
+
+@cache
+def collation_set(engine: str) -> frozenset[str]:
+    return frozenset(collation_names(engine))
+
+
+def collation_type(engine: str) -> Any:
+    """Build a ``str`` type validated against, and documented with, the collations."""
+
+    def check(value: str) -> str:
+        if value not in collation_set(engine):
+            raise ValueError(f"Unknown collation '{value}'")
+        return value
+
+    def add_enum(schema: dict[str, Any]) -> None:
+        schema["enum"] = list(collation_names(engine))
+
+    return Annotated[str, AfterValidator(check), Field(json_schema_extra=add_enum)]
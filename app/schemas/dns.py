@@ -5,7 +5,14 @@ from enum import Enum
 from pydantic import BaseModel
 from pydantic import Field
 
-__all__ = ["DNSAddRecord", "DNSAddZone", "DNSDel"]
+__all__ = [
+    "DNSAddRecord",
+    "DNSAddZone",
+    "DNSDel",
+    "DNSZoneImport",
+    "DNSZoneReconcile",
+    "DNSZoneRecord",
+]
 
 
 class DNSTypes(str, Enum):
@@ -27,8 +34,7 @@ class DNSAddZone(BaseModel):
     )
 
 
-class DNSAddRecord(BaseModel):
-    dns_domain: str = Field(..., description="Existing domain/zone name")
+class DNSZoneRecord(BaseModel):
     dns_record: str = Field(..., description="Record name (relative or FQDN)")
     dns_record_type: DNSTypes = Field(
         ..., description="Record type: A, AAAA, CNAME, MX, NS, SRV, TXT, CAA"
@@ -45,6 +51,10 @@ class DNSAddRecord(BaseModel):
     dns_weight: int | None = Field(None, description="Weight for SRV when applicable")
 
 
+class DNSAddRecord(DNSZoneRecord):
+    dns_domain: str = Field(..., description="Existing domain/zone name")
+
+
 class DNSDel(BaseModel):
     dns_domain: str = Field(
         ..., description="Domain whose zone or record should be deleted"
@@ -55,3 +65,22 @@ class DNSDel(BaseModel):
             "Optional record identifier. When omitted the whole zone is removed; when set only that record is deleted."
         ),
     )
+
+
+class DNSZoneImport(BaseModel):
+    dns_domain: str = Field(..., description="Existing domain/zone to import into")
+    zone_file: str = Field(..., description="Zone file contents in BIND format")
+    prune: bool = Field(
+        False,
+        description="Also delete records served by devil that are missing from the zone file",
+    )
+
+
+class DNSZoneReconcile(BaseModel):
+    records: list[DNSZoneRecord] = Field(
+        ...,
+        description=(
+            "Complete desired record set of the zone. Records devil serves that are not listed are "
+            "deleted, except apex NS records unless the set contains apex NS records itself."
+        ),
+    )
@@ -8,6 +8,7 @@ from pydantic import Field
 __all__ = [
     "MailAccountAdd",
     "MailAliasAdd",
+    "MailBulkFormat",
     "MailDKIM",
     "MailOptions",
     "MailPasswd",
@@ -26,6 +27,11 @@ class MailOptionsEnum(str, Enum):
     HIDE_SENDER_IP = "hidesenderip"
 
 
+class MailBulkFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class MailAccountAdd(BaseModel):
     email_mailbox: str = Field(..., description="E-mail address for the mailbox")
     password: str | None = Field(
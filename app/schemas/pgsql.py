@@ -5,6 +5,8 @@ from enum import Enum
 from pydantic import BaseModel
 from pydantic import Field
 
+from app.schemas.collations import collation_type
+
 __all__ = ["PgSQLDbAdd", "PgSQLExtension", "PgSQLExtensions", "PgSQLPasswd"]
 
 
@@ -26,189 +28,7 @@ class PgSQLExtensions(str, Enum):
     vector = "vector"
 
 
-class PgSQLCollates(str, Enum):
-    c = "C"
-    c_utf8 = "C.UTF-8"
-    posix = "POSIX"
-    af_za_iso8859_1 = "af_ZA.ISO8859-1"
-    af_za_iso8859_15 = "af_ZA.ISO8859-15"
-    af_za_utf8 = "af_ZA.UTF-8"
-    am_et_utf8 = "am_ET.UTF-8"
-    ar_ae_utf8 = "ar_AE.UTF-8"
-    ar_eg_utf8 = "ar_EG.UTF-8"
-    ar_jo_utf8 = "ar_JO.UTF-8"
-    ar_ma_utf8 = "ar_MA.UTF-8"
-    ar_qa_utf8 = "ar_QA.UTF-8"
-    ar_sa_utf8 = "ar_SA.UTF-8"
-    be_by_cp1251 = "be_BY.CP1251"
-    be_by_iso8859_5 = "be_BY.ISO8859-5"
-    be_by_utf8 = "be_BY.UTF-8"
-    bg_bg_cp1251 = "bg_BG.CP1251"
-    bg_bg_utf8 = "bg_BG.UTF-8"
-    ca_ad_iso8859_1 = "ca_AD.ISO8859-1"
-    ca_ad_iso8859_15 = "ca_AD.ISO8859-15"
-    ca_ad_utf8 = "ca_AD.UTF-8"
-    ca_es_iso8859_1 = "ca_ES.ISO8859-1"
-    ca_es_iso8859_15 = "ca_ES.ISO8859-15"
-    ca_es_utf8 = "ca_ES.UTF-8"
-    ca_fr_iso8859_1 = "ca_FR.ISO8859-1"
-    ca_fr_iso8859_15 = "ca_FR.ISO8859-15"
-    ca_fr_utf8 = "ca_FR.UTF-8"
-    ca_it_iso8859_1 = "ca_IT.ISO8859-1"
-    ca_it_iso8859_15 = "ca_IT.ISO8859-15"
-    ca_it_utf8 = "ca_IT.UTF-8"
-    cs_cz_iso8859_2 = "cs_CZ.ISO8859-2"
-    cs_cz_utf8 = "cs_CZ.UTF-8"
-    da_dk_iso8859_1 = "da_DK.ISO8859-1"
-    da_dk_iso8859_15 = "da_DK.ISO8859-15"
-    da_dk_utf8 = "da_DK.UTF-8"
-    de_at_iso8859_1 = "de_AT.ISO8859-1"
-    de_at_iso8859_15 = "de_AT.ISO8859-15"
-    de_at_utf8 = "de_AT.UTF-8"
-    de_ch_iso8859_1 = "de_CH.ISO8859-1"
-    de_ch_iso8859_15 = "de_CH.ISO8859-15"
-    de_ch_utf8 = "de_CH.UTF-8"
-    de_de_iso8859_1 = "de_DE.ISO8859-1"
-    de_de_iso8859_15 = "de_DE.ISO8859-15"
-    de_de_utf8 = "de_DE.UTF-8"
-    el_gr_iso8859_7 = "el_GR.ISO8859-7"
-    el_gr_utf8 = "el_GR.UTF-8"
-    en_au_iso8859_1 = "en_AU.ISO8859-1"
-    en_au_iso8859_15 = "en_AU.ISO8859-15"
-    en_au_utf8 = "en_AU.UTF-8"
-    en_ca_iso8859_1 = "en_CA.ISO8859-1"
-    en_ca_iso8859_15 = "en_CA.ISO8859-15"
-    en_ca_utf8 = "en_CA.UTF-8"
-    en_gb_iso8859_1 = "en_GB.ISO8859-1"
-    en_gb_iso8859_15 = "en_GB.ISO8859-15"
-    en_gb_utf8 = "en_GB.UTF-8"
-    en_hk_iso8859_1 = "en_HK.ISO8859-1"
-    en_hk_utf8 = "en_HK.UTF-8"
-    en_ie_iso8859_1 = "en_IE.ISO8859-1"
-    en_ie_iso8859_15 = "en_IE.ISO8859-15"
-    en_ie_utf8 = "en_IE.UTF-8"
-    en_nz_iso8859_1 = "en_NZ.ISO8859-1"
-    en_nz_iso8859_15 = "en_NZ.ISO8859-15"
-    en_nz_utf8 = "en_NZ.UTF-8"
-    en_ph_utf8 = "en_PH.UTF-8"
-    en_sg_iso8859_1 = "en_SG.ISO8859-1"
-    en_sg_utf8 = "en_SG.UTF-8"
-    en_us_iso8859_1 = "en_US.ISO8859-1"
-    en_us_iso8859_15 = "en_US.ISO8859-15"
-    en_us_utf8 = "en_US.UTF-8"
-    en_za_iso8859_1 = "en_ZA.ISO8859-1"
-    en_za_iso8859_15 = "en_ZA.ISO8859-15"
-    en_za_utf8 = "en_ZA.UTF-8"
-    es_ar_iso8859_1 = "es_AR.ISO8859-1"
-    es_ar_utf8 = "es_AR.UTF-8"
-    es_cr_utf8 = "es_CR.UTF-8"
-    es_es_iso8859_1 = "es_ES.ISO8859-1"
-    es_es_iso8859_15 = "es_ES.ISO8859-15"
-    es_es_utf8 = "es_ES.UTF-8"
-    es_mx_iso8859_1 = "es_MX.ISO8859-1"
-    es_mx_utf8 = "es_MX.UTF-8"
-    et_ee_iso8859_1 = "et_EE.ISO8859-1"
-    et_ee_iso8859_15 = "et_EE.ISO8859-15"
-    et_ee_utf8 = "et_EE.UTF-8"
-    eu_es_iso8859_1 = "eu_ES.ISO8859-1"
-    eu_es_iso8859_15 = "eu_ES.ISO8859-15"
-    eu_es_utf8 = "eu_ES.UTF-8"
-    fi_fi_iso8859_1 = "fi_FI.ISO8859-1"
-    fi_fi_iso8859_15 = "fi_FI.ISO8859-15"
-    fi_fi_utf8 = "fi_FI.UTF-8"
-    fr_be_iso8859_1 = "fr_BE.ISO8859-1"
-    fr_be_iso8859_15 = "fr_BE.ISO8859-15"
-    fr_be_utf8 = "fr_BE.UTF-8"
-    fr_ca_iso8859_1 = "fr_CA.ISO8859-1"
-    fr_ca_iso8859_15 = "fr_CA.ISO8859-15"
-    fr_ca_utf8 = "fr_CA.UTF-8"
-    fr_ch_iso8859_1 = "fr_CH.ISO8859-1"
-    fr_ch_iso8859_15 = "fr_CH.ISO8859-15"
-    fr_ch_utf8 = "fr_CH.UTF-8"
-    fr_fr_iso8859_1 = "fr_FR.ISO8859-1"
-    fr_fr_iso8859_15 = "fr_FR.ISO8859-15"
-    fr_fr_utf8 = "fr_FR.UTF-8"
-    ga_ie_utf8 = "ga_IE.UTF-8"
-    he_il_utf8 = "he_IL.UTF-8"
-    hi_in_utf8 = "hi_IN.UTF-8"
-    hr_hr_iso8859_2 = "hr_HR.ISO8859-2"
-    hr_hr_utf8 = "hr_HR.UTF-8"
-    hu_hu_iso8859_2 = "hu_HU.ISO8859-2"
-    hu_hu_utf8 = "hu_HU.UTF-8"
-    hy_am_utf8 = "hy_AM.UTF-8"
-    is_is_iso8859_1 = "is_IS.ISO8859-1"
-    is_is_iso8859_15 = "is_IS.ISO8859-15"
-    is_is_utf8 = "is_IS.UTF-8"
-    it_ch_iso8859_1 = "it_CH.ISO8859-1"
-    it_ch_iso8859_15 = "it_CH.ISO8859-15"
-    it_ch_utf8 = "it_CH.UTF-8"
-    it_it_iso8859_1 = "it_IT.ISO8859-1"
-    it_it_iso8859_15 = "it_IT.ISO8859-15"
-    it_it_utf8 = "it_IT.UTF-8"
-    ja_jp_utf8 = "ja_JP.UTF-8"
-    ja_jp_eucjp = "ja_JP.eucJP"
-    kk_kz_utf8 = "kk_KZ.UTF-8"
-    ko_kr_cp949 = "ko_KR.CP949"
-    ko_kr_utf8 = "ko_KR.UTF-8"
-    ko_kr_euckr = "ko_KR.eucKR"
-    lt_lt_iso8859_13 = "lt_LT.ISO8859-13"
-    lt_lt_utf8 = "lt_LT.UTF-8"
-    lv_lv_iso8859_13 = "lv_LV.ISO8859-13"
-    lv_lv_utf8 = "lv_LV.UTF-8"
-    mn_mn_utf8 = "mn_MN.UTF-8"
-    nb_no_iso8859_1 = "nb_NO.ISO8859-1"
-    nb_no_iso8859_15 = "nb_NO.ISO8859-15"
-    nb_no_utf8 = "nb_NO.UTF-8"
-    nl_be_iso8859_1 = "nl_BE.ISO8859-1"
-    nl_be_iso8859_15 = "nl_BE.ISO8859-15"
-    nl_be_utf8 = "nl_BE.UTF-8"
-    nl_nl_iso8859_1 = "nl_NL.ISO8859-1"
-    nl_nl_iso8859_15 = "nl_NL.ISO8859-15"
-    nl_nl_utf8 = "nl_NL.UTF-8"
-    nn_no_iso8859_1 = "nn_NO.ISO8859-1"
-    nn_no_iso8859_15 = "nn_NO.ISO8859-15"
-    nn_no_utf8 = "nn_NO.UTF-8"
-    pl_pl_iso8859_2 = "pl_PL.ISO8859-2"
-    pl_pl_utf8 = "pl_PL.UTF-8"
-    pt_br_iso8859_1 = "pt_BR.ISO8859-1"
-    pt_br_utf8 = "pt_BR.UTF-8"
-    pt_pt_iso8859_1 = "pt_PT.ISO8859-1"
-    pt_pt_iso8859_15 = "pt_PT.ISO8859-15"
-    pt_pt_utf8 = "pt_PT.UTF-8"
-    ro_ro_iso8859_2 = "ro_RO.ISO8859-2"
-    ro_ro_utf8 = "ro_RO.UTF-8"
-    ru_ru_cp1251 = "ru_RU.CP1251"
-    ru_ru_cp866 = "ru_RU.CP866"
-    ru_ru_iso8859_5 = "ru_RU.ISO8859-5"
-    ru_ru_koi8_r = "ru_RU.KOI8-R"
-    ru_ru_utf8 = "ru_RU.UTF-8"
-    se_fi_utf8 = "se_FI.UTF-8"
-    se_no_utf8 = "se_NO.UTF-8"
-    sk_sk_iso8859_2 = "sk_SK.ISO8859-2"
-    sk_sk_utf8 = "sk_SK.UTF-8"
-    sl_si_iso8859_2 = "sl_SI.ISO8859-2"
-    sl_si_utf8 = "sl_SI.UTF-8"
-    sr_rs_iso8859_2 = "sr_RS.ISO8859-2"
-    sr_rs_iso8859_5 = "sr_RS.ISO8859-5"
-    sr_rs_utf8 = "sr_RS.UTF-8"
-    sr_rs_utf8_latin = "sr_RS.UTF-8@latin"
-    sv_fi_iso8859_1 = "sv_FI.ISO8859-1"
-    sv_fi_iso8859_15 = "sv_FI.ISO8859-15"
-    sv_fi_utf8 = "sv_FI.UTF-8"
-    sv_se_iso8859_1 = "sv_SE.ISO8859-1"
-    sv_se_iso8859_15 = "sv_SE.ISO8859-15"
-    sv_se_utf8 = "sv_SE.UTF-8"
-    tr_tr_iso8859_9 = "tr_TR.ISO8859-9"
-    tr_tr_utf8 = "tr_TR.UTF-8"
-    uk_ua_cp1251 = "uk_UA.CP1251"
-    uk_ua_iso8859_5 = "uk_UA.ISO8859-5"
-    uk_ua_koi8_u = "uk_UA.KOI8-U"
-    uk_ua_utf8 = "uk_UA.UTF-8"
-    zh_cn_gb2312 = "zh_CN.GB2312"
-    zh_cn_utf8 = "zh_CN.UTF-8"
-    zh_cn_euccn = "zh_CN.eucCN"
-    zh_hk_utf8 = "zh_HK.UTF-8"
-    zh_tw_utf8 = "zh_TW.UTF-8"
+PgSQLCollates = collation_type("pgsql")
 
 
 class PgSQLDbAdd(BaseModel):
@@ -0,0 +1,160 @@
+"""
+Production launcher for the devil API.
+
+Runs ``app.main:app`` under uvicorn's process supervisor, so workers are
+restarted if they die and ``kill -HUP`` replaces them one at a time without
+dropping the listening socket. uvloop and httptools are used when installed.
+
+Settings come from command line options, falling back to DEVIL_API_*
+environment variables.
+
+uvicorn takes the client address from X-Forwarded-For only for connections
+from ``--forwarded-allow-ips``. With ``*`` it trusts the leftmost value, which
+the client controls unless the proxy overwrites the header, and per-IP auth
+lockout and rate limits would then be keyed on a spoofable address. ``*`` is
+therefore refused for TCP, where the proxy's address can be listed; UNIX
+socket peers have no address, so there it is the only choice and nginx must
+send ``X-Forwarded-For $remote_addr``.
+
+Usage:
+    devil-api [--workers N] [--uds /run/devil-api.sock | --host H --port P]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import inspect
+import os
+from typing import Any
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+APP = "app.main:app"
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def default_loop() -> str:
+    return "uvloop" if _available("uvloop") else "asyncio"
+
+
+def default_http() -> str:
+    return "httptools" if _available("httptools") else "h11"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="devil-api", description="Run the devil API server."
+    )
+    parser.add_argument("--host", default=os.getenv("DEVIL_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=_env_int("DEVIL_API_PORT", 8000))
+    parser.add_argument(
+        "--uds",
+        default=os.getenv("DEVIL_API_UDS") or None,
+        help="bind a UNIX domain socket instead of host/port",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=_env_int("DEVIL_API_WORKERS", os.cpu_count() or 1),
+    )
+    parser.add_argument(
+        "--keep-alive",
+        type=int,
+        default=_env_int("DEVIL_API_KEEP_ALIVE", 5),
+        help="seconds to keep idle connections open",
+    )
+    parser.add_argument(
+        "--backlog",
+        type=int,
+        default=_env_int("DEVIL_API_BACKLOG", 2048),
+        help="maximum number of pending connections",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=_env_int("DEVIL_API_GRACEFUL_TIMEOUT", 30),
+        help="seconds to let in-flight requests finish on shutdown or restart",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=_env_int("DEVIL_API_MAX_REQUESTS", 0),
+        help="restart a worker after this many requests (0 = never)",
+    )
+    parser.add_argument(
+        "--forwarded-allow-ips",
+        default=os.getenv("DEVIL_API_FORWARDED_ALLOW_IPS") or None,
+        help="proxy addresses trusted for X-Forwarded-For/Proto; '*' only with --uds",
+    )
+    parser.add_argument("--loop", default=os.getenv("DEVIL_API_LOOP", default_loop()))
+    parser.add_argument("--http", default=os.getenv("DEVIL_API_HTTP", default_http()))
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info").lower())
+    parser.add_argument(
+        "--no-access-log",
+        dest="access_log",
+        action="store_false",
+        # the app writes its own access log when DEVIL_ACCESS_LOG=json
+        default=os.getenv("DEVIL_ACCESS_LOG", "").strip().lower() != "json",
+    )
+    return parser
+
+
+def build_config(options: argparse.Namespace) -> uvicorn.Config:
+    trusted = [ip.strip() for ip in (options.forwarded_allow_ips or "").split(",")]
+    if "*" in trusted and not options.uds:
+        raise RuntimeError(
+            "--forwarded-allow-ips '*' lets any client set its address through "
+            "X-Forwarded-For; list the proxy's addresses instead"
+        )
+    kwargs: dict[str, Any] = {
+        "workers": max(1, options.workers),
+        "loop": options.loop,
+        "http": options.http,
+        "timeout_keep_alive": options.keep_alive,
+        "backlog": options.backlog,
+        "timeout_graceful_shutdown": options.graceful_timeout,
+        "log_level": options.log_level,
+        "access_log": options.access_log,
+        "forwarded_allow_ips": options.forwarded_allow_ips,
+        "limit_max_requests": options.max_requests or None,
+    }
+    if options.uds:
+        kwargs["uds"] = options.uds
+    else:
+        kwargs["host"], kwargs["port"] = options.host, options.port
+    return uvicorn.Config(APP, **kwargs)
+
+
+def _supervisor(config: uvicorn.Config) -> Multiprocess:
+    sockets = [config.bind_socket()]
+    # older uvicorn releases take the worker entry point explicitly
+    if "target" in inspect.signature(Multiprocess).parameters:
+        server = uvicorn.Server(config)
+        return Multiprocess(config, target=server.run, sockets=sockets)
+    return Multiprocess(config, sockets=sockets)
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    config = build_config(options)
+    try:
+        _supervisor(config).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if config.uds and os.path.exists(config.uds):
+            os.remove(config.uds)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
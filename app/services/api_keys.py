@@ -0,0 +1,212 @@
+"""
+Scoped API keys loaded from a key file.
+
+The file is a JSON list of entries; secrets are stored only as SHA-256 hex
+digests::
+
+    [
+      {"name": "ci", "sha256": "<hex digest>", "scopes": ["dns", "mail:read"]},
+      {"name": "monitoring", "sha256": "<hex digest>", "scopes": ["read"]}
+    ]
+
+Scopes:
+    *               every route
+    read            every read route (registered as one in app.api.registry)
+    <feature>       every route of a router family, e.g. ``dns`` or ``admin``
+    <feature>:read  read routes of a router family
+
+The ``admin`` family has no read routes: it needs ``admin`` or ``*``. Any
+other scope, e.g. a misspelled family or ``admin:read``, makes the file
+invalid rather than silently granting nothing.
+
+A supplied key is hashed and looked up in a dict keyed by digest, so the cost
+does not depend on the number of keys, and comparing digests leaks nothing
+useful about the secret. ``run_reloader`` checks the file for changes every
+``reload_seconds`` in a thread, off the event loop, and swaps new keys in
+atomically; a broken file keeps the previous keys in place.
+
+Usage:
+    python -m app.services.api_keys NAME [SCOPE ...]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import secrets
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from pydantic import BaseModel
+from pydantic import Field
+from pydantic import TypeAdapter
+from pydantic import ValidationError
+
+from app.api.endpoints import FEATURES
+
+logger = logging.getLogger(__name__)
+
+# Name of the API key authenticating the current request
+current_key_name: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_key_name", default=None
+)
+
+
+SCOPES = frozenset(
+    {
+        "*",
+        "read",
+        *FEATURES,
+        *(f"{feature}:read" for feature in FEATURES if feature != "admin"),
+    }
+)
+
+
+class APIKeyEntry(BaseModel):
+    name: str = Field(min_length=1)
+    sha256: str = Field(pattern=r"^[0-9a-fA-F]{64}$")
+    scopes: list[str] = Field(min_length=1)
+
+
+@dataclass(frozen=True, slots=True)
+class APIKey:
+    name: str
+    scopes: frozenset[str]
+
+    def allows(self, feature: str, read_only: bool) -> bool:
+        scopes = self.scopes
+        if "*" in scopes or feature in scopes:
+            return True
+        return read_only and ("read" in scopes or f"{feature}:read" in scopes)
+
+
+def hash_key(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def load_key_file(path: str) -> dict[str, APIKey]:
+    """
+    Read a key file into a digest -> APIKey dict.
+
+    Raises ValueError when the file is not valid JSON, does not match the
+    entry schema, names an unknown scope or repeats a name or digest.
+    """
+    try:
+        entries = TypeAdapter(list[APIKeyEntry]).validate_json(Path(path).read_bytes())
+    except ValidationError as exc:
+        raise ValueError(f"invalid API key file {path}: {exc}") from exc
+    keys: dict[str, APIKey] = {}
+    names: set[str] = set()
+    for entry in entries:
+        digest = entry.sha256.lower()
+        if digest in keys or entry.name in names:
+            raise ValueError(f"duplicate API key entry in {path}: {entry.name}")
+        names.add(entry.name)
+        scopes = frozenset(s.strip() for s in entry.scopes)
+        if unknown := scopes - SCOPES:
+            raise ValueError(
+                f"unknown scope in {path} for {entry.name}: "
+                f"{', '.join(sorted(unknown))}"
+            )
+        keys[digest] = APIKey(entry.name, scopes)
+    return keys
+
+
+class APIKeyStore:
+    def __init__(
+        self,
+        path: str | None = None,
+        *,
+        static: dict[str, APIKey] | None = None,
+        reload_seconds: float = 2.0,
+    ) -> None:
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._static = dict(static or {})
+        self._keys: dict[str, APIKey] = dict(self._static)
+        self._signature: tuple[int, int] | None = None
+        self._checked_at = 0.0
+        self.reloads = 0
+        if path:
+            signature = self._stat(path)
+            if signature is None:
+                raise RuntimeError(f"API key file not found: {path}")
+            self._load(path, signature)
+            self._checked_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _stat(path: str) -> tuple[int, int] | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self, path: str, signature: tuple[int, int] | None) -> None:
+        keys = load_key_file(path) if signature else {}
+        # keys from the environment win over file entries with the same digest
+        self._keys = {**keys, **self._static}
+        self._signature = signature
+        self.reloads += 1
+
+    def maybe_reload(self, now: float | None = None) -> None:
+        """Reload the key file if it changed; at most once per ``reload_seconds``."""
+        if not self.path:
+            return
+        now = time.monotonic() if now is None else now
+        if now - self._checked_at < self.reload_seconds:
+            return
+        self._checked_at = now
+        self.check()
+
+    def check(self) -> None:
+        """Reload the key file now if its size or mtime changed."""
+        if not self.path:
+            return
+        signature = self._stat(self.path)
+        if signature == self._signature:
+            return
+        try:
+            self._load(self.path, signature)
+        except (OSError, ValueError) as exc:
+            logger.error("Keeping previous API keys, reload failed: %s", exc)
+            self._signature = signature
+            return
+        logger.info("Reloaded API keys from %s (%d keys)", self.path, len(self._keys))
+
+    async def run_reloader(self) -> None:
+        """Check the key file for changes every ``reload_seconds``, forever."""
+        while True:
+            await asyncio.sleep(self.reload_seconds)
+            await asyncio.to_thread(self.check)
+
+    def lookup(self, secret: str) -> APIKey | None:
+        return self._keys.get(hash_key(secret))
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Generate a new key and print the secret and its key file entry."""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        sys.stderr.write("usage: python -m app.services.api_keys NAME [SCOPE ...]\n")
+        return 2
+    if unknown := set(argv[1:]) - SCOPES:
+        sys.stderr.write(f"unknown scope: {', '.join(sorted(unknown))}\n")
+        return 2
+    secret = secrets.token_urlsafe(32)
+    entry = {"name": argv[0], "sha256": hash_key(secret), "scopes": argv[1:] or ["*"]}
+    sys.stdout.write(f"key: {secret}\nentry: {json.dumps(entry)}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,457 @@
+"""
+Bounded tracker of failed authentication attempts per client IP.
+
+Entries live in an LRU-ordered dict capped at ``max_entries`` and are removed
+once they stop mattering: ``window`` seconds after the last failure, or when
+their block ends. Expiry is driven by a hashed timing wheel with one-second
+slots that is advanced on every call, so both registering a failure and
+checking a block stay O(1) amortized and the tracker cannot grow without limit
+while many source IPs fail once each.
+
+``SQLiteFailureTracker`` offers the same interface backed by a local SQLite
+database in WAL mode, so every uvicorn worker on the host shares one view of
+failure counts and blocks. Readers never wait for writers in WAL mode and the
+hot-path check is a single primary-key lookup. Its calls block on file I/O,
+so it sets ``blocking`` and callers run them in a thread. When another
+worker holds the lock past ``busy_timeout`` the failure is counted in an
+in-memory tracker of this worker instead, whose blocks are checked along
+with the shared ones, so lock contention under a brute-force attack cannot
+switch the lockout off.
+
+The database lives in a directory only the service user can access
+(``$XDG_RUNTIME_DIR/devil-api`` by default), so other local users cannot
+pre-create, replace or symlink it to tamper with lockout state.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import stat
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+BACKENDS = ("memory", "sqlite")
+DEFAULT_STATE_PATH = os.path.join(
+    os.getenv("XDG_RUNTIME_DIR")
+    or os.path.join(os.path.expanduser("~"), ".local", "state"),
+    "devil-api",
+    "auth.sqlite3",
+)
+# Seconds a call waits for another worker's lock before using the local tracker
+BUSY_TIMEOUT = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class FailureRecord:
+    fail_count: int
+    first_fail_ts: float
+    blocked_until: float = 0.0
+    expires_at: float = 0.0
+
+
+class AuthFailureTracker:
+    # calls are plain dict operations, safe to make on the event loop
+    blocking = False
+
+    def __init__(
+        self,
+        threshold: int,
+        block_seconds: float,
+        *,
+        window: float | None = None,
+        max_entries: int = 10000,
+        wheel_slots: int = 512,
+    ) -> None:
+        self.threshold = threshold
+        self.block_seconds = block_seconds
+        self.window = block_seconds if window is None else window
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, FailureRecord] = OrderedDict()
+        self._wheel: list[set[str]] = [set() for _ in range(max(1, wheel_slots))]
+        self._swept_tick: int | None = None
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, ip: object) -> bool:
+        return ip in self._entries
+
+    def get(self, ip: str) -> FailureRecord | None:
+        return self._entries.get(ip)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        for slot in self._wheel:
+            slot.clear()
+        self._swept_tick = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "blocked": sum(1 for r in self._entries.values() if r.blocked_until),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def register_failure(self, ip: str, now: float | None = None) -> tuple[bool, float]:
+        """
+        Register a failed attempt for ``ip``.
+
+        Returns (blocked, blocked_until); the block starts once the failure
+        count reaches the threshold.
+        """
+        now = time.time() if now is None else now
+        self._sweep(now)
+        rec = self._entries.get(ip)
+        if rec is None:
+            rec = FailureRecord(fail_count=1, first_fail_ts=now)
+            self._entries[ip] = rec
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        else:
+            if rec.blocked_until and now >= rec.blocked_until:
+                rec.fail_count = 0
+                rec.blocked_until = 0.0
+                rec.first_fail_ts = now
+            rec.fail_count += 1
+            self._entries.move_to_end(ip)
+        blocked = rec.fail_count >= self.threshold
+        if blocked:
+            rec.blocked_until = now + self.block_seconds
+        self._schedule(ip, rec, max(rec.blocked_until, now + self.window))
+        return (True, rec.blocked_until) if blocked else (False, 0.0)
+
+    def is_blocked(self, ip: str, now: float | None = None) -> bool:
+        """Return True while ``ip`` is blocked; an elapsed block resets the count."""
+        now = time.time() if now is None else now
+        self._sweep(now)
+        rec = self._entries.get(ip)
+        if rec is None or not rec.blocked_until:
+            return False
+        if now < rec.blocked_until:
+            return True
+        rec.blocked_until = 0.0
+        rec.fail_count = 0
+        return False
+
+    def reset(self, ip: str) -> None:
+        """Forget ``ip`` after a successful authentication."""
+        self._entries.pop(ip, None)
+
+    def _schedule(self, ip: str, rec: FailureRecord, expires_at: float) -> None:
+        rec.expires_at = expires_at
+        self._wheel[int(expires_at) % len(self._wheel)].add(ip)
+
+    def _sweep(self, now: float) -> None:
+        tick = int(now)
+        if self._swept_tick is None:
+            self._swept_tick = tick
+            return
+        if tick <= self._swept_tick:
+            return
+        slots = len(self._wheel)
+        start = max(self._swept_tick + 1, tick - slots + 1)
+        for t in range(start, tick + 1):
+            slot = self._wheel[t % slots]
+            for ip in list(slot):
+                rec = self._entries.get(ip)
+                if rec is None or int(rec.expires_at) % slots != t % slots:
+                    # forgotten, or rescheduled into another slot
+                    slot.discard(ip)
+                elif rec.expires_at <= now:
+                    del self._entries[ip]
+                    slot.discard(ip)
+                    self.expirations += 1
+        self._swept_tick = tick
+
+
+def _prepare_state_file(path: str) -> None:
+    """
+    Create ``path`` as a 0600 file in a 0700 directory owned by this user.
+
+    Raises:
+        RuntimeError: when the directory or file is a symlink, owned by
+            someone else, or writable by other users.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o022:
+        raise RuntimeError(
+            f"Auth state directory {directory} must be a directory owned by the "
+            "service user and not writable by others"
+        )
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+    except OSError as exc:
+        raise RuntimeError(f"Cannot open auth state file {path}: {exc}") from exc
+    try:
+        if os.fstat(fd).st_uid != os.getuid():
+            raise RuntimeError(f"Auth state file {path} is owned by another user")
+        os.fchmod(fd, 0o600)
+    finally:
+        os.close(fd)
+
+
+class SQLiteFailureTracker:
+    """
+    Failure tracker shared between processes through a SQLite file.
+
+    Rows past ``expires_at`` are ignored by reads and purged at most once per
+    second by whichever worker writes next; the table is then trimmed to
+    ``max_entries`` rows, dropping the ones closest to expiry first.
+
+    ``local`` takes over for whatever the database cannot answer in time;
+    ``busy`` counts how often that happened.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        threshold: int,
+        block_seconds: float,
+        *,
+        window: float | None = None,
+        max_entries: int = 10000,
+        busy_timeout: float = BUSY_TIMEOUT,
+    ) -> None:
+        _prepare_state_file(path)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.threshold = threshold
+        self.block_seconds = block_seconds
+        self.window = block_seconds if window is None else window
+        self.max_entries = max(1, max_entries)
+        self.evictions = 0
+        self.expirations = 0
+        self.busy = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._purged_at = 0.0
+        self.local = AuthFailureTracker(
+            threshold, block_seconds, window=window, max_entries=max_entries
+        )
+
+    def _db(self) -> sqlite3.Connection:
+        # a connection must not be shared across fork()
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS auth_failures ("
+                "ip TEXT PRIMARY KEY, fail_count INTEGER NOT NULL, "
+                "first_fail_ts REAL NOT NULL, blocked_until REAL NOT NULL, "
+                "expires_at REAL NOT NULL) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS auth_failures_expires "
+                "ON auth_failures (expires_at)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _fetch(self, ip: str, now: float) -> FailureRecord | None:
+        row = (
+            self._db()
+            .execute(
+                "SELECT fail_count, first_fail_ts, blocked_until, expires_at "
+                "FROM auth_failures WHERE ip = ? AND expires_at > ?",
+                (ip, now),
+            )
+            .fetchone()
+        )
+        return FailureRecord(*row) if row else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = (
+                self._db()
+                .execute(
+                    "SELECT COUNT(*) FROM auth_failures WHERE expires_at > ?",
+                    (time.time(),),
+                )
+                .fetchone()
+            )
+        return row[0]
+
+    def __contains__(self, ip: object) -> bool:
+        return isinstance(ip, str) and self.get(ip) is not None
+
+    def get(self, ip: str) -> FailureRecord | None:
+        with self._lock:
+            try:
+                return self._fetch(ip, time.time()) or self.local.get(ip)
+            except sqlite3.OperationalError as exc:
+                self._unavailable("lookup", ip, exc)
+                return self.local.get(ip)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM auth_failures")
+            self.local.clear()
+
+    def stats(self) -> dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            size, blocked = (
+                self._db()
+                .execute(
+                    "SELECT COUNT(*), COUNT(NULLIF(blocked_until > ?, 0)) "
+                    "FROM auth_failures WHERE expires_at > ?",
+                    (now, now),
+                )
+                .fetchone()
+            )
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "size": size,
+            "max_entries": self.max_entries,
+            "blocked": blocked,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "busy": self.busy,
+            "local_size": len(self.local),
+        }
+
+    def _unavailable(self, action: str, ip: str, exc: sqlite3.Error) -> None:
+        self.busy += 1
+        logger.warning(
+            "Auth state unavailable, %s kept in this worker ip=%s: %s", action, ip, exc
+        )
+
+    def register_failure(self, ip: str, now: float | None = None) -> tuple[bool, float]:
+        """
+        Register a failed attempt for ``ip``; see ``AuthFailureTracker``.
+
+        Counts it in ``local`` when the database stays locked for
+        ``busy_timeout``.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            try:
+                return self._register_failure(ip, now)
+            except sqlite3.OperationalError as exc:
+                self._unavailable("failure registration", ip, exc)
+                return self.local.register_failure(ip, now)
+
+    def _register_failure(self, ip: str, now: float) -> tuple[bool, float]:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rec = self._fetch(ip, now)
+            if rec is None or (rec.blocked_until and now >= rec.blocked_until):
+                rec = FailureRecord(fail_count=0, first_fail_ts=now)
+            rec.fail_count += 1
+            blocked = rec.fail_count >= self.threshold
+            rec.blocked_until = now + self.block_seconds if blocked else 0.0
+            rec.expires_at = max(rec.blocked_until, now + self.window)
+            db.execute(
+                "INSERT OR REPLACE INTO auth_failures VALUES (?, ?, ?, ?, ?)",
+                (
+                    ip,
+                    rec.fail_count,
+                    rec.first_fail_ts,
+                    rec.blocked_until,
+                    rec.expires_at,
+                ),
+            )
+            if now - self._purged_at >= 1:
+                self._purge(db, now)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return (True, rec.blocked_until) if blocked else (False, 0.0)
+
+    def is_blocked(self, ip: str, now: float | None = None) -> bool:
+        """Return True while ``ip`` is blocked in any worker or in ``local``."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.local.is_blocked(ip, now):
+                return True
+            try:
+                row = (
+                    self._db()
+                    .execute(
+                        "SELECT 1 FROM auth_failures WHERE ip = ? AND blocked_until > ?",
+                        (ip, now),
+                    )
+                    .fetchone()
+                )
+            except sqlite3.OperationalError as exc:
+                self._unavailable("block check", ip, exc)
+                return False
+        return row is not None
+
+    def reset(self, ip: str) -> None:
+        """Forget ``ip``; the write lock is only taken when a row exists."""
+        with self._lock:
+            self.local.reset(ip)
+            try:
+                db = self._db()
+                row = db.execute(
+                    "SELECT 1 FROM auth_failures WHERE ip = ?", (ip,)
+                ).fetchone()
+                if row is not None:
+                    db.execute("DELETE FROM auth_failures WHERE ip = ?", (ip,))
+            except sqlite3.OperationalError as exc:
+                self._unavailable("reset", ip, exc)
+
+    def _purge(self, db: sqlite3.Connection, now: float) -> None:
+        self._purged_at = now
+        self.expirations += db.execute(
+            "DELETE FROM auth_failures WHERE expires_at <= ?", (now,)
+        ).rowcount
+        excess = db.execute("SELECT COUNT(*) FROM auth_failures").fetchone()[0]
+        excess -= self.max_entries
+        if excess > 0:
+            self.evictions += db.execute(
+                "DELETE FROM auth_failures WHERE ip IN (SELECT ip FROM "
+                "auth_failures ORDER BY expires_at LIMIT ?)",
+                (excess,),
+            ).rowcount
+
+
+def make_tracker(
+    backend: str,
+    threshold: int,
+    block_seconds: float,
+    *,
+    window: float | None = None,
+    max_entries: int = 10000,
+    path: str = DEFAULT_STATE_PATH,
+) -> AuthFailureTracker | SQLiteFailureTracker:
+    """Build the tracker named by ``backend`` (``memory`` or ``sqlite``)."""
+    if backend == "memory":
+        return AuthFailureTracker(
+            threshold, block_seconds, window=window, max_entries=max_entries
+        )
+    if backend == "sqlite":
+        return SQLiteFailureTracker(
+            path, threshold, block_seconds, window=window, max_entries=max_entries
+        )
+    raise RuntimeError(
+        f"Unknown DEVIL_AUTH_STATE backend: {backend} (expected one of: {', '.join(BACKENDS)})"
+    )
@@ -0,0 +1,64 @@
+"""
+Helpers for running devil commands concurrently with a bounded fan-out.
+
+The devil daemon serves every command over a fresh UNIX socket connection, so
+composite operations (zone imports, bulk provisioning, cross-domain listings)
+must cap how many commands they have in flight at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Iterable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_CONCURRENCY = int(os.getenv("DEVIL_FANOUT_CONCURRENCY", "8"))
+
+
+async def gather_bounded(
+    aws: Iterable[Awaitable[T]],
+    limit: int = DEFAULT_CONCURRENCY,
+    *,
+    return_exceptions: bool = False,
+) -> list[T | BaseException]:
+    """
+    Await all awaitables with at most ``limit`` running at once.
+
+    Results are returned in input order, like ``asyncio.gather``.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(
+        *(run(aw) for aw in aws), return_exceptions=return_exceptions
+    )
+
+
+async def as_completed_bounded(
+    aws: Iterable[Awaitable[T]], limit: int = DEFAULT_CONCURRENCY
+) -> AsyncIterator[T]:
+    """
+    Yield results as soon as each awaitable finishes, running at most ``limit``
+    at once. Pending work is cancelled if the consumer stops iterating early.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    tasks = [asyncio.ensure_future(run(aw)) for aw in aws]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,75 @@
+"""
+Helpers for reading devil ``--json`` responses.
+
+devil list commands answer with a JSON object whose list members hold the
+listed entries (domains, records, certificates, ...). The exact key names vary
+between command families, so the helpers below walk the response generically
+instead of depending on one layout.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import Any
+
+DOMAIN_KEYS = ("domain", "www_domain", "dns_domain", "email_domain", "name")
+
+
+def iter_records(payload: Any) -> Iterator[dict[str, Any]]:
+    """Yield every JSON object found inside lists of a devil response."""
+    if isinstance(payload, dict):
+        for value in payload.values():
+            yield from iter_records(value)
+    elif isinstance(payload, list):
+        for item in payload:
+            if isinstance(item, dict):
+                yield item
+            yield from iter_records(item)
+
+
+def iter_list_strings(payload: Any) -> Iterator[str]:
+    """Yield plain string items of lists found in a devil response."""
+    if isinstance(payload, dict):
+        for value in payload.values():
+            yield from iter_list_strings(value)
+    elif isinstance(payload, list):
+        for item in payload:
+            if isinstance(item, str):
+                yield item
+            else:
+                yield from iter_list_strings(item)
+
+
+def first_value(record: dict[str, Any], keys: Iterable[str]) -> Any:
+    """Return the first non-empty value among ``keys`` in ``record``."""
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def list_domains(payload: Any) -> list[str]:
+    """Return the sorted, de-duplicated domain names of a devil list response."""
+    names = (
+        *(first_value(record, DOMAIN_KEYS) for record in iter_records(payload)),
+        *iter_list_strings(payload),
+    )
+    return sorted({normalize_domain(str(name)) for name in names if name})
+
+
+def normalize_domain(value: str) -> str:
+    """Lowercase a domain name and drop the trailing root dot."""
+    return value.strip().rstrip(".").lower()
+
+
+def normalize_ip(value: Any) -> str | None:
+    """Return the canonical form of ``value`` if it is an IP address."""
+    if not isinstance(value, str):
+        return None
+    try:
+        return str(ipaddress.ip_address(value.strip()))
+    except ValueError:
+        return None
@@ -0,0 +1,541 @@
+"""
+DNS zone handling: record argv rules, BIND zone-file parsing and minimal diffs.
+
+Zone changes are computed as a plan of ``devil dns add`` / ``devil dns del``
+commands against the records devil currently serves, so records that already
+exist are never touched.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+from app.schemas.dns import DNSAddRecord
+from app.schemas.dns import DNSTypes
+from app.services.concurrency import gather_bounded
+from app.services.devil_output import first_value
+from app.services.devil_output import iter_records
+from app.services.devil_output import normalize_domain
+from app.services.socket_client import DevilSocketError
+from app.services.socket_client import execute_devil_command
+
+DNS_CONCURRENCY = int(os.getenv("DEVIL_DNS_CONCURRENCY", "4"))
+
+SUPPORTED_TYPES = frozenset(t.value for t in DNSTypes)
+HOSTNAME_TARGET_TYPES = frozenset({"CNAME", "MX", "NS", "SRV"})
+
+_TTL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_TTL_RE = re.compile(r"^(?:\d+[smhdw]?)+$", re.IGNORECASE)
+_CLASSES = frozenset({"IN", "CH", "HS", "CS"})
+
+
+def build_record_args(data: DNSAddRecord) -> list[str]:
+    """
+    Build ``devil dns add`` argv for a record, enforcing CAA/MX/SRV argument rules.
+
+    Raises:
+        ValueError: when the field combination does not fit the record type.
+    """
+    args = [
+        "--json",
+        "dns",
+        "add",
+        data.dns_domain,
+        data.dns_record,
+        data.dns_record_type,
+    ]
+
+    t = data.dns_record_type.upper()
+    # CAA requires additional caa_tag before target
+    if t == "CAA":
+        if not data.caa_tag:
+            raise ValueError("caa_tag is required for CAA records")
+        if data.dns_prio is not None or data.dns_weight is not None:
+            raise ValueError("dns_prio/dns_weight not applicable to CAA")
+        args.extend([data.caa_tag, data.dns_target])
+    # SRV may include prio and optionally weight
+    elif t == "SRV":
+        if data.dns_prio is None:
+            raise ValueError("dns_prio is required for SRV records")
+        if data.dns_weight is not None:
+            args.extend([str(data.dns_prio), str(data.dns_weight), data.dns_target])
+        else:
+            args.extend([str(data.dns_prio), data.dns_target])
+        if data.caa_tag is not None:
+            raise ValueError("caa_tag not applicable to SRV")
+    # MX requires priority
+    elif t == "MX":
+        if data.dns_prio is None:
+            raise ValueError("dns_prio is required for MX records")
+        if data.dns_weight is not None or data.caa_tag is not None:
+            raise ValueError("dns_weight/caa_tag not applicable to MX")
+        args.extend([str(data.dns_prio), data.dns_target])
+    else:
+        # Generic case: just target
+        if (
+            data.dns_prio is not None
+            or data.dns_weight is not None
+            or data.caa_tag is not None
+        ):
+            # Validate combinations to avoid sending wrong shape
+            raise ValueError(
+                "dns_prio/dns_weight/caa_tag not applicable to this record type"
+            )
+        args.append(data.dns_target)
+
+    if data.ttl is not None:
+        args.append(str(data.ttl))
+    return args
+
+
+@dataclass(frozen=True)
+class ZoneRecord:
+    """
+    A DNS record in comparable form.
+
+    ``name`` is relative to the zone (``@`` for the apex) and hostname targets
+    are stored lowercase without the trailing dot. ``ttl`` and ``record_id``
+    do not take part in equality.
+    """
+
+    name: str
+    type: str
+    target: str
+    prio: int | None = None
+    weight: int | None = None
+    caa_tag: str | None = None
+    ttl: int | None = field(default=None, compare=False)
+    record_id: int | None = field(default=None, compare=False)
+
+    def to_add_record(self, zone: str) -> DNSAddRecord:
+        return DNSAddRecord(
+            dns_domain=zone,
+            dns_record=self.name,
+            dns_record_type=self.type,
+            dns_target=self.target,
+            ttl=self.ttl,
+            caa_tag=self.caa_tag,
+            dns_prio=self.prio,
+            dns_weight=self.weight,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.record_id,
+            "name": self.name,
+            "type": self.type,
+            "target": self.target,
+            "prio": self.prio,
+            "weight": self.weight,
+            "caa_tag": self.caa_tag,
+            "ttl": self.ttl,
+        }
+
+
+@dataclass
+class ZonePlan:
+    add: list[ZoneRecord] = field(default_factory=list)
+    delete: list[ZoneRecord] = field(default_factory=list)
+    unchanged: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "add": [r.as_dict() for r in self.add],
+            "delete": [r.as_dict() for r in self.delete],
+            "unchanged": self.unchanged,
+        }
+
+
+def relative_name(name: str, zone: str) -> str:
+    """Express a record owner relative to ``zone`` (``@`` for the apex)."""
+    zone = normalize_domain(zone)
+    name = normalize_domain(name)
+    if name in ("", "@", zone):
+        return "@"
+    if name.endswith("." + zone):
+        return name[: -len(zone) - 1]
+    return name
+
+
+def _normalize_target(rtype: str, target: str) -> str:
+    if rtype in HOSTNAME_TARGET_TYPES:
+        return " ".join(normalize_domain(part) for part in target.split())
+    return target.strip()
+
+
+def make_record(
+    zone: str,
+    name: str,
+    rtype: str,
+    target: str,
+    *,
+    prio: int | None = None,
+    weight: int | None = None,
+    caa_tag: str | None = None,
+    ttl: int | None = None,
+    record_id: int | None = None,
+) -> ZoneRecord:
+    rtype = rtype.upper()
+    return ZoneRecord(
+        name=relative_name(name, zone),
+        type=rtype,
+        target=_normalize_target(rtype, target),
+        prio=prio if rtype in ("MX", "SRV") else None,
+        weight=weight if rtype == "SRV" else None,
+        caa_tag=caa_tag.lower() if caa_tag and rtype == "CAA" else None,
+        ttl=ttl,
+        record_id=record_id,
+    )
+
+
+def _int_or_none(value: Any) -> int | None:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def records_from_listing(payload: dict[str, Any], zone: str) -> list[ZoneRecord]:
+    """Convert a ``devil dns list dns_domain`` response into zone records."""
+    records: list[ZoneRecord] = []
+    for item in iter_records(payload):
+        rtype = str(first_value(item, ("type", "dns_record_type")) or "").upper()
+        if rtype not in SUPPORTED_TYPES:
+            continue
+        target = first_value(item, ("content", "target", "dns_target", "value"))
+        if target is None:
+            continue
+        if rtype == "SRV" and item.get("port") is not None:
+            target = f"{item['port']} {target}"
+        records.append(
+            make_record(
+                zone,
+                str(first_value(item, ("name", "dns_record", "record")) or "@"),
+                rtype,
+                str(target),
+                prio=_int_or_none(first_value(item, ("prio", "priority"))),
+                weight=_int_or_none(item.get("weight")),
+                caa_tag=first_value(item, ("caa_tag", "tag")),
+                ttl=_int_or_none(item.get("ttl")),
+                record_id=_int_or_none(first_value(item, ("id", "record_id"))),
+            )
+        )
+    return records
+
+
+async def fetch_zone(zone: str) -> list[ZoneRecord]:
+    """Return the records devil currently serves for ``zone``."""
+    payload = await execute_devil_command(["--json", "dns", "list", zone])
+    return records_from_listing(payload, zone)
+
+
+def plan_zone(
+    current: list[ZoneRecord], desired: list[ZoneRecord], *, prune: bool
+) -> ZonePlan:
+    """
+    Compute the minimal add/delete plan turning ``current`` into ``desired``.
+
+    A desired record matches a current one when all fields but the id are
+    equal; a desired TTL must also match when the current TTL is known. A
+    record differing only in TTL is replaced (added and the old one deleted)
+    whether or not ``prune`` is set. With ``prune`` the remaining unmatched
+    current records are deleted, except apex NS records when ``desired`` does
+    not manage apex NS at all.
+    """
+    available: dict[ZoneRecord, list[ZoneRecord]] = {}
+    for record in current:
+        available.setdefault(record, []).append(record)
+
+    plan = ZonePlan()
+    for record in dict.fromkeys(desired):
+        candidates = available.get(record, [])
+        match = next(
+            (
+                c
+                for c in candidates
+                if record.ttl is None or c.ttl is None or c.ttl == record.ttl
+            ),
+            None,
+        )
+        if match is None:
+            plan.add.append(record)
+            stale = next((c for c in candidates if c.record_id is not None), None)
+            if stale is not None:
+                candidates.remove(stale)
+                plan.delete.append(stale)
+        else:
+            candidates.remove(match)
+            plan.unchanged += 1
+
+    if prune:
+        manages_apex_ns = any(r.type == "NS" and r.name == "@" for r in desired)
+        for leftovers in available.values():
+            for record in leftovers:
+                if record.type == "NS" and record.name == "@" and not manages_apex_ns:
+                    continue
+                if record.record_id is not None:
+                    plan.delete.append(record)
+    return plan
+
+
+async def apply_plan(
+    zone: str, plan: ZonePlan, concurrency: int = DNS_CONCURRENCY
+) -> dict[str, Any]:
+    """
+    Execute ``plan`` against devil, adds first so no name is left unresolved.
+
+    A delete is skipped when an add for the same name failed, since the old
+    record may be the only one left answering for it (a replaced TTL or
+    target). Every other operation is attempted; per-operation outcomes are
+    returned.
+    """
+
+    async def run(action: str, record: ZoneRecord, args: list[str]):
+        entry: dict[str, Any] = {"action": action, "record": record.as_dict()}
+        try:
+            entry["result"] = await execute_devil_command(args)
+            entry["status"] = "ok"
+        except DevilSocketError as exc:
+            entry["status"] = "error"
+            entry["detail"] = str(exc)
+        return entry
+
+    added = await gather_bounded(
+        (
+            run("add", record, build_record_args(record.to_add_record(zone)))
+            for record in plan.add
+        ),
+        concurrency,
+    )
+    failed_names = {
+        record.name
+        for record, entry in zip(plan.add, added, strict=True)
+        if entry["status"] != "ok"
+    }
+    skipped = [
+        {
+            "action": "del",
+            "record": record.as_dict(),
+            "status": "skipped",
+            "detail": f"add for {record.name} failed",
+        }
+        for record in plan.delete
+        if record.name in failed_names
+    ]
+    deleted = await gather_bounded(
+        (
+            run("del", record, ["--json", "dns", "del", zone, str(record.record_id)])
+            for record in plan.delete
+            if record.name not in failed_names
+        ),
+        concurrency,
+    )
+    results = [*added, *deleted, *skipped]
+    return {
+        "plan": plan.as_dict(),
+        "results": results,
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "skipped": len(skipped),
+    }
+
+
+def _ttl_seconds(value: str) -> int:
+    if not _TTL_RE.match(value):
+        raise ValueError(f"invalid TTL {value!r}")
+    if value.isdigit():
+        return int(value)
+    return sum(
+        int(num) * _TTL_UNITS[unit.lower()]
+        for num, unit in re.findall(r"(\d+)([smhdwSMHDW])", value)
+    )
+
+
+def _tokenize(line: str) -> list[tuple[str, bool]]:
+    """Split a zone-file line into (token, quoted) pairs, dropping comments."""
+    tokens: list[tuple[str, bool]] = []
+    i, n = 0, len(line)
+    while i < n:
+        ch = line[i]
+        if ch == ";":
+            break
+        if ch.isspace() or ch in "()":
+            i += 1
+            continue
+        if ch == '"':
+            j, buf = i + 1, []
+            while j < n and line[j] != '"':
+                if line[j] == "\\" and j + 1 < n:
+                    j += 1
+                buf.append(line[j])
+                j += 1
+            if j >= n:
+                raise ValueError("unterminated quoted string")
+            tokens.append(("".join(buf), True))
+            i = j + 1
+            continue
+        j = i
+        while j < n and not line[j].isspace() and line[j] not in '();"':
+            j += 1
+        tokens.append((line[i:j], False))
+        i = j
+    return tokens
+
+
+def _logical_lines(text: str):
+    """Yield (line number, leading whitespace, text) joining ``( ... )`` spans."""
+    pending: list[str] = []
+    start, depth, indented = 0, 0, False
+    for lineno, raw in enumerate(text.splitlines(), start=1):
+        code = raw
+        in_quote = False
+        for idx, ch in enumerate(raw):
+            if ch == '"':
+                in_quote = not in_quote
+            elif ch == ";" and not in_quote:
+                code = raw[:idx]
+                break
+            elif not in_quote and ch == "(":
+                depth += 1
+            elif not in_quote and ch == ")":
+                depth -= 1
+        if not pending:
+            start, indented = lineno, raw[:1].isspace()
+        pending.append(code)
+        if depth <= 0:
+            joined = " ".join(pending)
+            pending, depth = [], 0
+            if joined.strip():
+                yield start, indented, joined
+    if pending:
+        raise ValueError(f"line {start}: unbalanced parentheses")
+
+
+def _absolute(name: str, origin: str) -> str:
+    if name == "@":
+        return origin
+    if name.endswith("."):
+        return name
+    return f"{name}.{origin}" if origin else name
+
+
+def _in_zone(name: str, zone: str) -> bool:
+    name, zone = normalize_domain(name), normalize_domain(zone)
+    return name == zone or name.endswith("." + zone)
+
+
+def parse_zone_file(text: str, zone: str) -> list[ZoneRecord]:
+    """
+    Parse a BIND zone file into records of ``zone``.
+
+    Supports ``$ORIGIN``/``$TTL``, omitted owners and TTL/class fields,
+    multi-line parenthesised records, quoted TXT strings and TTL units.
+    SOA and record types devil does not manage are skipped.
+
+    Raises:
+        ValueError: on malformed input, including the offending line number.
+    """
+    origin = normalize_domain(zone) + "."
+    default_ttl: int | None = None
+    last_owner: str | None = None
+    last_ttl: int | None = None
+    records: list[ZoneRecord] = []
+
+    for lineno, indented, line in _logical_lines(text):
+        try:
+            tokens = _tokenize(line)
+        except ValueError as exc:
+            raise ValueError(f"line {lineno}: {exc}") from exc
+        if not tokens:
+            continue
+        head = tokens[0][0].upper()
+        if head in ("$ORIGIN", "$TTL") and len(tokens) < 2:
+            raise ValueError(f"line {lineno}: {tokens[0][0]} needs an argument")
+        if head == "$ORIGIN":
+            origin = _absolute(tokens[1][0], origin)
+            continue
+        if head == "$TTL":
+            try:
+                default_ttl = _ttl_seconds(tokens[1][0])
+            except ValueError as exc:
+                raise ValueError(f"line {lineno}: {exc}") from exc
+            continue
+        if head.startswith("$"):
+            raise ValueError(f"line {lineno}: unsupported directive {tokens[0][0]}")
+
+        if indented:
+            if last_owner is None:
+                raise ValueError(f"line {lineno}: record without owner name")
+            owner = last_owner
+        else:
+            owner = _absolute(tokens[0][0], origin)
+            tokens = tokens[1:]
+            if not _in_zone(owner, zone):
+                raise ValueError(f"line {lineno}: {owner} is outside zone {zone}")
+
+        ttl: int | None = None
+        while tokens and not tokens[0][1]:
+            word = tokens[0][0]
+            if word.upper() in _CLASSES:
+                tokens = tokens[1:]
+            elif _TTL_RE.match(word):
+                ttl = _ttl_seconds(word)
+                tokens = tokens[1:]
+            else:
+                break
+        if not tokens:
+            raise ValueError(f"line {lineno}: missing record type")
+        rtype = tokens[0][0].upper()
+        rdata = tokens[1:]
+        last_owner = owner
+        if ttl is None:
+            ttl = default_ttl if default_ttl is not None else last_ttl
+        last_ttl = ttl
+
+        if rtype not in SUPPORTED_TYPES:
+            continue
+        try:
+            records.append(_record_from_rdata(zone, origin, owner, rtype, rdata, ttl))
+        except (IndexError, ValueError) as exc:
+            raise ValueError(f"line {lineno}: invalid {rtype} record") from exc
+    return records
+
+
+def _record_from_rdata(
+    zone: str,
+    origin: str,
+    owner: str,
+    rtype: str,
+    rdata: list[tuple[str, bool]],
+    ttl: int | None,
+) -> ZoneRecord:
+    words = [token for token, _ in rdata]
+    if rtype == "TXT":
+        return make_record(zone, owner, rtype, "".join(words), ttl=ttl)
+    if rtype == "CAA":
+        # flags are not part of devil's CAA syntax
+        return make_record(zone, owner, rtype, words[2], caa_tag=words[1], ttl=ttl)
+    if rtype == "MX":
+        return make_record(
+            zone, owner, rtype, _absolute(words[1], origin), prio=int(words[0]), ttl=ttl
+        )
+    if rtype == "SRV":
+        # devil takes SRV port and host together as the target
+        target = f"{int(words[2])} {_absolute(words[3], origin)}"
+        return make_record(
+            zone,
+            owner,
+            rtype,
+            target,
+            prio=int(words[0]),
+            weight=int(words[1]),
+            ttl=ttl,
+        )
+    if rtype in HOSTNAME_TARGET_TYPES:
+        return make_record(zone, owner, rtype, _absolute(words[0], origin), ttl=ttl)
+    if len(words) != 1:
+        raise ValueError("expected a single target")
+    return make_record(zone, owner, rtype, words[0], ttl=ttl)
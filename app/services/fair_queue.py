@@ -0,0 +1,156 @@
+"""
+Weighted fair queuing of devil commands.
+
+At most ``slots`` commands run against the daemon at once. When every slot
+is busy, waiting commands are ordered by virtual finish time: a client with
+weight ``w`` advances its own clock by ``1 / w`` per queued command, starting
+no earlier than the scheduler's current virtual time. A client submitting a
+thousand commands therefore only delays others by its weighted share instead
+of by its whole backlog, and idle clients do not bank credit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+
+
+def parse_weights(value: str | None) -> dict[str, float]:
+    """
+    Parse ``name=weight`` pairs separated by commas, e.g. ``ci=2,bulk=0.5``.
+
+    Raises ValueError for malformed entries or non-positive weights.
+    """
+    weights: dict[str, float] = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        name, sep, raw = item.partition("=")
+        try:
+            weight = float(raw) if sep else 0.0
+        except ValueError:
+            weight = 0.0
+        if not name.strip() or weight <= 0:
+            raise ValueError(f"invalid fair queue weight: {item.strip()!r}")
+        weights[name.strip()] = weight
+    return weights
+
+
+@dataclass(slots=True)
+class ClientQueue:
+    weight: float
+    finish_tag: float = 0.0
+    queued: int = 0
+    running: int = 0
+    dispatched: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "weight": self.weight,
+            "queued": self.queued,
+            "running": self.running,
+            "dispatched": self.dispatched,
+            "wait_avg_ms": round(self.wait_total / self.dispatched * 1000, 3)
+            if self.dispatched
+            else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+class FairScheduler:
+    def __init__(
+        self,
+        slots: int,
+        weights: dict[str, float] | None = None,
+        *,
+        default_weight: float = 1.0,
+    ) -> None:
+        """Raises ValueError unless every weight, default included, is positive."""
+        for name, weight in {**(weights or {}), "default": default_weight}.items():
+            if not weight > 0:
+                raise ValueError(f"fair queue weight must be positive: {name}={weight}")
+        self.slots = slots
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        self._free = slots
+        self._virtual_time = 0.0
+        self._heap: list[tuple[float, int, asyncio.Future[None], str]] = []
+        self._seq = itertools.count()
+        self._clients: dict[str, ClientQueue] = {}
+
+    def _client(self, name: str) -> ClientQueue:
+        client = self._clients.get(name)
+        if client is None:
+            weight = self.weights.get(name, self.default_weight)
+            client = self._clients[name] = ClientQueue(weight)
+        return client
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "free": self._free,
+            "queued": sum(c.queued for c in self._clients.values()),
+            "clients": {name: c.stats() for name, c in self._clients.items()},
+        }
+
+    def reset_stats(self) -> None:
+        """Drop counters of clients with nothing queued or running."""
+        for name in [n for n, c in self._clients.items() if not c.queued + c.running]:
+            del self._clients[name]
+
+    @asynccontextmanager
+    async def slot(self, name: str) -> AsyncIterator[None]:
+        """Hold one daemon slot for ``name`` for the duration of the block."""
+        if self.slots <= 0:
+            yield
+            return
+        client = self._client(name)
+        tag = max(self._virtual_time, client.finish_tag) + 1 / client.weight
+        client.finish_tag = tag
+        started = time.perf_counter()
+        if self._free > 0 and not self._heap:
+            self._free -= 1
+            self._virtual_time = tag
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._heap, (tag, next(self._seq), future, name))
+            client.queued += 1
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # the slot was handed over just before cancellation
+                    self._release()
+                else:
+                    future.cancel()
+                    client.queued -= 1
+                raise
+        waited = time.perf_counter() - started
+        client.dispatched += 1
+        client.wait_total += waited
+        client.wait_max = max(client.wait_max, waited)
+        client.running += 1
+        try:
+            yield
+        finally:
+            client.running -= 1
+            self._release()
+
+    def _release(self) -> None:
+        while self._heap:
+            tag, _, future, name = heapq.heappop(self._heap)
+            if future.cancelled():
+                continue
+            self._virtual_time = tag
+            self._clients[name].queued -= 1
+            future.set_result(None)
+            return
+        self._free += 1
@@ -0,0 +1,264 @@
+"""
+Bulk mail provisioning from NDJSON or CSV uploads.
+
+Rows are parsed from the request body chunk by chunk, validated against the
+matching mail schema and sent to devil with a bounded number in flight. Each
+row produces one result object as soon as its command finishes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import os
+from collections import deque
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from typing import Any
+
+from pydantic import BaseModel
+from pydantic import ValidationError
+
+from app.schemas.mail import MailAccountAdd
+from app.schemas.mail import MailAliasAdd
+from app.schemas.mail import MailQuota
+from app.services.socket_client import DevilSocketError
+from app.services.socket_client import execute_devil_command
+
+BULK_CONCURRENCY = int(os.getenv("DEVIL_BULK_CONCURRENCY", "8"))
+MAX_ROW_BYTES = 64 * 1024
+
+
+def account_add_args(data: MailAccountAdd) -> list[str]:
+    args = ["--json", "mail", "account", "add", data.email_mailbox]
+    if data.password:
+        args.append(data.password)
+    return args
+
+
+def alias_add_args(data: MailAliasAdd) -> list[str]:
+    return ["--json", "mail", "alias", "add", data.email_from, data.email_to]
+
+
+def quota_args(data: MailQuota) -> list[str]:
+    return ["--json", "mail", "quota", data.email_mailbox, data.mail_quota]
+
+
+BULK_ACTIONS: dict[str, tuple[type[BaseModel], Callable[[Any], list[str]]]] = {
+    "account_add": (MailAccountAdd, account_add_args),
+    "alias_add": (MailAliasAdd, alias_add_args),
+    "quota": (MailQuota, quota_args),
+}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes | None]:
+    """
+    Split a byte stream into lines without buffering more than one row.
+
+    Yields ``None`` in place of a line longer than ``MAX_ROW_BYTES``, whether
+    it spans chunks or arrives whole in one.
+    """
+    buffer = b""
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            line, buffer = buffer[:newline], buffer[newline + 1 :]
+            yield None if oversized or len(line) > MAX_ROW_BYTES else line
+            oversized = False
+        if len(buffer) > MAX_ROW_BYTES:
+            buffer, oversized = b"", True
+    if oversized:
+        yield None
+    elif buffer:
+        yield buffer
+
+
+class _Lines:
+    """Line source of a ``csv.reader``, pulled only once a record is complete."""
+
+    def __init__(self) -> None:
+        self.pending: deque[str] = deque()
+        self.size = 0
+        self.quotes = 0
+
+    def __iter__(self) -> _Lines:
+        return self
+
+    def __next__(self) -> str:
+        if not self.pending:
+            raise StopIteration
+        return self.pending.popleft()
+
+    def add(self, line: str, size: int) -> None:
+        self.pending.append(line + "\n")
+        self.size += size + 1
+        self.quotes += line.count('"')
+
+    @property
+    def open_quote(self) -> bool:
+        return self.quotes % 2 == 1
+
+    def reset(self) -> None:
+        self.pending.clear()
+        self.size = self.quotes = 0
+
+
+async def iter_rows(
+    chunks: AsyncIterator[bytes], fmt: str
+) -> AsyncIterator[dict[str, Any] | str]:
+    """
+    Yield one dict per NDJSON/CSV row, or an error message for unreadable rows.
+
+    CSV input must start with a header row; empty cells are treated as missing.
+    Quoted CSV fields may span lines. A UTF-8 byte order mark is ignored.
+    """
+    lines = _Lines()
+    reader = csv.reader(lines)
+    header: list[str] | None = None
+    first = True
+    async for raw in iter_lines(chunks):
+        if raw is None:
+            lines.reset()
+            yield f"row exceeds {MAX_ROW_BYTES} bytes"
+            continue
+        try:
+            line = raw.decode()
+        except UnicodeDecodeError:
+            lines.reset()
+            yield "row is not valid UTF-8"
+            continue
+        if first:
+            line, first = line.removeprefix("\ufeff"), False
+        if fmt == "csv":
+            if not lines.open_quote and not line.strip():
+                continue
+            lines.add(line, len(raw))
+            if lines.size > MAX_ROW_BYTES:
+                lines.reset()
+                yield f"row exceeds {MAX_ROW_BYTES} bytes"
+                continue
+            if lines.open_quote:
+                continue
+            values = next(reader)
+            lines.reset()
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            yield {k: v for k, v in zip(header, values, strict=False) if v != ""}
+            continue
+        line = line.rstrip("\r")
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield f"invalid JSON: {exc.msg}"
+            continue
+        yield row if isinstance(row, dict) else "row must be a JSON object"
+    if lines.pending:
+        yield "unterminated quoted CSV field"
+
+
+async def process_row(number: int, row: dict[str, Any] | str) -> dict[str, Any]:
+    """Validate one row and run its devil command, returning the row result."""
+    result: dict[str, Any] = {"row": number, "status": "error"}
+    if isinstance(row, str):
+        result["detail"] = row
+        return result
+    action = row.pop("action", None)
+    result["action"] = action
+    if action not in BULK_ACTIONS:
+        result["detail"] = f"action must be one of: {', '.join(BULK_ACTIONS)}"
+        return result
+    model, build_args = BULK_ACTIONS[action]
+    try:
+        data = model.model_validate(row)
+    except ValidationError as exc:
+        result["detail"] = exc.errors(
+            include_url=False, include_context=False, include_input=False
+        )
+        return result
+    try:
+        result["result"] = await execute_devil_command(build_args(data))
+    except DevilSocketError as exc:
+        result["detail"] = str(exc)
+        return result
+    result["status"] = "ok"
+    return result
+
+
+class BulkRun:
+    """
+    Row dispatcher streaming results while the body is still being read.
+
+    At most ``concurrency`` rows run at once, each holding its slot until its
+    result is queued, and the result queue holds at most ``concurrency``
+    entries. A client reading results slowly therefore stops new rows from
+    starting, which in turn stops the body from being read further.
+    """
+
+    def __init__(self, concurrency: int = BULK_CONCURRENCY) -> None:
+        concurrency = max(1, concurrency)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._results: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        self.submitted = 0
+
+    async def submit(self, row: dict[str, Any] | str) -> None:
+        await self._slots.acquire()
+        self.submitted += 1
+        task = asyncio.create_task(self._run(self.submitted, row))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, number: int, row: dict[str, Any] | str) -> None:
+        try:
+            try:
+                result = await process_row(number, row)
+            except Exception as exc:
+                result = {"row": number, "status": "error", "detail": str(exc)}
+            await self._results.put(result)
+        finally:
+            self._slots.release()
+
+    async def feed(self, chunks: AsyncIterator[bytes], fmt: str) -> None:
+        """
+        Submit every row of the body, wait for the rows in flight and queue
+        the end marker. A cancelled feed queues nothing, as nobody reads the
+        results any more and a full queue would never drain.
+        """
+        cancelled = False
+        try:
+            async for row in iter_rows(chunks, fmt):
+                await self.submit(row)
+            if self._tasks:
+                await asyncio.wait(set(self._tasks))
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                await self._results.put(None)
+
+    async def results(
+        self, chunks: AsyncIterator[bytes], fmt: str
+    ) -> AsyncIterator[bytes]:
+        """
+        Read rows from ``chunks`` in the background and yield NDJSON result
+        lines in completion order until every row is done.
+        """
+        feeder = asyncio.create_task(self.feed(chunks, fmt))
+        try:
+            while (result := await self._results.get()) is not None:
+                yield json.dumps(result).encode() + b"\n"
+            await feeder
+        finally:
+            tasks = [feeder, *self._tasks]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,154 @@
+"""
+Memory diagnostics for a running worker.
+
+tracemalloc is off by default because tracing slows every allocation. It is
+started on demand (or from process start with ``PYTHONTRACEMALLOC=N``); a
+snapshot taken then serves as the baseline, and later diffs against it list
+the source lines whose allocations grew the most. Growth that keeps showing
+up in the same place across diffs is the leak.
+
+Without tracemalloc, ``gc_stats`` and ``object_counts`` still show
+collector activity and which object types are multiplying. Counting objects
+walks every gc-tracked object, so it takes a noticeable fraction of a second
+on a large heap.
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any
+
+# allocations of the diagnostics themselves and of the import system
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemoryDiagnosticsError(RuntimeError):
+    """Raised when an operation needs tracemalloc running or a baseline."""
+
+
+def rss_bytes() -> int | None:
+    """Current resident set size, where /proc is available."""
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def gc_stats() -> dict[str, Any]:
+    return {
+        "enabled": gc.isenabled(),
+        "counts": gc.get_count(),
+        "thresholds": gc.get_threshold(),
+        "generations": gc.get_stats(),
+        "garbage": len(gc.garbage),
+        "frozen": gc.get_freeze_count(),
+    }
+
+
+def object_counts(limit: int = 30) -> list[dict[str, Any]]:
+    """The most common gc-tracked object types."""
+    counts = Counter(
+        f"{type(obj).__module__}.{type(obj).__qualname__}" for obj in gc.get_objects()
+    )
+    return [{"type": name, "count": n} for name, n in counts.most_common(limit)]
+
+
+def _stat(stat: tracemalloc.Statistic | tracemalloc.StatisticDiff) -> dict[str, Any]:
+    frame = stat.traceback[0]
+    entry: dict[str, Any] = {
+        "file": frame.filename,
+        "line": frame.lineno,
+        "size": stat.size,
+        "count": stat.count,
+    }
+    if isinstance(stat, tracemalloc.StatisticDiff):
+        entry["size_diff"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    if len(stat.traceback) > 1:
+        entry["traceback"] = [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+    return entry
+
+
+class MemoryDiagnostics:
+    def __init__(self) -> None:
+        self.baseline: tracemalloc.Snapshot | None = None
+        self.baseline_taken: float | None = None
+
+    def status(self) -> dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "baseline_taken": self.baseline_taken,
+        }
+
+    def start(self, frames: int = 1) -> dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        elif tracemalloc.get_traceback_limit() != frames:
+            raise MemoryDiagnosticsError(
+                f"tracemalloc is already running with "
+                f"{tracemalloc.get_traceback_limit()} frames; stop it first"
+            )
+        return self.status()
+
+    def stop(self) -> dict[str, Any]:
+        tracemalloc.stop()
+        self.baseline = self.baseline_taken = None
+        return self.status()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise MemoryDiagnosticsError("tracemalloc is not running")
+        return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    def snapshot(self, limit: int = 20, key_type: str = "lineno") -> dict[str, Any]:
+        """Take a new baseline and return its largest allocation sites."""
+        snapshot = self._snapshot()
+        self.baseline, self.baseline_taken = snapshot, time.time()
+        return {
+            "taken": self.baseline_taken,
+            "total_bytes": sum(s.size for s in snapshot.statistics("filename")),
+            "top": [_stat(s) for s in snapshot.statistics(key_type)[:limit]],
+        }
+
+    def diff(self, limit: int = 20, key_type: str = "lineno") -> dict[str, Any]:
+        """Compare a new snapshot with the baseline; largest growth first."""
+        if self.baseline is None:
+            raise MemoryDiagnosticsError("take a baseline snapshot first")
+        snapshot = self._snapshot()
+        stats = sorted(
+            snapshot.compare_to(self.baseline, key_type),
+            key=lambda s: s.size_diff,
+            reverse=True,
+        )
+        return {
+            "baseline_taken": self.baseline_taken,
+            "seconds": round(time.time() - (self.baseline_taken or 0), 1),
+            "size_diff": sum(s.size_diff for s in stats),
+            "top": [_stat(s) for s in stats[:limit]],
+        }
+
+
+MEMORY = MemoryDiagnostics()
@@ -0,0 +1,200 @@
+"""
+MySQL grant reconciliation using privilege bitmasks.
+
+Each (user, database) pair is reduced to an integer mask with one bit per
+privilege, so diffing desired against current state is a pair of bitwise
+operations and the resulting ``+PRIV``/``-PRIV`` list is minimal.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import Any
+
+from app.schemas.mysql import MySQLPrivileges
+from app.schemas.mysql import MySQLPrivilegesReconcile
+from app.services.concurrency import gather_bounded
+from app.services.devil_output import first_value
+from app.services.socket_client import DevilSocketError
+from app.services.socket_client import execute_devil_command
+
+PRIVILEGE_BITS: dict[str, int] = {
+    p.value: 1 << bit
+    for bit, p in enumerate(p for p in MySQLPrivileges.Privilege if p.value != "ALL")
+}
+ALL_MASK = sum(PRIVILEGE_BITS.values())
+
+USER_KEYS = ("user", "user_name", "username")
+HOST_KEYS = ("host", "host_name")
+DATABASE_KEYS = ("database", "database_name", "db")
+PRIVILEGE_KEYS = ("privileges", "grants", "mysql_privileges")
+
+Pair = tuple[str, str]
+
+
+def privileges_to_mask(privileges: Iterable[str]) -> int:
+    """
+    Fold privilege names into a mask; ``ALL`` sets every bit.
+
+    Names are matched case-insensitively with spaces read as underscores, so
+    ``"create temporary tables"`` and ``"ALL PRIVILEGES"`` are understood.
+    """
+    mask = 0
+    for name in privileges:
+        key = str(name).strip().upper().replace(" ", "_")
+        if key in ("ALL", "ALL_PRIVILEGES"):
+            return ALL_MASK
+        mask |= PRIVILEGE_BITS.get(key, 0)
+    return mask
+
+
+def mask_to_privileges(mask: int) -> list[str]:
+    return [name for name, bit in PRIVILEGE_BITS.items() if mask & bit]
+
+
+def privilege_ops(current: int, desired: int) -> list[str]:
+    """Return the minimal ``+PRIV``/``-PRIV`` list turning ``current`` into ``desired``."""
+    if current == desired:
+        return []
+    if desired == ALL_MASK:
+        return ["+ALL"]
+    if desired == 0:
+        return ["-ALL"]
+    return [f"+{p}" for p in mask_to_privileges(desired & ~current)] + [
+        f"-{p}" for p in mask_to_privileges(current & ~desired)
+    ]
+
+
+def user_key(user: str, host: str | None = None) -> str:
+    """
+    Canonical ``user[@host]`` form used to match accounts.
+
+    The host may be given separately or after the last ``@``; it is
+    lowercased and dropped when it is ``%`` (any host), devil's default.
+    """
+    user = str(user).strip()
+    if host is None and "@" in user:
+        user, _, host = user.rpartition("@")
+    host = (host or "").strip().lower()
+    return user if host in ("", "%") else f"{user}@{host}"
+
+
+def desired_masks(data: MySQLPrivilegesReconcile) -> dict[Pair, int]:
+    """Expand the grant matrix into a mask per (user, database) pair."""
+    desired: dict[Pair, int] = {}
+    for grant in data.grants:
+        mask = privileges_to_mask(p.value for p in grant.privileges)
+        for user in grant.users:
+            for database in grant.databases:
+                pair = (user_key(user), database)
+                desired[pair] = desired.get(pair, 0) | mask
+    return desired
+
+
+def _privilege_names(value: Any) -> list[str]:
+    if isinstance(value, str):
+        return [part for part in value.split(",") if part.strip()]
+    if isinstance(value, list):
+        return [str(part) for part in value]
+    return []
+
+
+def _walk_grants(
+    obj: Any, user: str | None, database: str | None
+) -> Iterator[tuple[str, str | None, list[str]]]:
+    """
+    Yield (user, database, privilege names) from a listing. A user whose
+    privileges are listed but empty yields ``None`` as database, so callers
+    can tell "no grants" from "grants not found".
+    """
+    if isinstance(obj, list):
+        for item in obj:
+            yield from _walk_grants(item, user, database)
+        return
+    if not isinstance(obj, dict):
+        return
+    found_user = first_value(obj, USER_KEYS)
+    if found_user:
+        user = user_key(found_user, first_value(obj, HOST_KEYS))
+    database = first_value(obj, DATABASE_KEYS) or database
+    privileges = first_value(obj, PRIVILEGE_KEYS)
+    if user and isinstance(privileges, dict):
+        if not privileges:
+            yield user, None, []
+        for db_name, names in privileges.items():
+            yield user, str(db_name), _privilege_names(names)
+    elif user and privileges == []:
+        yield user, None, []
+    elif user and database and privileges is not None:
+        yield user, str(database), _privilege_names(privileges)
+    for value in obj.values():
+        if isinstance(value, (dict, list)):
+            yield from _walk_grants(value, user, database)
+
+
+def current_masks(payload: dict[str, Any]) -> dict[Pair, int]:
+    """Read (user, database) -> mask pairs from a ``devil mysql list`` response."""
+    current: dict[Pair, int] = {}
+    for user, database, names in _walk_grants(payload, None, None):
+        if database is None:
+            continue
+        pair = (user, database)
+        current[pair] = current.get(pair, 0) | privileges_to_mask(names)
+    return current
+
+
+def unread_users(payload: dict[str, Any], desired: dict[Pair, int]) -> list[str]:
+    """
+    Desired users whose privileges the listing does not show at all.
+
+    Their current grants are unknown: the listing has a layout
+    ``_walk_grants`` does not understand or names the account differently,
+    so nothing they hold can be revoked.
+    """
+    read = {user for user, _, _ in _walk_grants(payload, None, None)}
+    return sorted({user for user, _ in desired} - read)
+
+
+def plan_grants(
+    current: dict[Pair, int], desired: dict[Pair, int], *, prune: bool
+) -> dict[Pair, list[str]]:
+    """Return privilege operations per pair, leaving already-correct pairs out."""
+    targets = dict(desired)
+    if prune:
+        users = {user for user, _ in desired}
+        for pair, mask in current.items():
+            if pair[0] in users and pair not in desired and mask:
+                targets[pair] = 0
+    plan: dict[Pair, list[str]] = {}
+    for pair, mask in targets.items():
+        ops = privilege_ops(current.get(pair, 0), mask)
+        if ops:
+            plan[pair] = ops
+    return plan
+
+
+def plan_as_list(plan: dict[Pair, list[str]]) -> list[dict[str, Any]]:
+    return [
+        {"user": user, "database": database, "privileges": ops}
+        for (user, database), ops in plan.items()
+    ]
+
+
+async def apply_grants(plan: dict[Pair, list[str]]) -> list[dict[str, Any]]:
+    """Run ``devil mysql privileges`` for every planned pair concurrently."""
+
+    async def run(user: str, database: str, ops: list[str]) -> dict[str, Any]:
+        entry: dict[str, Any] = {"user": user, "database": database, "privileges": ops}
+        args = ["--json", "mysql", "privileges", user, database, ",".join(ops)]
+        try:
+            entry["result"] = await execute_devil_command(args)
+            entry["status"] = "ok"
+        except DevilSocketError as exc:
+            entry["status"] = "error"
+            entry["detail"] = str(exc)
+        return entry
+
+    return await gather_bounded(
+        run(user, database, ops) for (user, database), ops in plan.items()
+    )
@@ -0,0 +1,91 @@
+"""
+Token-bucket request rate limiting.
+
+Each bucket is a two-slot list (tokens, last refill time) refilled lazily on
+access, so a check is O(1) regardless of how many clients are tracked. Buckets
+live in an LRU-ordered dict capped at ``max_entries``; an evicted bucket
+starts again full, which only matters for clients idle long enough to be the
+least recently seen.
+
+Limits are enforced per worker process: with N uvicorn workers (``devil-api``
+starts one per CPU by default) a client can reach up to N times the
+configured rate across the host, depending on how its connections spread
+over the workers.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: float, *, max_entries: int = 10000) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_entries = max(1, max_entries)
+        self._buckets: OrderedDict[Hashable, list[float]] = OrderedDict()
+        self.evictions = 0
+        self.rejections = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "size": len(self._buckets),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "rejections": self.rejections,
+        }
+
+    def _bucket(self, key: Hashable, now: float) -> list[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [self.burst, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            tokens, last = bucket
+            bucket[0] = min(self.burst, tokens + (now - last) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def take(self, *keys: Hashable, now: float | None = None) -> float:
+        """
+        Take one token from every bucket named by ``keys``.
+
+        Returns 0.0 on success. Otherwise nothing is taken and the number of
+        seconds until every bucket holds a token again is returned.
+        """
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        buckets = [self._bucket(key, now) for key in keys]
+        missing = max((1.0 - bucket[0] for bucket in buckets), default=0.0)
+        if missing > 0:
+            self.rejections += 1
+            return missing / self.rate
+        for bucket in buckets:
+            bucket[0] -= 1.0
+        return 0.0
+
+
+def retry_after(seconds: float) -> str:
+    """Format a wait time for the Retry-After header (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(seconds)))
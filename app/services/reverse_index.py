@@ -0,0 +1,203 @@
+"""
+Reverse lookup index joining devil listings by IP address and domain.
+
+Each source (vhost, www, ssl, dns, mail) is fetched independently and its
+contribution to the joined maps is replaced in place, so a refresh of one
+source never has to rebuild the others. Lookups are plain dict reads and never
+reach the devil socket.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterable
+from typing import Any
+
+from app.services.concurrency import gather_bounded
+from app.services.devil_output import DOMAIN_KEYS
+from app.services.devil_output import iter_list_strings
+from app.services.devil_output import iter_records
+from app.services.devil_output import list_domains
+from app.services.devil_output import normalize_domain
+from app.services.devil_output import normalize_ip
+from app.services.socket_client import execute_devil_command
+
+logger = logging.getLogger(__name__)
+
+INDEX_REFRESH_SECONDS = int(os.getenv("DEVIL_INDEX_REFRESH_SECONDS", "300"))
+INDEX_DNS_CONCURRENCY = int(os.getenv("DEVIL_INDEX_DNS_CONCURRENCY", "4"))
+
+# (record, domain the record belongs to when known from the query)
+SourceRows = list[tuple[dict[str, Any], str | None]]
+Bucket = dict[str, list[dict[str, Any]]]
+
+
+async def _fetch_vhost() -> SourceRows:
+    payload = await execute_devil_command(["--json", "vhost", "list", "all"])
+    return [(record, None) for record in iter_records(payload)]
+
+
+async def _fetch_www() -> SourceRows:
+    payload = await execute_devil_command(["--json", "www", "list"])
+    return [(record, None) for record in iter_records(payload)]
+
+
+async def _fetch_ssl() -> SourceRows:
+    payload = await execute_devil_command(["--json", "ssl", "www", "list"])
+    return [(record, None) for record in iter_records(payload)]
+
+
+async def _fetch_mail() -> SourceRows:
+    payload = await execute_devil_command(["--json", "mail", "list"])
+    rows: SourceRows = [(record, None) for record in iter_records(payload)]
+    rows.extend(({"domain": name}, None) for name in iter_list_strings(payload))
+    return rows
+
+
+async def _fetch_dns() -> SourceRows:
+    payload = await execute_devil_command(["--json", "dns", "list"])
+    zone_list = list_domains(payload)
+    answers = await gather_bounded(
+        (execute_devil_command(["--json", "dns", "list", z]) for z in zone_list),
+        INDEX_DNS_CONCURRENCY,
+        return_exceptions=True,
+    )
+    rows: SourceRows = []
+    for zone, answer in zip(zone_list, answers, strict=True):
+        rows.append(({"domain": zone, "zone": True}, zone))
+        if isinstance(answer, BaseException):
+            logger.warning("Reverse index: dns list %s failed: %s", zone, answer)
+            continue
+        rows.extend((record, zone) for record in iter_records(answer))
+    return rows
+
+
+SOURCES: dict[str, Callable[[], Awaitable[SourceRows]]] = {
+    "vhost": _fetch_vhost,
+    "www": _fetch_www,
+    "ssl": _fetch_ssl,
+    "dns": _fetch_dns,
+    "mail": _fetch_mail,
+}
+
+
+def _owner_name(name: str, zone: str) -> str:
+    """The domain a DNS record owner (``www``, ``@``, ``host.``) stands for."""
+    name = name.strip()
+    if name in ("", "@"):
+        return normalize_domain(zone)
+    if name.endswith("."):
+        return normalize_domain(name)
+    return normalize_domain(f"{name}.{zone}")
+
+
+def _keys_for(record: dict[str, Any], domain: str | None) -> tuple[set[str], set[str]]:
+    ips = {ip for ip in map(normalize_ip, record.values()) if ip}
+    if domain:
+        # DNS rows: record names are relative to the zone, never domains
+        domains = {normalize_domain(domain)}
+        name = record.get("name")
+        if isinstance(name, str):
+            domains.add(_owner_name(name, domain))
+        return ips, domains
+    domains = set()
+    for key in DOMAIN_KEYS:
+        value = record.get(key)
+        if isinstance(value, str) and value and normalize_ip(value) is None:
+            domains.add(normalize_domain(value))
+            break
+    return ips, domains
+
+
+class ReverseIndex:
+    """Joined IP -> resources and domain -> resources maps, grouped by source."""
+
+    def __init__(self) -> None:
+        self._ips: dict[str, Bucket] = {}
+        self._domains: dict[str, Bucket] = {}
+        self._source_keys: dict[str, tuple[set[str], set[str]]] = {}
+        self.refreshed_at: dict[str, float] = {}
+
+    def lookup_ip(self, ip: str) -> Bucket:
+        key = normalize_ip(ip) or ip
+        return self._ips.get(key, {})
+
+    def lookup_domain(self, domain: str) -> Bucket:
+        return self._domains.get(normalize_domain(domain), {})
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ips": len(self._ips),
+            "domains": len(self._domains),
+            "refreshed_at": dict(self.refreshed_at),
+        }
+
+    def replace_source(self, source: str, rows: SourceRows) -> None:
+        """Swap the contribution of ``source`` for the given rows."""
+        ip_map: dict[str, list[dict[str, Any]]] = {}
+        domain_map: dict[str, list[dict[str, Any]]] = {}
+        for record, domain in rows:
+            ips, domains = _keys_for(record, domain)
+            for ip in ips:
+                ip_map.setdefault(ip, []).append(record)
+            for name in domains:
+                domain_map.setdefault(name, []).append(record)
+
+        old_ips, old_domains = self._source_keys.get(source, (set(), set()))
+        self._drop(self._ips, old_ips - ip_map.keys(), source)
+        self._drop(self._domains, old_domains - domain_map.keys(), source)
+        for ip, records in ip_map.items():
+            self._ips.setdefault(ip, {})[source] = records
+        for name, records in domain_map.items():
+            self._domains.setdefault(name, {})[source] = records
+        self._source_keys[source] = (set(ip_map), set(domain_map))
+        self.refreshed_at[source] = time.time()
+
+    @staticmethod
+    def _drop(index: dict[str, Bucket], keys: Iterable[str], source: str) -> None:
+        for key in keys:
+            bucket = index.get(key)
+            if bucket is None:
+                continue
+            bucket.pop(source, None)
+            if not bucket:
+                del index[key]
+
+    async def refresh(self, sources: Iterable[str] | None = None) -> dict[str, str]:
+        """
+        Re-fetch the given sources (all by default) and update the index.
+
+        A failing source keeps its previous entries. Returns a status per source.
+        """
+        names = list(sources) if sources is not None else list(SOURCES)
+        results = await asyncio.gather(
+            *(SOURCES[name]() for name in names), return_exceptions=True
+        )
+        status: dict[str, str] = {}
+        for name, result in zip(names, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.warning("Reverse index: %s refresh failed: %s", name, result)
+                status[name] = f"error: {result}"
+                continue
+            self.replace_source(name, result)
+            status[name] = "ok"
+        return status
+
+    async def run_refresher(self, interval: float = INDEX_REFRESH_SECONDS) -> None:
+        """
+        Refresh every source forever, sleeping ``interval`` between rounds.
+
+        The index lives in the worker's memory, so every worker runs its own
+        refresher and the listings reach devil once per worker and interval.
+        """
+        while True:
+            await self.refresh()
+            await asyncio.sleep(interval)
+
+
+REVERSE_INDEX = ReverseIndex()
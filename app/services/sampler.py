@@ -0,0 +1,230 @@
+"""
+Continuous stack-sampling profiler.
+
+A daemon thread wakes ``hz`` times per second, reads the current frame of
+the thread that started it (the worker's event loop) and counts the folded
+stack, root first, e.g. ``run (runners.py);_run_once (base_events.py);...``.
+Counts are kept in time buckets of ``BUCKET_SECONDS`` covering the last
+``window`` seconds, and each bucket holds at most ``max_stacks`` distinct
+stacks; samples beyond that are counted under ``[truncated]``. Memory is
+therefore bounded however long the worker runs.
+
+Sampling only reads frames, so the cost is the few microseconds of walking
+one stack per sample and does not depend on request rate. Time the loop
+spends waiting shows up in the selector (``select``/``poll``) frames.
+
+``collapsed`` returns the format of Brendan Gregg's ``flamegraph.pl`` and
+speedscope; ``render_flamegraph`` draws a self-contained SVG.
+"""
+
+from __future__ import annotations
+
+import html
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from collections import deque
+from dataclasses import dataclass
+from dataclasses import field
+from types import FrameType
+from typing import Any
+
+# Samples per second; 0 disables the profiler
+PROFILER_HZ = float(os.getenv("DEVIL_PROFILER_HZ", "0"))
+# Seconds of history kept
+PROFILER_WINDOW = int(os.getenv("DEVIL_PROFILER_WINDOW", "600"))
+PROFILER_MAX_STACKS = int(os.getenv("DEVIL_PROFILER_MAX_STACKS", "2000"))
+
+BUCKET_SECONDS = 10
+TRUNCATED = "[truncated]"
+
+
+@dataclass(slots=True)
+class Bucket:
+    start: float
+    stacks: Counter[str] = field(default_factory=Counter)
+
+
+def fold(frame: FrameType | None) -> str:
+    """Render a frame and its callers as a ``;``-separated stack, root first."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    def __init__(
+        self,
+        hz: float = PROFILER_HZ,
+        *,
+        window: int = PROFILER_WINDOW,
+        max_stacks: int = PROFILER_MAX_STACKS,
+    ) -> None:
+        self.hz = hz
+        self.window = window
+        self.max_stacks = max_stacks
+        self.samples = 0
+        self.truncated = 0
+        self._buckets: deque[Bucket] = deque(
+            maxlen=max(1, -(-window // BUCKET_SECONDS))
+        )
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._target: int | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, target: int | None = None) -> None:
+        """Sample thread ``target`` (default: the calling thread) in the background."""
+        if self.hz <= 0 or self.running:
+            return
+        self._target = threading.get_ident() if target is None else target
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="devil-api-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self.samples = self.truncated = 0
+
+    def _run(self) -> None:
+        interval = 1 / self.hz
+        while not self._stop.wait(interval):
+            frame = sys._current_frames().get(self._target)  # type: ignore[arg-type]
+            if frame is None:
+                return
+            self.record(fold(frame), time.time())
+            del frame
+
+    def record(self, stack: str, now: float) -> None:
+        start = now - now % BUCKET_SECONDS
+        with self._lock:
+            if not self._buckets or self._buckets[-1].start != start:
+                self._buckets.append(Bucket(start))
+            stacks = self._buckets[-1].stacks
+            if stack not in stacks and len(stacks) >= self.max_stacks:
+                stack = TRUNCATED
+                self.truncated += 1
+            stacks[stack] += 1
+            self.samples += 1
+
+    def stacks(
+        self, seconds: float | None = None, now: float | None = None
+    ) -> Counter[str]:
+        """Merged stack counts of the buckets overlapping the last ``seconds``."""
+        now = time.time() if now is None else now
+        since = now - (seconds if seconds is not None else self.window)
+        merged: Counter[str] = Counter()
+        with self._lock:
+            for bucket in self._buckets:
+                if bucket.start + BUCKET_SECONDS > since:
+                    merged.update(bucket.stacks)
+        return merged
+
+    def collapsed(self, seconds: float | None = None) -> str:
+        stacks = self.stacks(seconds)
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            buckets = list(self._buckets)
+        return {
+            "running": self.running,
+            "hz": self.hz,
+            "window": self.window,
+            "samples": self.samples,
+            "truncated": self.truncated,
+            "stacks": sum(len(b.stacks) for b in buckets),
+            "oldest": buckets[0].start if buckets else None,
+        }
+
+
+SAMPLER = SamplingProfiler()
+
+
+# flamegraph rendering
+
+FRAME_HEIGHT = 16
+FONT_SIZE = 11
+CHAR_WIDTH = FONT_SIZE * 0.6
+
+
+def _tree(stacks: Counter[str]) -> dict[str, Any]:
+    root: dict[str, Any] = {"count": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["count"] += count
+        node = root
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"count": 0, "children": {}})
+            node["count"] += count
+    return root
+
+
+def render_flamegraph(
+    stacks: Counter[str], *, title: str = "devil API", width: int = 1200
+) -> str:
+    """Draw ``stacks`` as an SVG flame graph, root at the bottom."""
+    root = _tree(stacks)
+    total = root["count"] or 1
+    scale = (width - 20) / total
+
+    def depth(node: dict[str, Any]) -> int:
+        return 1 + max((depth(c) for c in node["children"].values()), default=0)
+
+    levels = depth(root)
+    height = (levels + 2) * FRAME_HEIGHT + 10
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="{FONT_SIZE}">',
+        '<rect width="100%" height="100%" fill="#fff"/>',
+        f'<text x="10" y="{FRAME_HEIGHT}">{html.escape(title)} - '
+        f"{root['count']} samples</text>",
+    ]
+
+    def draw(node: dict[str, Any], name: str, x: float, level: int) -> None:
+        w = node["count"] * scale
+        if w < 0.5:
+            return
+        y = height - (level + 1) * FRAME_HEIGHT - 5
+        label = html.escape(name)
+        share = node["count"] / total * 100
+        hue = 20 + zlib.crc32(name.encode()) % 40
+        parts.append(
+            f"<g><title>{label} ({node['count']} samples, {share:.1f}%)</title>"
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{FRAME_HEIGHT - 1}" '
+            f'fill="hsl({hue},80%,60%)"/>'
+        )
+        chars = int((w - 4) // CHAR_WIDTH)
+        if chars >= 3:
+            text = name if len(name) <= chars else name[: chars - 2] + ".."
+            parts.append(
+                f'<text x="{x + 2:.1f}" y="{y + FRAME_HEIGHT - 4}">'
+                f"{html.escape(text)}</text>"
+            )
+        parts.append("</g>")
+        child_x = x
+        for child_name, child in sorted(node["children"].items()):
+            draw(child, child_name, child_x, level + 1)
+            child_x += child["count"] * scale
+
+    draw(root, "all", 10, 0)
+    parts.append("</svg>")
+    return "\n".join(parts)
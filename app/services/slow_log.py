@@ -0,0 +1,159 @@
+"""
+Log of slow devil commands.
+
+Commands taking longer than ``threshold_ms`` end to end are logged with
+their phase timings (waiting for a daemon slot, connecting, sending, waiting
+for the daemon's reply, parsing it) and kept in a ring buffer of the most
+recent ``size`` entries for GET /admin/socket/slow.
+
+Arguments are redacted before they are stored or logged: devil takes
+passwords as positional arguments, so ``SECRET_ARGS`` lists, per command,
+the positions after the command words that carry one. A command missing
+from the table must not take secrets; add it there when it does.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Commands slower than this are recorded; 0 records every command
+SLOW_COMMAND_MS = float(os.getenv("DEVIL_SLOW_COMMAND_MS", "1000"))
+SLOW_COMMAND_LOG_SIZE = int(os.getenv("DEVIL_SLOW_COMMAND_LOG_SIZE", "200"))
+
+REDACTED = "***"
+
+# command words -> positions of secret arguments following them (-1 = last)
+SECRET_ARGS: dict[tuple[str, ...], tuple[int, ...]] = {
+    ("ftp", "add"): (3,),
+    ("ftp", "passwd"): (1,),
+    ("mail", "account", "add"): (1,),
+    ("mail", "passwd"): (1,),
+    ("mongo", "db", "add"): (1,),
+    ("mongo", "passwd"): (1,),
+    ("mysql", "user", "add"): (1,),
+    ("mysql", "passwd"): (1,),
+    ("pgsql", "db", "add"): (1,),
+    ("pgsql", "passwd"): (1,),
+    ("repo", "account", "add"): (3,),
+    ("repo", "account", "passwd"): (3,),
+    ("ssl", "mail", "get"): (1,),
+    ("ssl", "www", "get"): (-1,),
+    ("www", "stats", "account", "add"): (1,),
+    ("www", "stats", "account", "passwd"): (1,),
+}
+_LONGEST = max(len(words) for words in SECRET_ARGS)
+
+
+def redact(args: list[str]) -> list[str]:
+    """Return ``args`` with the secret arguments of its command masked."""
+    redacted = [str(a) for a in args]
+    offset = 1 if redacted[:1] == ["--json"] else 0
+    for length in range(_LONGEST, 0, -1):
+        words = tuple(redacted[offset : offset + length])
+        positions = SECRET_ARGS.get(words)
+        if positions is None:
+            continue
+        rest = offset + length
+        for position in positions:
+            index = rest + position if position >= 0 else len(redacted) + position
+            if rest <= index < len(redacted):
+                redacted[index] = REDACTED
+        break
+    return redacted
+
+
+@dataclass(slots=True)
+class SlowCommand:
+    started: float
+    args: list[str]
+    client: str
+    total_ms: float
+    phases: dict[str, float]
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "started": self.started,
+            "command": " ".join(self.args),
+            "client": self.client,
+            "total_ms": self.total_ms,
+            "phases_ms": self.phases,
+            "error": self.error,
+        }
+
+
+class SlowCommandLog:
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_COMMAND_MS,
+        size: int = SLOW_COMMAND_LOG_SIZE,
+    ) -> None:
+        self.threshold_ms = threshold_ms
+        self.size = size
+        self._entries: deque[SlowCommand] = deque(maxlen=max(1, size))
+        self.recorded = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.recorded = 0
+
+    def record(
+        self,
+        args: list[str],
+        client: str,
+        seconds: float,
+        phases: dict[str, float],
+        error: str | None = None,
+    ) -> bool:
+        """Keep and log the command if it took ``threshold_ms`` or longer."""
+        total_ms = round(seconds * 1000, 3)
+        if total_ms < self.threshold_ms or self.size <= 0:
+            return False
+        entry = SlowCommand(
+            started=time.time() - seconds,
+            args=redact(args),
+            client=client,
+            total_ms=total_ms,
+            phases={name: round(s * 1000, 3) for name, s in phases.items()},
+            error=error,
+        )
+        self._entries.append(entry)
+        self.recorded += 1
+        logger.warning(
+            "Slow devil command %.0fms client=%s %s phases=%s%s",
+            total_ms,
+            client,
+            " ".join(entry.args),
+            entry.phases,
+            f" error={error}" if error else "",
+        )
+        return True
+
+    def entries(self, limit: int = 50, order: str = "slowest") -> list[dict[str, Any]]:
+        """Recorded commands, slowest or most recent first."""
+        if order == "slowest":
+            items = sorted(self._entries, key=lambda e: e.total_ms, reverse=True)
+        else:
+            items = list(reversed(self._entries))
+        return [entry.to_dict() for entry in items[:limit]]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "size": len(self._entries),
+            "max_entries": self.size,
+            "recorded": self.recorded,
+        }
+
+
+SLOW_COMMANDS = SlowCommandLog()
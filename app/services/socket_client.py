@@ -10,11 +10,28 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import os
+import time
 from collections.abc import Iterable
 from typing import Any
 
+from app.services.api_keys import current_key_name
+from app.services.fair_queue import FairScheduler
+from app.services.fair_queue import parse_weights
+from app.services.slow_log import SLOW_COMMANDS
+
 SOCKET_PATH = "/var/run/devil2.sock"
 SOCKET_TIMEOUT = 30  # seconds
+# Commands sent to the daemon at once; 0 sends every command immediately
+SOCKET_CONCURRENCY = int(os.getenv("DEVIL_SOCKET_CONCURRENCY", "16"))
+# Client name used for commands not issued on behalf of an API key
+INTERNAL_CLIENT = "internal"
+
+SCHEDULER = FairScheduler(
+    SOCKET_CONCURRENCY,
+    parse_weights(os.getenv("DEVIL_FAIR_QUEUE_WEIGHTS")),
+    default_weight=float(os.getenv("DEVIL_FAIR_QUEUE_DEFAULT_WEIGHT", "1")),
+)
 
 
 class DevilSocketError(RuntimeError):
@@ -32,12 +49,19 @@ class DevilSocketProtocolError(DevilSocketError):
 logger = logging.getLogger(__name__)
 
 
-async def execute_devil_command(args: Iterable[str]) -> dict[str, Any]:
+async def execute_devil_command(
+    args: Iterable[str], *, timeout: float = SOCKET_TIMEOUT
+) -> dict[str, Any]:
     """
     Execute devil command via UNIX domain socket and return parsed JSON.
 
+    Commands wait for a daemon slot in ``SCHEDULER``, queued fairly per API
+    key of the current request. Each phase is timed, and commands slower than
+    the threshold are recorded in ``SLOW_COMMANDS`` with redacted arguments.
+
     Args:
         args: Iterable of arguments; '--json' must be first (caller ensures).
+        timeout: Seconds to wait for connecting and for the response.
 
     Returns:
         Parsed JSON object (dict).
@@ -48,28 +72,61 @@ async def execute_devil_command(args: Iterable[str]) -> dict[str, Any]:
         DevilSocketError: on reported error response with code != OK.
     """
     arg_list = list(args)
+    client = current_key_name.get() or INTERNAL_CLIENT
+    phases: dict[str, float] = {}
+    error = None
+    started = time.perf_counter()
+    try:
+        async with SCHEDULER.slot(client):
+            phases["queue"] = time.perf_counter() - started
+            return await _send_command(arg_list, timeout, phases)
+    except BaseException as exc:
+        error = type(exc).__name__
+        raise
+    finally:
+        total = time.perf_counter() - started
+        phases.setdefault("queue", total)
+        SLOW_COMMANDS.record(arg_list, client, total, phases, error)
+
+
+async def _send_command(
+    arg_list: list[str], timeout: float, phases: dict[str, float] | None = None
+) -> dict[str, Any]:
+    """Send one command; durations of its phases are stored in ``phases``."""
+    phases = {} if phases is None else phases
     data = json.dumps(arg_list)
+    mark = time.perf_counter()
+
+    def lap(phase: str) -> None:
+        nonlocal mark
+        now = time.perf_counter()
+        phases[phase], mark = now - mark, now
 
     try:
         reader, writer = await asyncio.wait_for(
-            asyncio.open_unix_connection(SOCKET_PATH), timeout=SOCKET_TIMEOUT
+            asyncio.open_unix_connection(SOCKET_PATH), timeout=timeout
         )
     except (OSError, TimeoutError) as exc:  # pragma: no cover - environment specific
         raise DevilSocketConnectionError(
             f"Cannot connect to devil socket: {exc}"
         ) from exc
+    finally:
+        lap("connect")
 
     try:
         writer.write(data.encode() + b"\n")  # newline termination for nc style
         await writer.drain()
+        lap("send")
 
         # Read until EOF (socket closes) or newline; implement timeout.
         try:
-            raw = await asyncio.wait_for(reader.read(), timeout=SOCKET_TIMEOUT)
+            raw = await asyncio.wait_for(reader.read(), timeout=timeout)
         except TimeoutError as exc:
             raise DevilSocketConnectionError(
                 "Timeout waiting for devil response"
             ) from exc
+        finally:
+            lap("daemon")
 
         if not raw:
             raise DevilSocketProtocolError("Empty response from devil socket")
@@ -86,6 +143,7 @@ async def execute_devil_command(args: Iterable[str]) -> dict[str, Any]:
             raise DevilSocketProtocolError(
                 "Devil response must be a JSON object (dict)"
             )
+        lap("parse")
 
         # devil error convention
         if obj.get("code") == "ERROR":
@@ -0,0 +1,210 @@
+"""
+Startup profile of the API.
+
+Starts a fresh interpreter with ``-X importtime`` that imports and starts the
+app the way a worker does, and reports, ranked by time:
+
+- startup phases: framework imports, importing ``app.main`` (of which
+  mounting routers), lifespan startup, the first and a warm request, and the
+  first OpenAPI generation
+- the slowest module imports (cumulative and self time)
+- import self time per top-level package
+
+Settings such as DEVIL_API_FEATURES or DEVIL_API_PRODUCTION are taken from
+the environment, so configurations can be compared.
+
+Usage:
+    python -m app.startup_profile [--runs N] [--top N] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+PROBE_FLAG = "--probe"
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(text: str) -> dict[str, tuple[float, float]]:
+    """Map module -> (self ms, cumulative ms) from ``-X importtime`` output."""
+    modules: dict[str, tuple[float, float]] = {}
+    for line in text.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            own, cumulative, _, name = match.groups()
+            modules[name] = (int(own) / 1000, int(cumulative) / 1000)
+    return modules
+
+
+def _probe() -> dict[str, float | None]:
+    """Run in the child interpreter; returns phase durations in ms."""
+    phases: dict[str, float | None] = {}
+    started = time.perf_counter()
+
+    def lap(name: str, since: float) -> float:
+        now = time.perf_counter()
+        phases[name] = (now - since) * 1000
+        return now
+
+    import fastapi
+
+    now = lap("import framework", started)
+
+    mounting = 0.0
+    include_router = fastapi.FastAPI.include_router
+
+    def timed_include_router(self: Any, *args: Any, **kwargs: Any) -> None:
+        nonlocal mounting
+        t = time.perf_counter()
+        include_router(self, *args, **kwargs)
+        mounting += time.perf_counter() - t
+
+    fastapi.FastAPI.include_router = timed_include_router  # type: ignore[method-assign]
+    from app import main
+
+    now = lap("import app.main", now)
+    phases["mount routers"] = mounting * 1000
+    fastapi.FastAPI.include_router = include_router  # type: ignore[method-assign]
+
+    import asyncio
+
+    import httpx
+
+    async def serve() -> None:
+        nonlocal now
+        now = time.perf_counter()
+        async with main.app.router.lifespan_context(main.app):
+            now = lap("lifespan startup", now)
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://startup"
+            ) as client:
+                now = time.perf_counter()
+                await client.get("/health")
+                now = lap("first request", now)
+                await client.get("/health")
+                now = lap("warm request", now)
+
+    asyncio.run(serve())
+    if main.openapi_cache is None:
+        phases["first openapi"] = None
+    else:
+        now = time.perf_counter()
+        main.openapi_cache.get()
+        now = lap("first openapi", now)
+    phases["total"] = (time.perf_counter() - started) * 1000
+    return phases
+
+
+def run_probe() -> tuple[dict[str, float | None], dict[str, tuple[float, float]]]:
+    env = {**os.environ}
+    env.setdefault("DEVIL_API_KEY", "startup-profile")
+    out = subprocess.run(  # noqa: S603 - fixed interpreter and module
+        [sys.executable, "-X", "importtime", "-m", __spec__.name, PROBE_FLAG],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    phases = json.loads(out.stdout.strip().splitlines()[-1])
+    return phases, parse_importtime(out.stderr)
+
+
+def _median(values: list[float | None]) -> float | None:
+    present = [v for v in values if v is not None]
+    return statistics.median(present) if present else None
+
+
+def profile(runs: int = 1, top: int = 20) -> dict[str, Any]:
+    """Run the probe ``runs`` times and return medians, ranked."""
+    samples = [run_probe() for _ in range(max(1, runs))]
+    phases = {
+        name: _median([s[0].get(name) for s in samples]) for name in samples[0][0]
+    }
+    total = phases.pop("total")
+    modules: dict[str, tuple[float, float]] = {}
+    for name in samples[0][1]:
+        own = _median([s[1][name][0] for s in samples if name in s[1]]) or 0.0
+        cumulative = _median([s[1][name][1] for s in samples if name in s[1]]) or 0.0
+        modules[name] = (own, cumulative)
+    packages: dict[str, float] = {}
+    for name, (own, _) in modules.items():
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + own
+
+    def ms(value: float | None) -> float | None:
+        return None if value is None else round(value, 3)
+
+    return {
+        "runs": len(samples),
+        "features": os.getenv("DEVIL_API_FEATURES") or "all",
+        "total_ms": ms(total),
+        "phases": {
+            name: ms(value)
+            for name, value in sorted(
+                phases.items(), key=lambda item: -(item[1] or 0.0)
+            )
+        },
+        "imports": [
+            {"module": name, "self_ms": ms(own), "cumulative_ms": ms(cumulative)}
+            for name, (own, cumulative) in sorted(
+                modules.items(), key=lambda item: -item[1][1]
+            )[:top]
+        ],
+        "packages": {
+            name: ms(value)
+            for name, value in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        },
+    }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    lines = [f"startup profile, features={report['features']}, runs={report['runs']}"]
+    lines.append(f"\n{'phase':<40} {'ms':>10}")
+    for name, value in report["phases"].items():
+        shown = "-" if value is None else f"{value:.1f}"
+        lines.append(f"{name:<40} {shown:>10}")
+    lines.append(f"{'total':<40} {report['total_ms']:>10.1f}")
+    lines.append(f"\n{'slowest imports':<40} {'cum ms':>10} {'self ms':>10}")
+    for row in report["imports"]:
+        lines.append(
+            f"{row['module']:<40} {row['cumulative_ms']:>10.1f} {row['self_ms']:>10.1f}"
+        )
+    lines.append(f"\n{'import self time by package':<40} {'ms':>10}")
+    for name, value in report["packages"].items():
+        lines.append(f"{name:<40} {value:>10.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv == [PROBE_FLAG]:
+        sys.stdout.write(json.dumps(_probe()) + "\n")
+        return 0
+    parser = argparse.ArgumentParser(
+        prog="python -m app.startup_profile", description="Profile API startup."
+    )
+    parser.add_argument("--runs", type=int, default=3, help="report medians of N runs")
+    parser.add_argument("--top", type=int, default=20, help="rows per ranking")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = profile(args.runs, args.top)
+    sys.stdout.write(format_report(report) + "\n")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
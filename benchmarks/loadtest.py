@@ -0,0 +1,321 @@
+"""
+End-to-end load test of the API against a fake devil daemon.
+
+A fake daemon listens on a temporary UNIX socket in a separate process and
+answers every command after ``--latency`` ms (plus up to ``--jitter`` ms).
+The real app and the real socket client are driven in-process through
+httpx's ASGI transport at each target rate, with a mix of read and write
+requests across routers. Requests are started on a fixed schedule (open
+loop) and latency is measured from the scheduled start, so a stalled
+server shows up as queueing delay instead of a lower request rate.
+
+Client and app share one event loop and one CPU, so the numbers describe a
+single worker process.
+
+Usage:
+    python benchmarks/loadtest.py [--rates 100,1000,5000] [--duration S]
+        [--read-ratio R] [--latency MS] [--json out.json]
+
+App settings such as DEVIL_SOCKET_CONCURRENCY or DEVIL_LIST_CACHE_TTL are
+taken from the environment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_RATES = "100,1000,5000"
+
+
+@dataclass(frozen=True, slots=True)
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    body: dict[str, Any] | None = None
+
+
+READS = (
+    Endpoint("ftp list", "GET", "/ftp/list"),
+    Endpoint("www list", "GET", "/www/list"),
+    Endpoint("dns list", "GET", "/dns/list?dns_domain=example.com"),
+    Endpoint("mysql list", "GET", "/mysql/list"),
+    Endpoint("mail whitelist list", "GET", "/mail/whitelist/list"),
+    Endpoint("info account", "GET", "/info/account"),
+)
+
+WRITES = (
+    Endpoint(
+        "dns add record",
+        "POST",
+        "/dns/add/record",
+        {
+            "dns_domain": "example.com",
+            "dns_record": "www",
+            "dns_record_type": "A",
+            "dns_target": "192.0.2.10",
+        },
+    ),
+    Endpoint("www add", "POST", "/www/add", {"www_domain": "bench.example.com"}),
+    Endpoint(
+        "mail account add",
+        "POST",
+        "/mail/account/add",
+        {"email_mailbox": "bench@example.com", "password": "Secret123!"},
+    ),
+    Endpoint(
+        "mysql privileges",
+        "PUT",
+        "/mysql/privileges",
+        {
+            "user_name": "m1_bench",
+            "database_name": "m1_bench",
+            "mysql_privileges": ["+SELECT", "+INSERT"],
+        },
+    ),
+    Endpoint(
+        "ftp add",
+        "POST",
+        "/ftp/add",
+        {"username": "bench", "directory": "/home/bench", "quota": "100"},
+    ),
+)
+
+
+# fake daemon
+
+
+def _daemon_response(args: list[str], rows: int) -> dict[str, Any]:
+    if "list" in args or "account" in args:
+        return {"code": "OK", "data": [{"name": f"item{i}"} for i in range(rows)]}
+    return {"code": "OK", "msg": "ok"}
+
+
+def run_daemon(path: str, latency: float, jitter: float, rows: int) -> None:
+    """Serve devil-style JSON commands on ``path`` until terminated."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        line = await reader.readline()
+        await asyncio.sleep((latency + random.uniform(0, jitter)) / 1000)  # noqa: S311
+        reply = _daemon_response(json.loads(line), rows)
+        writer.write(json.dumps(reply).encode())
+        await writer.drain()
+        writer.close()
+
+    async def serve() -> None:
+        server = await asyncio.start_unix_server(handle, path, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def start_daemon(
+    path: str, latency: float, jitter: float, rows: int
+) -> multiprocessing.process.BaseProcess:
+    process = multiprocessing.get_context("spawn").Process(
+        target=run_daemon, args=(path, latency, jitter, rows), daemon=True
+    )
+    process.start()
+    deadline = time.monotonic() + 10
+    while not os.path.exists(path):
+        if time.monotonic() > deadline or not process.is_alive():
+            raise RuntimeError("fake devil daemon did not start")
+        time.sleep(0.01)
+    return process
+
+
+# load generation
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list[float], errors: int) -> dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round((ordered[-1] if ordered else 0.0) * 1000, 3),
+    }
+
+
+async def run_rate(
+    client: Any,
+    rate: float,
+    duration: float,
+    read_ratio: float,
+    rng: random.Random,
+) -> dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    samples: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+
+    async def one(endpoint: Endpoint, scheduled: float) -> None:
+        try:
+            response = await client.request(
+                endpoint.method, endpoint.path, json=endpoint.body
+            )
+            failed = response.status_code >= 400
+        except Exception:
+            failed = True
+        samples.setdefault(endpoint.name, []).append(loop.time() - scheduled)
+        if failed:
+            errors[endpoint.name] = errors.get(endpoint.name, 0) + 1
+
+    total = max(1, int(rate * duration))
+    tasks = []
+    start = loop.time() + 0.05
+    for i in range(total):
+        scheduled = start + i / rate
+        delay = scheduled - loop.time()
+        # sleeping has about a millisecond of resolution; send on time otherwise
+        if delay > 0.001:
+            await asyncio.sleep(delay)
+        pool = READS if rng.random() < read_ratio else WRITES
+        tasks.append(asyncio.create_task(one(rng.choice(pool), scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+
+    every = [s for values in samples.values() for s in values]
+    return {
+        "target_rps": rate,
+        "achieved_rps": round(total / elapsed, 1),
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(every, sum(errors.values())),
+        "endpoints": {
+            name: summarize(samples[name], errors.get(name, 0))
+            for name in sorted(samples)
+        },
+    }
+
+
+async def run(args: argparse.Namespace, socket_path: str) -> list[dict[str, Any]]:
+    import httpx
+
+    from app.main import app
+    from app.services import socket_client
+
+    socket_client.SOCKET_PATH = socket_path
+    rng = random.Random(args.seed)  # noqa: S311 - reproducible workload
+    headers = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=headers
+    ) as client:
+        # warm up lazy imports and caches before measuring
+        await run_rate(client, 50, 0.5, args.read_ratio, rng)
+        for rate in args.rates:
+            results.append(
+                await run_rate(client, rate, args.duration, args.read_ratio, rng)
+            )
+    return results
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def print_report(results: list[dict[str, Any]]) -> None:
+    header = f"{'endpoint':<22} {'count':>7} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    for result in results:
+        print(
+            f"\ntarget {result['target_rps']:g} req/s, "
+            f"achieved {result['achieved_rps']:g} req/s"
+        )
+        print(header)
+        rows = [*result["endpoints"].items(), ("overall", result["overall"])]
+        for name, s in rows:
+            print(
+                f"{name:<22} {s['count']:>7} {s['errors']:>5} {s['p50_ms']:>8.2f} "
+                f"{s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f}"
+            )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rates",
+        default=DEFAULT_RATES,
+        type=lambda v: [float(r) for r in v.split(",") if r.strip()],
+        help="comma-separated target request rates (req/s)",
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per rate")
+    parser.add_argument("--read-ratio", type=float, default=0.8)
+    parser.add_argument("--latency", type=float, default=5.0, help="daemon ms")
+    parser.add_argument("--jitter", type=float, default=2.0, help="daemon ms")
+    parser.add_argument("--rows", type=int, default=50, help="rows per list reply")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DEVIL_API_KEY", "bench")
+    sys.path.insert(0, str(ROOT))
+    # per-request client logging would dominate the measurement
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "devil.sock")
+        daemon = start_daemon(socket_path, args.latency, args.jitter, args.rows)
+        try:
+            results = asyncio.run(run(args, socket_path))
+        finally:
+            daemon.terminate()
+            daemon.join()
+
+    print_report(results)
+    if args.json:
+        report = {
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "settings": {
+                "duration_s": args.duration,
+                "read_ratio": args.read_ratio,
+                "latency_ms": args.latency,
+                "jitter_ms": args.jitter,
+                "rows": args.rows,
+                "socket_concurrency": os.getenv("DEVIL_SOCKET_CONCURRENCY", "16"),
+            },
+            "results": results,
+        }
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,297 @@
+"""
+Microbenchmarks of request body validation and argv building.
+
+For every registered devil command the harness times validating a
+representative request body with the command's schema (``validate``) and
+rendering the devil argv from the validated values (``argv``). Payloads are
+derived from the schema fields; ``PAYLOADS`` holds the ones that need real
+values, such as collations or privilege specs.
+
+Each case is timed in ``--repeat`` runs interleaved with the other cases; the
+median and the relative spread of the runs (scaled median absolute deviation)
+are compared with a stored baseline. Shared hosts drift as a whole between runs, so every ratio is first
+divided by the median ratio of all cases, which is reported as the host drift.
+A case is flagged only when its normalized ratio exceeds both ``--threshold``
+and ``--sigmas`` times the combined noise of the baseline and current runs.
+A change slowing every case alike therefore shows up as drift, not as a
+regression. Baselines are only comparable on the same host and
+Python/pydantic versions; refresh them with ``--save`` after an intended
+change.
+
+Usage:
+    python benchmarks/micro.py [--save] [--check] [--threshold 1.1] [FILTER ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import enum
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+import types
+import typing
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / "baselines" / "micro.json"
+
+# Bodies the field-based defaults would not validate or would not build
+PAYLOADS: dict[str, dict[str, Any]] = {
+    "dns_add_record": {
+        "dns_domain": "example.com",
+        "dns_record": "@",
+        "dns_record_type": "MX",
+        "dns_target": "mx.example.com",
+        "ttl": 3600,
+        "dns_prio": 10,
+    },
+    "mysql_db_add": {"database_name": "m1_bench", "collate": "utf8mb4_unicode_ci"},
+    "mysql_privileges": {
+        "user_name": "m1_bench",
+        "database_name": "m1_bench",
+        "mysql_privileges": ["+SELECT", "+INSERT", "-DELETE"],
+    },
+    "pgsql_db_add": {"database_name": "p1_bench", "collate": "pl_PL.UTF-8"},
+    "port_add": {"type": "tcp", "random": True, "description": "bench"},
+}
+
+
+def sample_value(name: str, annotation: Any) -> Any:
+    """A plausible value for a field or parameter called ``name``."""
+    origin = typing.get_origin(annotation)
+    if origin in (typing.Union, types.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return sample_value(name, args[0])
+    if origin is typing.Annotated:
+        return sample_value(name, typing.get_args(annotation)[0])
+    if origin is list:
+        return [sample_value(name, typing.get_args(annotation)[0])]
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return next(iter(annotation)).value
+    if annotation is bool:
+        return True
+    if annotation is int:
+        return 1
+    if "mail" in name or name in ("email_from", "email_to"):
+        return "bench@example.com"
+    if "domain" in name:
+        return "example.com"
+    if "ip" in name:
+        return "192.0.2.1"
+    return "bench"
+
+
+def build_cases() -> dict[str, Callable[[], Any]]:
+    """Return ``<command>.validate`` and ``<command>.argv`` callables."""
+    from pydantic import BaseModel
+
+    import app.main  # noqa: F401 - registers every command
+    from app.api.registry import COMMANDS
+    from app.api.registry import _route_signature
+
+    cases: dict[str, Callable[[], Any]] = {}
+    for spec in COMMANDS.values():
+        values: dict[str, Any] = {}
+        for name, param in _route_signature(spec.build).parameters.items():
+            annotation = param.annotation
+            if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+                payload = PAYLOADS.get(spec.name) or {
+                    field: sample_value(field, info.annotation)
+                    for field, info in annotation.model_fields.items()
+                }
+                values[name] = annotation.model_validate(payload)
+                cases[f"{spec.name}.validate"] = lambda model=annotation, data=payload: (
+                    model.model_validate(data)
+                )
+            elif isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+                values[name] = next(iter(annotation))
+            else:
+                values[name] = sample_value(name, annotation)
+        spec.argv(values)  # fail early on payloads the builder rejects
+        cases[f"{spec.name}.argv"] = lambda spec=spec, values=values: spec.argv(values)
+    return cases
+
+
+def calibrate(func: Callable[[], Any], run_time: float) -> timeit.Timer:
+    """A timer whose ``number`` makes one run last about ``run_time`` seconds."""
+    timer = timeit.Timer(func)
+    number = 1
+    while (elapsed := timer.timeit(number)) < run_time / 10:
+        number *= 10
+    timer.number = max(1, int(number * run_time / elapsed))  # type: ignore[attr-defined]
+    return timer
+
+
+def measure(
+    cases: dict[str, Callable[[], Any]], repeat: int, run_time: float = 0.01
+) -> dict[str, dict[str, float]]:
+    """
+    Time every case in ``repeat`` rounds, one run per case and round.
+
+    Interleaving spreads each case's runs over the whole session, so their
+    spread reflects how the host varies over time, not just between
+    back-to-back runs.
+    """
+    timers = {name: calibrate(func, run_time) for name, func in cases.items()}
+    runs: dict[str, list[float]] = {name: [] for name in cases}
+    for _ in range(repeat):
+        for name, timer in timers.items():
+            number = timer.number  # type: ignore[attr-defined]
+            runs[name].append(timer.timeit(number) / number * 1e9)
+    return {name: summarize(samples) for name, samples in runs.items()}
+
+
+def summarize(runs: list[float]) -> dict[str, float]:
+    """Median and relative spread (1.4826 * MAD / median, ~stdev/mean)."""
+    median = statistics.median(runs)
+    mad = statistics.median(abs(r - median) for r in runs)
+    return {"ns": round(median, 1), "spread": round(1.4826 * mad / median, 4)}
+
+
+def environment() -> dict[str, str]:
+    import pydantic
+
+    return {
+        "python": platform.python_version(),
+        "pydantic": pydantic.VERSION,
+        "machine": platform.machine(),
+    }
+
+
+def compare(
+    current: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+    sigmas: float,
+) -> tuple[float, list[dict[str, Any]]]:
+    """
+    Return the host drift and one row per case.
+
+    A case regressed when its ratio, divided by the drift, exceeds both
+    ``threshold`` and ``1 + sigmas * noise``, where ``noise`` combines the
+    relative spreads of both sides.
+    """
+    ratios = {
+        name: cur["ns"] / baseline[name]["ns"]
+        for name, cur in current.items()
+        if name in baseline
+    }
+    drift = statistics.median(ratios.values()) if ratios else 1.0
+    rows = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        row: dict[str, Any] = {
+            "case": name,
+            "ns": cur["ns"],
+            "spread": cur["spread"],
+            "baseline_ns": base["ns"] if base else None,
+            "ratio": None,
+            "bound": None,
+            "regression": False,
+        }
+        if base:
+            ratio = ratios[name] / drift
+            noise = (base["spread"] ** 2 + cur["spread"] ** 2) ** 0.5
+            bound = max(threshold, 1 + sigmas * noise)
+            row.update(
+                ratio=round(ratio, 3), bound=round(bound, 3), regression=ratio > bound
+            )
+        rows.append(row)
+    return drift, rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("filters", nargs="*", help="only run cases containing these")
+    parser.add_argument("--repeat", type=int, default=9, help="runs per case")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write a new baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.1,
+        help="smallest drift-normalized slowdown factor flagged",
+    )
+    parser.add_argument(
+        "--sigmas",
+        type=float,
+        default=4.0,
+        help="flag only slowdowns beyond this many times the measured noise",
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="exit with 1 if any case regressed"
+    )
+    parser.add_argument("--json", type=Path, help="write the comparison to this file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DEVIL_API_KEY", "bench")
+    sys.path.insert(0, str(ROOT))
+
+    cases = build_cases()
+    if args.filters:
+        cases = {
+            name: func
+            for name, func in cases.items()
+            if any(f in name for f in args.filters)
+        }
+    current = measure(cases, args.repeat)
+
+    if args.save:
+        saved = {}
+        if args.baseline.exists() and args.filters:
+            saved = json.loads(args.baseline.read_text())["results"]
+        saved.update(current)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps({**environment(), "results": saved}, indent=2) + "\n"
+        )
+
+    stored: dict[str, Any] = {}
+    if args.baseline.exists():
+        stored = json.loads(args.baseline.read_text())
+    drift, rows = compare(
+        current, stored.get("results", {}), args.threshold, args.sigmas
+    )
+
+    mismatched = {
+        k: stored[k] for k, v in environment().items() if stored.get(k, v) != v
+    }
+    if mismatched:
+        print(f"warning: baseline recorded with {mismatched}, numbers may differ")
+    print(
+        f"{'case':<36} {'ns/op':>10} {'spread':>7} {'baseline':>10} "
+        f"{'ratio':>7} {'bound':>7}"
+    )
+    for row in rows:
+        base = f"{row['baseline_ns']:.0f}" if row["baseline_ns"] else "-"
+        ratio = f"{row['ratio']:.2f}" if row["ratio"] is not None else "-"
+        bound = f"{row['bound']:.2f}" if row["bound"] is not None else "-"
+        flag = "  SLOWER" if row["regression"] else ""
+        print(
+            f"{row['case']:<36} {row['ns']:>10.0f} {row['spread']:>7.1%} {base:>10} "
+            f"{ratio:>7} {bound:>7}{flag}"
+        )
+    regressions = [row["case"] for row in rows if row["regression"]]
+    print(
+        f"\n{len(rows)} cases, {len(regressions)} slower than their noise bound; "
+        f"host drift {drift:.2f}x (ratios are divided by it)"
+    )
+
+    if args.json:
+        args.json.write_text(
+            json.dumps(
+                {**environment(), "drift": round(drift, 3), "results": rows}, indent=2
+            )
+            + "\n"
+        )
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+"""
+Startup benchmark for DEVIL_API_FEATURES configurations.
+
+Every run imports ``app.main`` in a fresh interpreter and records the import
+time and peak RSS of that process. Reports the median per configuration.
+
+Usage:
+    python benchmarks/startup.py [--runs N] [--json out.json] [FEATURES ...]
+
+FEATURES are DEVIL_API_FEATURES values; "all" means every router. Defaults to
+a set of representative configurations.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_CONFIGS = ["all", "www,dns,ssl", "www", "info"]
+
+PROBE = """
+import json, resource, sys, time
+t = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - t
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss //= 1024
+print(json.dumps({"import_ms": elapsed * 1000, "rss_kib": rss,
+                  "routers": len(app.main.ENABLED_FEATURES)}))
+"""
+
+
+def measure(features: str, runs: int) -> dict:
+    env = {**os.environ, "DEVIL_API_KEY": os.environ.get("DEVIL_API_KEY", "bench")}
+    env["DEVIL_API_FEATURES"] = "" if features == "all" else features
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(  # noqa: S603 - fixed interpreter and probe
+            [sys.executable, "-c", PROBE],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "features": features,
+        "runs": runs,
+        "routers": samples[0]["routers"],
+        "import_ms_median": statistics.median(s["import_ms"] for s in samples),
+        "import_ms_min": min(s["import_ms"] for s in samples),
+        "rss_kib_median": statistics.median(s["rss_kib"] for s in samples),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("configs", nargs="*", default=DEFAULT_CONFIGS)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args(argv)
+
+    results = [measure(config, args.runs) for config in args.configs]
+    print(
+        f"{'features':<20} {'routers':>7} {'import ms':>10} {'min ms':>8} {'RSS MiB':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['features']:<20} {r['routers']:>7} {r['import_ms_median']:>10.1f} "
+            f"{r['import_ms_min']:>8.1f} {r['rss_kib_median'] / 1024:>8.1f}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -17,11 +17,16 @@ os.environ.setdefault("DEVIL_API_KEY", "devil")
 
 # Lazy import after env var is ensured while keeping all import statements grouped at the top
 AUTH_FAILURE_TRACKER = importlib.import_module("app.auth").AUTH_FAILURE_TRACKER
+RATE_LIMITERS = importlib.import_module("app.auth").RATE_LIMITERS
 
 
 @pytest.fixture(autouse=True)
 def reset_auth_tracker():
-    """Reset authentication failure tracker between tests to avoid bleed-over."""
+    """Reset authentication failure tracker and rate limiters between tests to avoid bleed-over."""
     AUTH_FAILURE_TRACKER.clear()
+    for limiter in RATE_LIMITERS.values():
+        limiter.clear()
     yield
     AUTH_FAILURE_TRACKER.clear()
+    for limiter in RATE_LIMITERS.values():
+        limiter.clear()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app import auth
+from app.main import app
+from app.services.api_keys import APIKey
+from app.services.api_keys import APIKeyStore
+from app.services.api_keys import hash_key
+from app.services.api_keys import load_key_file
+
+client = TestClient(app)
+
+
+def write_keys(path, entries):
+    path.write_text(json.dumps(entries))
+    # force a different signature even within the same mtime tick
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000_000))
+
+
+def entry(name, secret, *scopes):
+    return {"name": name, "sha256": hash_key(secret), "scopes": list(scopes)}
+
+
+def test_scopes():
+    key = APIKey("k", frozenset({"dns", "mail:read"}))
+    assert key.allows("dns", read_only=False)
+    assert key.allows("mail", read_only=True)
+    assert not key.allows("mail", read_only=False)
+    assert not key.allows("ftp", read_only=True)
+    assert APIKey("r", frozenset({"read"})).allows("ftp", read_only=True)
+    assert APIKey("all", frozenset({"*"})).allows("admin", read_only=False)
+
+
+def test_load_key_file_rejects_duplicates(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps([entry("a", "s1", "*"), entry("a", "s2", "*")]))
+    with pytest.raises(ValueError):
+        load_key_file(str(path))
+
+
+def test_load_key_file_rejects_unknown_scopes(tmp_path):
+    path = tmp_path / "keys.json"
+    for scope in ("dsn", "admin:read", "dns:write"):
+        path.write_text(json.dumps([entry("a", "s1", "dns", scope)]))
+        with pytest.raises(ValueError, match=f"unknown scope .*: {scope}"):
+            load_key_file(str(path))
+    path.write_text(json.dumps([entry("a", "s1", "*", "read", "dns", "mail:read")]))
+    assert load_key_file(str(path))[hash_key("s1")].name == "a"
+
+
+@pytest.mark.asyncio
+async def test_reloader_picks_up_changes_off_the_loop(tmp_path):
+    path = tmp_path / "keys.json"
+    write_keys(path, [entry("ci", "secret-1", "dns")])
+    store = APIKeyStore(str(path), reload_seconds=0.01)
+    write_keys(path, [entry("ci", "secret-2", "dns")])
+    # lookups never touch the file
+    assert store.lookup("secret-1") is not None
+    reloader = asyncio.create_task(store.run_reloader())
+    try:
+        for _ in range(100):
+            if store.lookup("secret-2"):
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        reloader.cancel()
+    assert store.lookup("secret-2").name == "ci"
+    assert store.lookup("secret-1") is None
+
+
+def test_store_hot_reload(tmp_path):
+    path = tmp_path / "keys.json"
+    write_keys(path, [entry("ci", "secret-1", "dns")])
+    store = APIKeyStore(str(path), reload_seconds=5)
+    assert store.lookup("secret-1").name == "ci"
+    assert store.lookup("secret-2") is None
+
+    write_keys(path, [entry("ci", "secret-2", "dns")])
+    assert store.lookup("secret-1") is not None  # not rechecked yet
+    store.maybe_reload(now=time.monotonic() + 10)
+    assert store.lookup("secret-1") is None
+    assert store.lookup("secret-2").name == "ci"
+
+
+def test_store_keeps_keys_when_file_breaks(tmp_path):
+    path = tmp_path / "keys.json"
+    write_keys(path, [entry("ci", "secret-1", "dns")])
+    store = APIKeyStore(
+        str(path), static={hash_key("env"): APIKey("default", frozenset({"*"}))}
+    )
+    path.write_text("not json")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000_000))
+    store.maybe_reload(now=1e9)
+    assert store.lookup("secret-1").name == "ci"
+    assert store.lookup("env").name == "default"
+
+
+def test_scoped_key_on_routes(tmp_path, monkeypatch):
+    path = tmp_path / "keys.json"
+    write_keys(path, [entry("readonly", "ro-secret", "mail:read", "lookup")])
+    monkeypatch.setattr(auth, "API_KEYS", APIKeyStore(str(path)))
+    headers = {"X-API-Key": "ro-secret"}
+    assert client.get("/lookup/ip/192.0.2.1", headers=headers).status_code == 200
+    r = client.post("/lookup/refresh", params={"source": "bogus"}, headers=headers)
+    assert r.status_code == 400
+    r = client.get("/ftp/list", headers=headers)
+    assert r.status_code == 403
+    r = client.get("/admin/rate-limit", headers={"X-API-Key": "devil"})
+    assert r.status_code == 401
+
+
+def test_read_scope_only_reaches_registered_reads(tmp_path, monkeypatch):
+    path = tmp_path / "keys.json"
+    write_keys(
+        path,
+        [
+            entry("reader", "read-secret", "read", "mail:read"),
+            entry("ops", "admin-secret", "admin"),
+        ],
+    )
+    monkeypatch.setattr(auth, "API_KEYS", APIKeyStore(str(path)))
+    reader = {"X-API-Key": "read-secret"}
+    with patch(
+        "app.api.registry.execute_devil_command",
+        new=AsyncMock(return_value={"code": "OK"}),
+    ):
+        assert client.get("/ftp/list", headers=reader).status_code == 200
+        # adds a DNS record unless print_record=true
+        assert client.get("/mail/dkim/dns/a.pl", headers=reader).status_code == 403
+        # returns the private key
+        body = {"ssl_ip": "192.0.2.1", "password": "pw"}
+        r = client.post("/ssl/mail/get", json=body, headers=reader)
+        assert r.status_code == 403
+    assert client.get("/admin/rate-limit", headers=reader).status_code == 403
+    assert client.get("/admin/memory", headers=reader).status_code == 403
+    ops = {"X-API-Key": "admin-secret"}
+    assert client.get("/admin/rate-limit", headers=ops).status_code == 200
@@ -22,7 +22,7 @@ def test_protected_endpoint_requires_api_key():
 def test_protected_endpoint_with_api_key():
     # Patch execute_devil_command to avoid real socket interaction
     with patch(
-        "app.api.endpoints.info.execute_devil_command",
+        "app.api.registry.execute_devil_command",
         new=AsyncMock(return_value={"code": "OK", "limits": []}),
     ):
         r = client.get(
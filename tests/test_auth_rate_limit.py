@@ -16,7 +16,7 @@ client = TestClient(app)
 def test_bearer_token_alias():
     # Patch to avoid real socket call
     with patch(
-        "app.api.endpoints.info.execute_devil_command",
+        "app.api.registry.execute_devil_command",
         new=AsyncMock(return_value={"code": "OK"}),
     ):
         r = client.get(
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import os
+import sqlite3
+import stat
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.services.auth_tracker import AuthFailureTracker
+from app.services.auth_tracker import SQLiteFailureTracker
+from app.services.auth_tracker import make_tracker
+
+client = TestClient(app)
+
+
+def test_blocks_after_threshold_and_unblocks():
+    tracker = AuthFailureTracker(3, 60)
+    assert tracker.register_failure("1.1.1.1", now=1000) == (False, 0.0)
+    tracker.register_failure("1.1.1.1", now=1001)
+    assert tracker.register_failure("1.1.1.1", now=1002) == (True, 1062)
+    assert tracker.is_blocked("1.1.1.1", now=1061)
+    assert not tracker.is_blocked("1.1.1.1", now=1062)
+
+
+def test_entries_expire_after_window():
+    tracker = AuthFailureTracker(5, 60, window=30)
+    for i in range(100):
+        tracker.register_failure(f"10.0.0.{i}", now=1000)
+    assert len(tracker) == 100
+    tracker.is_blocked("10.0.0.1", now=1031)
+    assert len(tracker) == 0
+    assert tracker.stats()["expirations"] == 100
+
+
+def test_blocked_entry_kept_until_block_ends():
+    tracker = AuthFailureTracker(1, 600, window=10)
+    tracker.register_failure("2.2.2.2", now=1000)
+    assert tracker.is_blocked("2.2.2.2", now=1300)
+    assert "2.2.2.2" in tracker
+    tracker.is_blocked("3.3.3.3", now=1601)
+    assert "2.2.2.2" not in tracker
+
+
+def test_size_bounded_with_lru_eviction():
+    tracker = AuthFailureTracker(5, 60, max_entries=50)
+    for i in range(1000):
+        tracker.register_failure(f"192.0.2.{i}", now=1000 + i * 0.001)
+    assert len(tracker) == 50
+    assert tracker.stats()["evictions"] == 950
+    assert "192.0.2.999" in tracker
+    assert "192.0.2.0" not in tracker
+
+
+def test_success_forgets_ip():
+    tracker = AuthFailureTracker(5, 60)
+    tracker.register_failure("4.4.4.4", now=1000)
+    tracker.reset("4.4.4.4")
+    assert tracker.get("4.4.4.4") is None
+
+
+def test_admin_tracker_stats():
+    r = client.get("/admin/auth/tracker", headers={"X-API-Key": "wrong"})
+    assert r.status_code == 401
+    r = client.get(
+        "/admin/auth/tracker", headers={"X-API-Key": os.environ["DEVIL_API_KEY"]}
+    )
+    assert r.status_code == 200
+    assert r.json()["size"] == 0
+    assert {"max_entries", "evictions", "expirations"} <= r.json().keys()
+
+
+def test_sqlite_state_shared_between_workers(tmp_path):
+    path = str(tmp_path / "auth.sqlite3")
+    worker_a = SQLiteFailureTracker(path, 3, 60)
+    worker_b = SQLiteFailureTracker(path, 3, 60)
+    worker_a.register_failure("5.5.5.5", now=1000)
+    worker_b.register_failure("5.5.5.5", now=1001)
+    assert worker_a.register_failure("5.5.5.5", now=1002) == (True, 1062)
+    assert worker_b.is_blocked("5.5.5.5", now=1030)
+    assert not worker_b.is_blocked("5.5.5.5", now=1062)
+    assert worker_b.register_failure("5.5.5.5", now=1063) == (False, 0.0)
+    worker_a.reset("5.5.5.5")
+    assert "5.5.5.5" not in worker_b
+
+
+def test_sqlite_purges_expired_and_bounds_size(tmp_path):
+    tracker = SQLiteFailureTracker(
+        str(tmp_path / "auth.sqlite3"), 5, 60, window=30, max_entries=10
+    )
+    for i in range(20):
+        tracker.register_failure(f"10.1.0.{i}", now=1000 + i * 0.01)
+    tracker.register_failure("10.1.1.1", now=1001)
+    assert tracker.stats()["evictions"] == 11
+    tracker.register_failure("10.1.1.2", now=1100)
+    assert tracker.stats()["expirations"] == 10
+
+
+def test_make_tracker_rejects_unknown_backend():
+    assert isinstance(make_tracker("memory", 5, 60), AuthFailureTracker)
+    with pytest.raises(RuntimeError):
+        make_tracker("redis", 5, 60)
+
+
+def test_sqlite_state_file_is_private(tmp_path):
+    path = tmp_path / "state" / "auth.sqlite3"
+    SQLiteFailureTracker(str(path), 3, 60).register_failure("192.0.2.1")
+    assert stat.S_IMODE(path.parent.stat().st_mode) == 0o700
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o777)
+    shared.chmod(0o777)
+    with pytest.raises(RuntimeError, match="not writable by others"):
+        SQLiteFailureTracker(str(shared / "auth.sqlite3"), 3, 60)
+
+    (tmp_path / "link.sqlite3").symlink_to(tmp_path / "elsewhere")
+    with pytest.raises(RuntimeError, match="Cannot open"):
+        SQLiteFailureTracker(str(tmp_path / "link.sqlite3"), 3, 60)
+
+
+def test_sqlite_counts_locally_while_locked(tmp_path):
+    path = str(tmp_path / "auth.sqlite3")
+    tracker = SQLiteFailureTracker(path, 2, 60, busy_timeout=0.01)
+    tracker.register_failure("192.0.2.1")
+    tracker.register_failure("192.0.2.1")
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.monotonic()
+        assert tracker.register_failure("192.0.2.2") == (False, 0.0)
+        blocked, _ = tracker.register_failure("192.0.2.2")
+        assert blocked
+        assert time.monotonic() - started < 1
+        assert tracker.is_blocked("192.0.2.2")
+        # reads are not blocked by the writer in WAL mode
+        assert tracker.is_blocked("192.0.2.1")
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert tracker.is_blocked("192.0.2.2")
+    stats = tracker.stats()
+    assert (stats["busy"], stats["local_size"]) == (2, 1)
+
+
+def test_sqlite_tracker_called_off_the_event_loop(tmp_path, monkeypatch):
+    tracker = SQLiteFailureTracker(str(tmp_path / "auth.sqlite3"), 3, 60)
+    on_loop = []
+
+    def register_failure(ip, now=None):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(ip)
+        except RuntimeError:
+            pass
+        return SQLiteFailureTracker.register_failure(tracker, ip, now)
+
+    monkeypatch.setattr(tracker, "register_failure", register_failure)
+    monkeypatch.setattr(
+        importlib.import_module("app.auth"), "AUTH_FAILURE_TRACKER", tracker
+    )
+    r = client.get("/lookup/ip/192.0.2.1", headers={"X-API-Key": "wrong"})
+    assert r.status_code == 401
+    assert len(tracker) == 1
+    assert on_loop == []
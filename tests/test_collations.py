@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.schemas.collations import collation_set
+from app.schemas.mysql import MySQLDbAdd
+from app.schemas.pgsql import PgSQLDbAdd
+
+
+def test_collations_loaded_from_data_files():
+    assert "utf8mb4_general_ci" in collation_set("mysql")
+    assert "pl_PL.UTF-8" in collation_set("pgsql")
+
+
+def test_collation_validation():
+    assert MySQLDbAdd(database_name="d", collate="utf8mb4_bin").collate == "utf8mb4_bin"
+    assert MySQLDbAdd(database_name="d").collate is None
+    assert PgSQLDbAdd(database_name="d", collate="C.UTF-8").collate == "C.UTF-8"
+    with pytest.raises(ValidationError, match="Unknown collation"):
+        MySQLDbAdd(database_name="d", collate="klingon_ci")
+    with pytest.raises(ValidationError, match="Unknown collation"):
+        PgSQLDbAdd(database_name="d", collate="utf8mb4_bin")
+
+
+def test_collation_enum_in_openapi():
+    schemas = app.openapi()["components"]["schemas"]
+    mysql_collate = schemas["MySQLDbAdd"]["properties"]["collate"]["anyOf"][0]
+    assert "utf8mb4_general_ci" in mysql_collate["enum"]
+    pgsql_collate = schemas["PgSQLDbAdd"]["properties"]["collate"]["anyOf"][0]
+    assert "C.UTF-8" in pgsql_collate["enum"]
+
+
+def test_collate_passed_to_devil():
+    mock = AsyncMock(return_value={"code": "OK"})
+    with patch("app.api.registry.execute_devil_command", new=mock):
+        r = TestClient(app).post(
+            "/mysql/db/add",
+            headers={"X-API-Key": os.environ["DEVIL_API_KEY"]},
+            json={"database_name": "d", "collate": "utf8mb4_polish_ci"},
+        )
+    assert r.status_code == 200
+    assert mock.await_args.args[0] == [
+        "--json",
+        "mysql",
+        "db",
+        "add",
+        "d",
+        "utf8mb4_polish_ci",
+    ]
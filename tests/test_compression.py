@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import gzip
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.compression import COMPRESSION_CACHE
+from app.compression import CompressedCache
+from app.compression import enabled_encoders
+from app.compression import negotiate
+from app.main import app
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+BIG = {"code": "OK", "accounts": [{"name": f"user{i}_ftp"} for i in range(200)]}
+
+
+def test_negotiate():
+    assert negotiate("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("br;q=0, gzip;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate("identity", ["gzip"]) is None
+    assert negotiate("*", ["gzip"]) == "gzip"
+    assert negotiate("", ["gzip"]) is None
+
+
+def test_enabled_encoders_skips_unknown():
+    assert list(enabled_encoders("gzip, lz4")) == ["gzip"]
+    assert enabled_encoders("") == {}
+
+
+def test_large_json_gzipped_and_cached():
+    COMPRESSION_CACHE.clear()
+    mock = AsyncMock(return_value=BIG)
+    with patch("app.api.registry.execute_devil_command", new=mock):
+        headers = {**HEADERS, "Accept-Encoding": "gzip"}
+        first = client.get("/ftp/list", headers=headers)
+        second = client.get("/ftp/list", headers=headers)
+    assert first.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in first.headers["vary"]
+    assert first.json() == BIG
+    assert second.json() == BIG
+    stats = COMPRESSION_CACHE.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_small_or_unaccepted_bodies_untouched():
+    mock = AsyncMock(return_value={"code": "OK"})
+    with patch("app.api.registry.execute_devil_command", new=mock):
+        r = client.get("/ftp/list", headers={**HEADERS, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    mock = AsyncMock(return_value=BIG)
+    with patch("app.api.registry.execute_devil_command", new=mock):
+        r = client.get("/ftp/list", headers={**HEADERS, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.json() == BIG
+
+
+def test_cache_bounded():
+    cache = CompressedCache(max_entries=2)
+    for i in range(5):
+        body = f"body {i}".encode() * 100
+        assert gzip.decompress(cache.compress("gzip", body, gzip.compress)) == body
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.services.dns_zone import make_record
+from app.services.dns_zone import parse_zone_file
+from app.services.dns_zone import plan_zone
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+ZONE = """\
+$ORIGIN example.com.
+$TTL 1h
+@   IN SOA ns1.example.com. admin.example.com. (
+        2024010101 ; serial
+        3600 900 604800 300 )
+@       IN  A      10.0.0.5
+www     300 IN CNAME @
+        IN  TXT    "v=spf1 " "-all" ; split string
+@       IN  MX     10 mail
+@       IN  CAA    0 issue "letsencrypt.org"
+_sip._tcp IN SRV 10 5 5060 sip.example.com.
+"""
+
+CURRENT = {
+    "code": "OK",
+    "records": [
+        {"id": 1, "name": "example.com", "type": "A", "content": "10.0.0.5"},
+        {"id": 2, "name": "old", "type": "A", "content": "10.0.0.9"},
+        {"id": 3, "name": "@", "type": "NS", "content": "ns1.devil.example."},
+    ],
+}
+
+
+def test_parse_zone_file():
+    records = parse_zone_file(ZONE, "example.com")
+    by_type = {r.type: r for r in records}
+    assert "SOA" not in by_type
+    assert by_type["A"].name == "@" and by_type["A"].ttl == 3600
+    assert by_type["CNAME"].name == "www"
+    assert by_type["CNAME"].target == "example.com"
+    assert by_type["CNAME"].ttl == 300
+    assert by_type["TXT"].name == "www" and by_type["TXT"].target == "v=spf1 -all"
+    assert by_type["MX"].prio == 10 and by_type["MX"].target == "mail.example.com"
+    assert by_type["CAA"].caa_tag == "issue"
+    assert by_type["CAA"].target == "letsencrypt.org"
+    srv = by_type["SRV"]
+    assert (srv.name, srv.prio, srv.weight) == ("_sip._tcp", 10, 5)
+    assert srv.target == "5060 sip.example.com"
+
+
+def test_parse_zone_file_reports_line():
+    with pytest.raises(ValueError, match="line 1: invalid MX record"):
+        parse_zone_file("@ IN MX mail\n", "example.com")
+
+
+def test_parse_zone_file_rejects_bad_directives_and_owners():
+    cases = {
+        "$ORIGIN\n": "line 1",
+        "@ IN A 10.0.0.1\n$TTL\n": "line 2",
+        "$TTL abc\n": "line 1",
+        "other.org. IN A 10.0.0.1\n": "outside zone",
+    }
+    for text, message in cases.items():
+        with pytest.raises(ValueError, match=message):
+            parse_zone_file(text, "example.com")
+
+
+def test_plan_replaces_ttl_change_without_prune():
+    current = [
+        make_record("example.com", "@", "A", "10.0.0.5", ttl=300, record_id=1),
+        make_record("example.com", "old", "A", "10.0.0.9", record_id=2),
+    ]
+    desired = [make_record("example.com", "@", "A", "10.0.0.5", ttl=3600)]
+    plan = plan_zone(current, desired, prune=False)
+    assert [r.ttl for r in plan.add] == [3600]
+    assert [r.record_id for r in plan.delete] == [1]
+    assert plan.unchanged == 0
+
+
+def test_plan_keeps_existing_and_protects_apex_ns():
+    current = [
+        make_record("example.com", "example.com", "A", "10.0.0.5", record_id=1),
+        make_record("example.com", "old", "A", "10.0.0.9", record_id=2),
+        make_record("example.com", "@", "NS", "ns1.devil.example.", record_id=3),
+    ]
+    desired = [make_record("example.com", "@", "A", "10.0.0.5", ttl=3600)]
+    plan = plan_zone(current, desired, prune=True)
+    assert plan.unchanged == 1
+    assert plan.add == []
+    assert [r.record_id for r in plan.delete] == [2]
+
+
+def test_import_sends_only_missing_records():
+    calls = []
+
+    async def fake_devil(args):
+        calls.append(args)
+        if args[1:3] == ["dns", "list"]:
+            return CURRENT
+        return {"code": "OK"}
+
+    with patch(
+        "app.services.dns_zone.execute_devil_command",
+        new=AsyncMock(side_effect=fake_devil),
+    ):
+        r = client.post(
+            "/dns/import",
+            headers=HEADERS,
+            json={"dns_domain": "example.com", "zone_file": ZONE},
+        )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["failed"] == 0
+    assert body["plan"]["unchanged"] == 1
+    assert body["plan"]["delete"] == []
+    adds = [c for c in calls if c[2] == "add"]
+    assert len(adds) == 5
+    assert adds[2][:7] == ["--json", "dns", "add", "example.com", "@", "MX", "10"]
+    assert any(c[5] == "CAA" and c[6:8] == ["issue", "letsencrypt.org"] for c in adds)
+
+
+def test_import_rejects_malformed_zone():
+    r = client.post(
+        "/dns/import",
+        headers=HEADERS,
+        json={"dns_domain": "example.com", "zone_file": '@ IN TXT "open\n'},
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("zone file: line 1")
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.services.socket_client import DevilSocketError
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+CURRENT = {
+    "code": "OK",
+    "records": [
+        {"id": 1, "name": "@", "type": "A", "content": "10.0.0.5", "ttl": 3600},
+        {"id": 2, "name": "old", "type": "A", "content": "10.0.0.9"},
+        {
+            "id": 3,
+            "name": "@",
+            "type": "MX",
+            "content": "mail.example.com.",
+            "prio": 10,
+        },
+    ],
+}
+
+DESIRED = {
+    "records": [
+        {"dns_record": "@", "dns_record_type": "A", "dns_target": "10.0.0.5"},
+        {
+            "dns_record": "example.com",
+            "dns_record_type": "MX",
+            "dns_target": "mail.example.com",
+            "dns_prio": 10,
+        },
+        {"dns_record": "new", "dns_record_type": "AAAA", "dns_target": "::1"},
+    ]
+}
+
+
+def _fake_devil(calls):
+    async def fake(args):
+        calls.append(args)
+        if args[1:3] == ["dns", "list"]:
+            return CURRENT
+        return {"code": "OK"}
+
+    return fake
+
+
+def test_reconcile_dry_run_returns_plan_only():
+    calls = []
+    with patch(
+        "app.services.dns_zone.execute_devil_command",
+        new=AsyncMock(side_effect=_fake_devil(calls)),
+    ):
+        r = client.put(
+            "/dns/zone/example.com?dry_run=true", headers=HEADERS, json=DESIRED
+        )
+    assert r.status_code == 200, r.text
+    plan = r.json()["plan"]
+    assert plan["unchanged"] == 2
+    assert [(a["name"], a["type"]) for a in plan["add"]] == [("new", "AAAA")]
+    assert [d["id"] for d in plan["delete"]] == [2]
+    assert calls == [["--json", "dns", "list", "example.com"]]
+
+
+def test_reconcile_applies_adds_before_deletes():
+    calls = []
+    with patch(
+        "app.services.dns_zone.execute_devil_command",
+        new=AsyncMock(side_effect=_fake_devil(calls)),
+    ):
+        r = client.put("/dns/zone/example.com", headers=HEADERS, json=DESIRED)
+    assert r.status_code == 200, r.text
+    assert r.json()["failed"] == 0
+    assert calls[1:] == [
+        ["--json", "dns", "add", "example.com", "new", "AAAA", "::1"],
+        ["--json", "dns", "del", "example.com", "2"],
+    ]
+
+
+def test_reconcile_keeps_old_record_when_its_replacement_fails():
+    calls = []
+
+    async def fake(args):
+        calls.append(args)
+        if args[1:3] == ["dns", "list"]:
+            return CURRENT
+        if args[1:3] == ["dns", "add"] and args[4] == "@":
+            raise DevilSocketError("rejected")
+        return {"code": "OK"}
+
+    desired = {
+        "records": [
+            {"dns_record": "@", "dns_record_type": "A", "dns_target": "10.0.0.6"},
+            *DESIRED["records"][1:],
+        ]
+    }
+    with patch(
+        "app.services.dns_zone.execute_devil_command",
+        new=AsyncMock(side_effect=fake),
+    ):
+        r = client.put("/dns/zone/example.com", headers=HEADERS, json=desired)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["failed"], body["skipped"]) == (1, 1)
+    (skipped,) = [e for e in body["results"] if e["status"] == "skipped"]
+    assert skipped["record"]["id"] == 1
+    assert ["--json", "dns", "del", "example.com", "1"] not in calls
+    assert ["--json", "dns", "del", "example.com", "2"] in calls
+
+
+def test_reconcile_rejects_invalid_entry():
+    r = client.put(
+        "/dns/zone/example.com",
+        headers=HEADERS,
+        json={
+            "records": [
+                {"dns_record": "@", "dns_record_type": "MX", "dns_target": "mx"}
+            ]
+        },
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "records[0]: dns_prio is required for MX records"
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.services.fair_queue import FairScheduler
+from app.services.fair_queue import parse_weights
+
+client = TestClient(app)
+
+
+async def run_jobs(scheduler, jobs):
+    order: list[str] = []
+    gate = asyncio.Event()
+
+    async def job(name):
+        async with scheduler.slot(name):
+            await gate.wait()
+            order.append(name)
+            await asyncio.sleep(0)
+
+    tasks = []
+    for name in jobs:
+        tasks.append(asyncio.create_task(job(name)))
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(*tasks)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_backlog_does_not_starve_other_clients():
+    scheduler = FairScheduler(1)
+    order = await run_jobs(scheduler, ["bulk"] * 6 + ["ci"] * 2)
+    # ci is served right after the first queued bulk command, not after all six
+    assert order.index("ci") <= 2
+    assert order[-1] == "bulk"
+
+
+@pytest.mark.asyncio
+async def test_weights_share_slots():
+    scheduler = FairScheduler(1, {"heavy": 3})
+    order = await run_jobs(scheduler, ["light"] * 8 + ["heavy"] * 8)
+    served = order[:8]
+    assert served.count("heavy") >= 5
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_releases_nothing_twice():
+    scheduler = FairScheduler(1)
+    holder = asyncio.Event()
+
+    async def hold():
+        async with scheduler.slot("a"):
+            await holder.wait()
+
+    first = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert scheduler.stats()["clients"]["a"]["queued"] == 1
+    waiting.cancel()
+    await asyncio.sleep(0)
+    holder.set()
+    await first
+    stats = scheduler.stats()
+    assert stats["free"] == 1
+    assert stats["queued"] == 0
+    assert stats["clients"]["a"]["dispatched"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unlimited_scheduler_does_not_queue():
+    scheduler = FairScheduler(0)
+    async with scheduler.slot("a"), scheduler.slot("a"):
+        pass
+    assert scheduler.stats()["clients"] == {}
+
+
+def test_parse_weights():
+    assert parse_weights("ci=2, bulk=0.5,") == {"ci": 2.0, "bulk": 0.5}
+    assert parse_weights(None) == {}
+    with pytest.raises(ValueError):
+        parse_weights("ci=0")
+    with pytest.raises(ValueError):
+        parse_weights("ci")
+
+
+def test_scheduler_rejects_non_positive_weights():
+    with pytest.raises(ValueError, match="default=0"):
+        FairScheduler(4, default_weight=0)
+    with pytest.raises(ValueError, match="ci=-1"):
+        FairScheduler(4, {"ci": -1})
+    with pytest.raises(ValueError, match="ci=nan"):
+        FairScheduler(4, {"ci": float("nan")})
+
+
+def test_admin_socket_queues():
+    r = client.get("/admin/socket/queues", headers={"X-API-Key": "devil"})
+    assert r.status_code == 200
+    assert {"slots", "free", "queued", "clients"} <= r.json().keys()
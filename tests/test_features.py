@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import FEATURES
+from app.main import enabled_features
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_enabled_features_defaults_to_all():
+    assert enabled_features(None) == list(FEATURES)
+    assert enabled_features(" ") == list(FEATURES)
+
+
+def test_enabled_features_keeps_mount_order():
+    assert enabled_features("www, DNS,ssl") == ["dns", "ssl", "www"]
+
+
+def test_enabled_features_rejects_unknown():
+    with pytest.raises(RuntimeError, match="nope"):
+        enabled_features("www,nope")
+
+
+def test_disabled_routers_are_not_imported():
+    probe = (
+        "import json, sys, app.main; "
+        "print(json.dumps(sorted(m for m in sys.modules if m.startswith('app.'))))"
+    )
+    env = {**os.environ, "DEVIL_API_FEATURES": "www,dns,ssl"}
+    out = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", probe],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = json.loads(out.stdout.strip().splitlines()[-1])
+    assert "app.api.endpoints.www" in modules
+    assert "app.api.endpoints.mysql" not in modules
+    assert "app.schemas.mysql" not in modules
+    assert "app.schemas.mail" not in modules
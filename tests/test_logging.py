@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.logging_config import AccessLogMiddleware
+from app.logging_config import DroppingQueueHandler
+from app.logging_config import JSONFormatter
+from app.logging_config import LogQueue
+from app.main import app
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(self.format(record))
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    logger = logging.getLogger("test.logging.drop")
+    logger.propagate = False
+    logger.handlers = [handler]
+    for i in range(3):
+        logger.warning("message %d", i)
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 2
+
+
+def test_log_queue_delivers_and_flushes_on_detach():
+    target = ListHandler()
+    logger = logging.getLogger("test.logging.queue")
+    logger.propagate = False
+    log_queue = LogQueue(100)
+    queued = log_queue.attach(logger, [target])
+    assert logger.handlers == [queued]
+    for i in range(10):
+        logger.warning("message %d", i)
+    assert log_queue.stats()["loggers"]["test.logging.queue"]["dropped"] == 0
+    log_queue.detach(logger)
+    assert target.messages == [f"message {i}" for i in range(10)]
+    assert logger.handlers == [target]
+    assert log_queue.stats()["loggers"] == {}
+
+
+def test_json_formatter_merges_fields():
+    record = logging.LogRecord(
+        "x", logging.INFO, __file__, 1, "hi %s", ("there",), None
+    )
+    record.fields = {"status": 200}
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["message"] == "hi there"
+    assert entry["level"] == "INFO"
+    assert entry["status"] == 200
+
+
+def test_access_log_middleware(caplog):
+    inner = FastAPI()
+
+    @inner.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    access = TestClient(AccessLogMiddleware(inner, logger_name="test.access"))
+    with caplog.at_level(logging.INFO, logger="test.access"):
+        r = access.get("/ping")
+    assert r.status_code == 200
+    (record,) = [r for r in caplog.records if r.name == "test.access"]
+    assert record.getMessage() == "GET /ping 200"
+    assert record.fields["status"] == 200
+    assert record.fields["bytes"] == len(r.content)
+    assert record.fields["duration_ms"] >= 0
+
+
+def test_admin_logging_stats():
+    r = client.get("/admin/logging", headers=HEADERS)
+    assert r.status_code == 200
+    assert "queue_size" in r.json()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.api.registry import RESPONSE_CACHE
+from app.main import app
+from app.services.mail_bulk import MAX_ROW_BYTES
+from app.services.mail_bulk import BulkRun
+from app.services.mail_bulk import iter_lines
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+
+def _post(body: str, content_type: str, calls: list):
+    async def fake(args):
+        calls.append(args)
+        return {"code": "OK"}
+
+    with patch(
+        "app.services.mail_bulk.execute_devil_command",
+        new=AsyncMock(side_effect=fake),
+    ):
+        r = client.post(
+            "/mail/bulk",
+            headers={**HEADERS, "Content-Type": content_type},
+            content=body.encode(),
+        )
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    return sorted(
+        (json.loads(line) for line in r.text.splitlines()), key=lambda x: x["row"]
+    )
+
+
+def test_bulk_ndjson_rows_validated_and_executed():
+    body = "\n".join(
+        [
+            '{"action": "account_add", "email_mailbox": "a@example.com", "password": "p"}',
+            '{"action": "alias_add", "email_from": "b@example.com", "email_to": "a@example.com"}',
+            "",
+            '{"action": "quota", "email_mailbox": "a@example.com"}',
+            "not json",
+            '{"action": "nope"}',
+        ]
+    )
+    calls = []
+    results = _post(body, "application/x-ndjson", calls)
+    assert [r["status"] for r in results] == ["ok", "ok", "error", "error", "error"]
+    assert results[2]["detail"][0]["loc"] == ["mail_quota"]
+    assert results[3]["detail"].startswith("invalid JSON")
+    assert sorted(calls) == [
+        ["--json", "mail", "account", "add", "a@example.com", "p"],
+        ["--json", "mail", "alias", "add", "b@example.com", "a@example.com"],
+    ]
+
+
+def test_bulk_csv_with_header():
+    body = (
+        "action,email_mailbox,password,mail_quota\r\n"
+        "account_add,c@example.com,,\r\n"
+        "quota,c@example.com,,2G\r\n"
+    )
+    calls = []
+    results = _post(body, "text/csv", calls)
+    assert [r["status"] for r in results] == ["ok", "ok"]
+    assert sorted(calls) == [
+        ["--json", "mail", "account", "add", "c@example.com"],
+        ["--json", "mail", "quota", "c@example.com", "2G"],
+    ]
+
+
+def test_bulk_csv_quoted_newline_and_bom():
+    body = (
+        "\ufeffaction,email_from,email_to\r\n"
+        'alias_add,"d@example.com","e@example.com"\r\n'
+        'alias_add,f@example.com,"g@\r\nexample.com"\r\n'
+    )
+    calls = []
+    results = _post(body, "text/csv", calls)
+    assert [(r["row"], r["status"]) for r in results] == [(1, "ok"), (2, "ok")]
+    assert sorted(calls) == [
+        ["--json", "mail", "alias", "add", "d@example.com", "e@example.com"],
+        ["--json", "mail", "alias", "add", "f@example.com", "g@\r\nexample.com"],
+    ]
+
+
+def test_bulk_invalidates_cache_after_last_row():
+    events = []
+
+    async def fake(args):
+        events.append("command")
+        return {"code": "OK"}
+
+    body = '{"action": "alias_add", "email_from": "a@x.pl", "email_to": "b@x.pl"}\n'
+    with (
+        patch(
+            "app.services.mail_bulk.execute_devil_command",
+            new=AsyncMock(side_effect=fake),
+        ),
+        patch.object(RESPONSE_CACHE, "invalidate", side_effect=events.append),
+    ):
+        r = client.post("/mail/bulk", headers=HEADERS, content=body.encode())
+    assert r.status_code == 200
+    assert events == ["command", "mail"]
+
+
+@pytest.mark.asyncio
+async def test_results_stream_before_upload_ends():
+    more = asyncio.Event()
+
+    async def chunks():
+        yield b'{"action": "alias_add", "email_from": "a@x.pl", "email_to": "b@x.pl"}\n'
+        await more.wait()
+        yield b'{"action": "nope"}\n'
+
+    with patch(
+        "app.services.mail_bulk.execute_devil_command",
+        new=AsyncMock(return_value={"code": "OK"}),
+    ):
+        results = BulkRun(concurrency=1).results(chunks(), "ndjson")
+        first = json.loads(await asyncio.wait_for(anext(results), 1))
+        assert first["status"] == "ok"
+        more.set()
+        rest = [json.loads(line) async for line in results]
+    assert [r["row"] for r in rest] == [2]
+
+
+@pytest.mark.asyncio
+async def test_closing_results_early_ends_the_run():
+    async def chunks():
+        for _ in range(10):
+            yield b'{"action": "nope"}\n'
+
+    run = BulkRun(concurrency=1)
+    results = run.results(chunks(), "ndjson")
+    await anext(results)
+    # let the feeder fill the queue and block on it
+    await asyncio.sleep(0.01)
+    await asyncio.wait_for(results.aclose(), 1)
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_line_arriving_whole_in_one_chunk_is_capped():
+    async def chunks():
+        yield b"x" * (MAX_ROW_BYTES + 1) + b"\nshort\n"
+
+    assert [line async for line in iter_lines(chunks())] == [None, b"short"]
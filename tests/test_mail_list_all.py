@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.services.socket_client import DevilSocketError
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+
+async def fake_devil(args):
+    if args == ["--json", "mail", "list"]:
+        return {"code": "OK", "domains": [{"domain": "a.com"}, {"domain": "b.com"}]}
+    if args[-1] == "b.com":
+        raise DevilSocketError("no such domain")
+    return {"code": "OK", "mailboxes": [f"x@{args[-1]}"], "aliases": []}
+
+
+def test_mail_list_all_domains_streams_ndjson():
+    with patch(
+        "app.api.endpoints.mail.execute_devil_command",
+        new=AsyncMock(side_effect=fake_devil),
+    ):
+        r = client.get("/mail/list?all_domains=true", headers=HEADERS)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = {e["domain"]: e for e in map(json.loads, r.text.splitlines())}
+    assert lines["a.com"]["status"] == "ok"
+    assert lines["a.com"]["result"]["mailboxes"] == ["x@a.com"]
+    assert lines["b.com"] == {
+        "domain": "b.com",
+        "status": "error",
+        "detail": "no such domain",
+    }
+
+
+def test_mail_list_default_unchanged():
+    with patch(
+        "app.api.endpoints.mail.execute_devil_command",
+        new=AsyncMock(side_effect=fake_devil),
+    ):
+        r = client.get("/mail/list", headers=HEADERS)
+    assert r.json()["domains"] == [{"domain": "a.com"}, {"domain": "b.com"}]
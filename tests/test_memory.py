@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+from anyio import from_thread
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.api.endpoints import admin
+from app.auth import AUTH_FAILURE_TRACKER
+from app.main import app
+from app.services.memory import MEMORY
+from app.services.memory import object_counts
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+LEAK: list[bytes] = []
+
+
+def test_memory_stats():
+    r = client.get("/admin/memory", params={"objects": True}, headers=HEADERS)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["tracemalloc"]["tracing"] is False
+    assert "auth_failure_tracker" in body["tables"]
+    assert body["objects"][0]["count"] >= body["objects"][-1]["count"]
+
+
+def test_diff_needs_tracemalloc_and_baseline():
+    assert client.post("/admin/memory/snapshot", headers=HEADERS).status_code == 409
+    client.post("/admin/memory/tracemalloc/start", headers=HEADERS)
+    try:
+        r = client.get("/admin/memory/diff", headers=HEADERS)
+        assert r.status_code == 409
+        assert "baseline" in r.json()["detail"]
+    finally:
+        client.post("/admin/memory/tracemalloc/stop", headers=HEADERS)
+
+
+def test_diff_finds_growth():
+    r = client.post("/admin/memory/tracemalloc/start", headers=HEADERS)
+    assert r.json()["tracing"] is True
+    try:
+        assert client.post("/admin/memory/snapshot", headers=HEADERS).status_code == 200
+        LEAK.extend(bytes(1000) for _ in range(2000))
+        r = client.get("/admin/memory/diff", params={"limit": 5}, headers=HEADERS)
+        top = r.json()["top"][0]
+        assert top["file"].endswith("test_memory.py")
+        assert top["size_diff"] >= 2000 * 1000
+    finally:
+        LEAK.clear()
+        r = client.post("/admin/memory/tracemalloc/stop", headers=HEADERS)
+    assert r.json()["tracing"] is False
+    assert MEMORY.baseline is None
+
+
+def test_start_with_other_frames_conflicts():
+    r = client.post(
+        "/admin/memory/tracemalloc/start", params={"frames": 5}, headers=HEADERS
+    )
+    assert r.json()["frames"] == 5
+    try:
+        r = client.post(
+            "/admin/memory/tracemalloc/start", params={"frames": 5}, headers=HEADERS
+        )
+        assert r.status_code == 200
+        r = client.post("/admin/memory/tracemalloc/start", headers=HEADERS)
+        assert r.status_code == 409
+        assert "5 frames" in r.json()["detail"]
+    finally:
+        client.post("/admin/memory/tracemalloc/stop", headers=HEADERS)
+
+
+def test_tables_read_on_the_loop_while_tracker_changes(monkeypatch):
+    threads = {}
+
+    def watch(name, func):
+        def call(*args):
+            try:
+                asyncio.get_running_loop()
+                threads[name] = "loop"
+            except RuntimeError:
+                threads[name] = "thread"
+            return func(*args)
+
+        return call
+
+    def heap_walk(limit):
+        # the loop keeps serving requests that fail auth meanwhile
+        for i in range(50):
+            from_thread.run_sync(AUTH_FAILURE_TRACKER.register_failure, f"192.0.2.{i}")
+        return object_counts(limit)
+
+    monkeypatch.setattr(
+        AUTH_FAILURE_TRACKER, "stats", watch("tracker", AUTH_FAILURE_TRACKER.stats)
+    )
+    monkeypatch.setattr(admin, "object_counts", watch("objects", heap_walk))
+    r = client.get("/admin/memory", params={"objects": True}, headers=HEADERS)
+    assert r.status_code == 200
+    assert r.json()["tables"]["auth_failure_tracker"] == 0
+    assert len(AUTH_FAILURE_TRACKER) == 50
+    assert threads == {"tracker": "loop", "objects": "thread"}
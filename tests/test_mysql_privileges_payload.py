@@ -14,7 +14,7 @@ client = TestClient(app)
 
 def test_mysql_privileges_all_only():
     with patch(
-        "app.api.endpoints.mysql.execute_devil_command",
+        "app.api.registry.execute_devil_command",
         new=AsyncMock(return_value={"code": "OK", "args": []}),
     ):
         r = client.put(
@@ -33,7 +33,7 @@ def test_mysql_privileges_all_only():
 def test_mysql_privileges_conflict_rejected():
     # +ALL with another should 422 (validation error)
     with patch(
-        "app.api.endpoints.mysql.execute_devil_command",
+        "app.api.registry.execute_devil_command",
         new=AsyncMock(return_value={"code": "OK"}),
     ):
         r = client.put(
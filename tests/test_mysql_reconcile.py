@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.services.mysql_grants import ALL_MASK
+from app.services.mysql_grants import current_masks
+from app.services.mysql_grants import privilege_ops
+from app.services.mysql_grants import privileges_to_mask
+from app.services.mysql_grants import user_key
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+LISTING = {
+    "code": "OK",
+    "users": [
+        {
+            "user": "app",
+            "privileges": {"shop": ["SELECT", "DELETE"], "logs": "ALL PRIVILEGES"},
+        },
+        {"user": "report", "database": "shop", "privileges": "SELECT"},
+    ],
+}
+
+REQUEST = {
+    "grants": [
+        {
+            "users": ["app", "report"],
+            "databases": ["shop"],
+            "privileges": ["SELECT", "INSERT"],
+        }
+    ],
+    "prune": True,
+}
+
+
+def test_privilege_ops_minimal():
+    current = privileges_to_mask(["SELECT", "DELETE"])
+    desired = privileges_to_mask(["SELECT", "INSERT"])
+    assert privilege_ops(current, desired) == ["+INSERT", "-DELETE"]
+    assert privilege_ops(current, current) == []
+    assert privilege_ops(0, ALL_MASK) == ["+ALL"]
+    assert privilege_ops(current, 0) == ["-ALL"]
+    assert privileges_to_mask(["create temporary tables"]) != 0
+
+
+def test_reconcile_dry_run():
+    mock = AsyncMock(return_value=LISTING)
+    with patch("app.api.endpoints.mysql.execute_devil_command", new=mock):
+        r = client.put(
+            "/mysql/privileges/reconcile?dry_run=true", headers=HEADERS, json=REQUEST
+        )
+    assert r.status_code == 200, r.text
+    assert r.json()["plan"] == [
+        {"user": "app", "database": "shop", "privileges": ["+INSERT", "-DELETE"]},
+        {"user": "report", "database": "shop", "privileges": ["+INSERT"]},
+        {"user": "app", "database": "logs", "privileges": ["-ALL"]},
+    ]
+    mock.assert_awaited_once()
+
+
+def test_reconcile_applies_plan():
+    calls = []
+
+    async def fake(args):
+        calls.append(args)
+        return {"code": "OK"}
+
+    with (
+        patch(
+            "app.api.endpoints.mysql.execute_devil_command",
+            new=AsyncMock(return_value=LISTING),
+        ),
+        patch(
+            "app.services.mysql_grants.execute_devil_command",
+            new=AsyncMock(side_effect=fake),
+        ),
+    ):
+        r = client.put(
+            "/mysql/privileges/reconcile",
+            headers=HEADERS,
+            json={**REQUEST, "prune": False},
+        )
+    assert r.status_code == 200, r.text
+    assert r.json()["failed"] == 0
+    assert sorted(calls) == [
+        ["--json", "mysql", "privileges", "app", "shop", "+INSERT,-DELETE"],
+        ["--json", "mysql", "privileges", "report", "shop", "+INSERT"],
+    ]
+
+
+def test_user_keys_normalized():
+    assert user_key("app@%") == "app"
+    assert user_key("app@LocalHost") == "app@localhost"
+    assert user_key("app", "%") == "app"
+    listing = {"users": [{"user": "app", "host": "LOCALHOST", "privileges": {}}]}
+    assert current_masks(listing) == {}
+    mock = AsyncMock(
+        return_value={
+            "users": [
+                {"user": "app", "host": "%", "database": "shop", "privileges": "ALL"}
+            ]
+        }
+    )
+    request = {
+        "grants": [{"users": ["app@%"], "databases": ["shop"], "privileges": ["ALL"]}],
+        "prune": True,
+    }
+    with patch("app.api.endpoints.mysql.execute_devil_command", new=mock):
+        r = client.put(
+            "/mysql/privileges/reconcile?dry_run=true", headers=HEADERS, json=request
+        )
+    assert r.status_code == 200, r.text
+    assert r.json() == {"dry_run": True, "plan": [], "warnings": []}
+
+
+def test_unreadable_listing_is_not_silently_reconciled():
+    listing = {"code": "OK", "accounts": [{"login": "app", "acl": "SELECT"}]}
+    mock = AsyncMock(return_value=listing)
+    with patch("app.api.endpoints.mysql.execute_devil_command", new=mock):
+        r = client.put(
+            "/mysql/privileges/reconcile?dry_run=true", headers=HEADERS, json=REQUEST
+        )
+        assert r.status_code == 400
+        assert (
+            r.json()["detail"] == "no privileges listed for app, report; cannot prune"
+        )
+        r = client.put(
+            "/mysql/privileges/reconcile?dry_run=true",
+            headers=HEADERS,
+            json={**REQUEST, "prune": False},
+        )
+    assert r.status_code == 200
+    assert len(r.json()["warnings"]) == 2
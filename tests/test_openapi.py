@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.openapi import install_docs
+from app.openapi import main as build_openapi
+
+client = TestClient(app)
+
+
+def test_openapi_served_from_cached_bytes():
+    r = client.get("/openapi.json")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    schema = r.json()
+    assert "/dns/add/record" in schema["paths"]
+    assert client.get("/openapi.json").content == r.content
+    assert client.get("/docs").status_code == 200
+    assert client.get("/redoc").status_code == 200
+
+
+def test_production_mode_mounts_no_docs():
+    prod = FastAPI(openapi_url=None)
+    assert install_docs(prod, production=True) is None
+    prod_client = TestClient(prod)
+    for path in ("/openapi.json", "/docs", "/redoc"):
+        assert prod_client.get(path).status_code == 404
+
+
+def test_prebuilt_schema_file_is_served(tmp_path):
+    out = tmp_path / "openapi.json"
+    assert build_openapi([str(out)]) == 0
+    assert "/mail/bulk" in json.loads(out.read_bytes())["paths"]
+
+    other = FastAPI(openapi_url=None)
+    install_docs(other, production=False, schema_file=str(out))
+    assert TestClient(other).get("/openapi.json").content == out.read_bytes()
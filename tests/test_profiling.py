@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import marshal
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.profiling import REQUEST_PROFILES
+from app.profiling import ProfilingMiddleware
+
+# the real app behind the middleware, as installed with DEVIL_REQUEST_PROFILING
+client = TestClient(ProfilingMiddleware(app, store=REQUEST_PROFILES))
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+
+def test_profiled_request_is_stored_and_exported():
+    REQUEST_PROFILES.clear()
+    mock = AsyncMock(return_value={"code": "OK"})
+    with patch("app.api.registry.execute_devil_command", new=mock):
+        r = client.get("/ftp/list", headers={**HEADERS, "X-Devil-Profile": "1"})
+    assert r.status_code == 200
+    profile_id = r.headers["x-devil-profile-id"]
+
+    listing = client.get("/admin/profiles", headers=HEADERS).json()
+    assert listing["profiles"][0]["id"] == profile_id
+    assert listing["profiles"][0]["path"] == "/ftp/list"
+
+    text = client.get(
+        f"/admin/profiles/{profile_id}", params={"limit": 1000}, headers=HEADERS
+    )
+    assert "run_command" in text.text
+    raw = client.get(
+        f"/admin/profiles/{profile_id}", params={"format": "prof"}, headers=HEADERS
+    )
+    assert any(func[2] == "run_command" for func in marshal.loads(raw.content))  # noqa: S302
+
+
+def test_profile_requires_header_and_valid_key():
+    REQUEST_PROFILES.clear()
+    r = client.get("/health")
+    assert "x-devil-profile-id" not in r.headers
+    r = client.get("/health", headers={"X-API-Key": "wrong", "X-Devil-Profile": "1"})
+    assert "x-devil-profile-id" not in r.headers
+    assert len(REQUEST_PROFILES) == 0
+
+
+def test_unknown_profile_is_404():
+    r = client.get("/admin/profiles/missing", headers=HEADERS)
+    assert r.status_code == 404
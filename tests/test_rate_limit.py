@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.auth import RATE_LIMITERS
+from app.main import app
+from app.services.rate_limit import TokenBucketLimiter
+from app.services.rate_limit import retry_after
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+
+def test_bucket_allows_burst_then_refills():
+    limiter = TokenBucketLimiter(2, 3)
+    assert [limiter.take("a", now=100) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.take("a", now=100) == 0.5
+    assert limiter.take("a", now=100.5) == 0.0
+    assert limiter.take("b", now=100.5) == 0.0
+
+
+def test_denied_take_consumes_nothing():
+    limiter = TokenBucketLimiter(1, 1)
+    assert limiter.take("key", now=0) == 0.0
+    assert limiter.take("ip", "key", now=0) == 1.0
+    assert limiter.take("ip", now=0) == 0.0
+
+
+def test_disabled_limiter_stores_nothing():
+    limiter = TokenBucketLimiter(0, 0)
+    assert limiter.take("a") == 0.0
+    assert len(limiter) == 0
+
+
+def test_bucket_count_bounded():
+    limiter = TokenBucketLimiter(1, 1, max_entries=100)
+    for i in range(1000):
+        limiter.take(f"ip{i}", now=0)
+    assert len(limiter) == 100
+    assert limiter.stats()["evictions"] == 900
+
+
+def test_retry_after_rounds_up():
+    assert retry_after(0.01) == "1"
+    assert retry_after(2.2) == "3"
+
+
+def test_read_requests_limited_with_retry_after(monkeypatch):
+    monkeypatch.setitem(RATE_LIMITERS, "read", TokenBucketLimiter(0.5, 2))
+    assert client.get("/lookup/ip/192.0.2.1", headers=HEADERS).status_code == 200
+    assert client.get("/lookup/ip/192.0.2.1", headers=HEADERS).status_code == 200
+    r = client.get("/lookup/ip/192.0.2.1", headers=HEADERS)
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "2"
+
+
+def test_write_bucket_separate_from_read(monkeypatch):
+    monkeypatch.setitem(RATE_LIMITERS, "read", TokenBucketLimiter(0.5, 1))
+    monkeypatch.setitem(RATE_LIMITERS, "write", TokenBucketLimiter(0.5, 1))
+    assert client.get("/lookup/ip/192.0.2.1", headers=HEADERS).status_code == 200
+    r = client.post("/lookup/refresh", params={"source": "bogus"}, headers=HEADERS)
+    assert r.status_code == 400
+    r = client.post("/lookup/refresh", params={"source": "bogus"}, headers=HEADERS)
+    assert r.status_code == 429
+
+
+def test_failed_auth_does_not_consume_tokens(monkeypatch):
+    monkeypatch.setitem(RATE_LIMITERS, "read", TokenBucketLimiter(0.5, 1))
+    r = client.get("/lookup/ip/192.0.2.1", headers={"X-API-Key": "wrong"})
+    assert r.status_code == 401
+    assert client.get("/lookup/ip/192.0.2.1", headers=HEADERS).status_code == 200
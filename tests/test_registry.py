@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.api.registry import COMMANDS
+from app.api.registry import RESPONSE_CACHE
+from app.api.registry import Command
+from app.api.registry import run_command
+from app.main import app
+from app.services.socket_client import DevilSocketError
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+TARGET = "app.api.registry.execute_devil_command"
+
+
+def test_template_renders_path_and_body_values():
+    mock = AsyncMock(return_value={"code": "OK"})
+    with patch(TARGET, new=mock):
+        r = client.delete("/ftp/alice", headers=HEADERS)
+        assert r.status_code == 200
+        r = client.put(
+            "/pgsql/extensions",
+            json={"database_name": "p1_db", "extension": "pg_trgm"},
+            headers=HEADERS,
+        )
+        assert r.status_code == 200
+    assert mock.await_args_list[0].args[0] == ["--json", "ftp", "del", "alice"]
+    assert mock.await_args_list[1].args[0] == [
+        "--json",
+        "pgsql",
+        "extensions",
+        "p1_db",
+        "pg_trgm",
+    ]
+
+
+def test_devil_error_maps_to_400():
+    mock = AsyncMock(side_effect=DevilSocketError("no such account"))
+    with patch(TARGET, new=mock):
+        r = client.get("/ftp/list", headers=HEADERS)
+    assert r.status_code == 400
+    assert r.json() == {"detail": "no such account"}
+
+
+def test_builder_validation_error_skips_devil():
+    mock = AsyncMock(return_value={"code": "OK"})
+    with patch(TARGET, new=mock):
+        r = client.get("/repo/list", params={"repo_type": "git"}, headers=HEADERS)
+    assert r.status_code == 400
+    mock.assert_not_awaited()
+
+
+def test_command_metadata():
+    assert COMMANDS["ftp_list"].read_only
+    assert COMMANDS["ftp_list"].path == "/ftp/list"
+    assert not COMMANDS["ftp_del"].read_only
+    assert COMMANDS["ssl_www_add"].timeout is not None
+    assert COMMANDS["mysql_db_add"].error_label == "mysql db add"
+
+
+@pytest.mark.asyncio
+async def test_cache_and_write_invalidation():
+    RESPONSE_CACHE.clear()
+    listing = Command("t_list", "GET", "/t", build=list, read_only=True, cache_ttl=60)
+    write = Command("t_del", "DELETE", "/t", build=list)
+    mock = AsyncMock(return_value={"code": "OK"})
+    with patch(TARGET, new=mock):
+        await run_command(listing, ["--json", "ftp", "list"])
+        await run_command(listing, ["--json", "ftp", "list"])
+        assert mock.await_count == 1
+        await run_command(write, ["--json", "ftp", "del", "bob"])
+        await run_command(listing, ["--json", "ftp", "list"])
+    assert mock.await_count == 3
+    RESPONSE_CACHE.clear()
+
+
+@pytest.mark.asyncio
+async def test_error_label_wraps_unexpected_errors():
+    spec = Command("t", "GET", "/t", build=list, error_label="thing")
+    with (
+        patch(TARGET, new=AsyncMock(side_effect=ValueError("boom"))),
+        pytest.raises(HTTPException) as info,
+    ):
+        await run_command(spec, ["--json", "thing"])
+    assert info.value.detail == "thing error: boom"
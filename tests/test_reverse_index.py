@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.services.reverse_index import REVERSE_INDEX
+from app.services.reverse_index import ReverseIndex
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+RESPONSES = {
+    ("vhost", "list", "all"): {"code": "OK", "ips": [{"ip": "10.0.0.5"}]},
+    ("www", "list"): {"code": "OK", "domains": [{"domain": "example.com"}]},
+    ("ssl", "www", "list"): {
+        "code": "OK",
+        "certs": [{"ip": "10.0.0.5", "domain": "example.com"}],
+    },
+    ("dns", "list"): {"code": "OK", "domains": [{"domain": "example.com"}]},
+    ("dns", "list", "example.com"): {
+        "code": "OK",
+        "records": [{"id": 1, "name": "www", "type": "A", "content": "10.0.0.5"}],
+    },
+    ("mail", "list"): {"code": "OK", "domains": ["Example.com."]},
+}
+
+
+async def fake_devil(args):
+    return RESPONSES[tuple(args[1:])]
+
+
+@pytest.fixture(autouse=True)
+def reset_index():
+    REVERSE_INDEX.__init__()
+    yield
+    REVERSE_INDEX.__init__()
+
+
+def test_lookup_empty_until_refreshed():
+    mock = AsyncMock(side_effect=fake_devil)
+    with patch("app.services.reverse_index.execute_devil_command", new=mock):
+        r = client.get("/lookup/ip/10.0.0.5", headers=HEADERS)
+    assert r.status_code == 200
+    assert r.json()["resources"] == {}
+    mock.assert_not_called()
+
+
+def test_refresh_joins_sources():
+    with patch(
+        "app.services.reverse_index.execute_devil_command",
+        new=AsyncMock(side_effect=fake_devil),
+    ):
+        r = client.post("/lookup/refresh", headers=HEADERS)
+    assert r.status_code == 200, r.text
+    assert set(r.json()["status"].values()) == {"ok"}
+
+    by_ip = client.get("/lookup/ip/10.0.0.5", headers=HEADERS).json()["resources"]
+    assert set(by_ip) == {"vhost", "ssl", "dns"}
+
+    by_domain = client.get("/lookup/domain/EXAMPLE.com", headers=HEADERS).json()
+    assert set(by_domain["resources"]) == {"www", "ssl", "dns", "mail"}
+
+
+def test_refresh_single_source_replaces_only_its_entries():
+    with patch(
+        "app.services.reverse_index.execute_devil_command",
+        new=AsyncMock(side_effect=fake_devil),
+    ):
+        client.post("/lookup/refresh", headers=HEADERS)
+    with patch(
+        "app.services.reverse_index.execute_devil_command",
+        new=AsyncMock(return_value={"code": "OK", "ips": []}),
+    ):
+        r = client.post("/lookup/refresh?source=vhost", headers=HEADERS)
+    assert r.json()["status"] == {"vhost": "ok"}
+    by_ip = client.get("/lookup/ip/10.0.0.5", headers=HEADERS).json()["resources"]
+    assert set(by_ip) == {"ssl", "dns"}
+
+
+def test_refresh_unknown_source():
+    r = client.post("/lookup/refresh?source=nope", headers=HEADERS)
+    assert r.status_code == 400
+
+
+def test_dns_record_names_are_relative_to_the_zone():
+    index = ReverseIndex()
+    index.replace_source(
+        "dns",
+        [
+            ({"domain": "example.com", "zone": True}, "example.com"),
+            ({"name": "www", "type": "A", "content": "10.0.0.5"}, "example.com"),
+            ({"name": "@", "type": "MX", "content": "mail"}, "example.com"),
+            ({"name": "mail.example.com.", "type": "A"}, "example.com"),
+        ],
+    )
+    assert index.lookup_domain("www") == {}
+    assert index.lookup_domain("@") == {}
+    assert index.lookup_domain("www.example.com")["dns"][0]["name"] == "www"
+    assert index.lookup_domain("mail.example.com")["dns"][0]["type"] == "A"
+    assert len(index.lookup_domain("example.com")["dns"]) == 4
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import Counter
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.main import app
+from app.services.sampler import BUCKET_SECONDS
+from app.services.sampler import TRUNCATED
+from app.services.sampler import SamplingProfiler
+from app.services.sampler import render_flamegraph
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+
+def test_window_and_bounded_buckets():
+    profiler = SamplingProfiler(10, window=30, max_stacks=2)
+    profiler.record("main;a", 1000.0)
+    profiler.record("main;a", 1001.0)
+    profiler.record("main;b", 1002.0)
+    profiler.record("main;c", 1003.0)
+    assert profiler.stacks(now=1005.0) == Counter(
+        {"main;a": 2, "main;b": 1, TRUNCATED: 1}
+    )
+    profiler.record("main;c", 1000.0 + BUCKET_SECONDS)
+    assert profiler.stacks(5, now=1006.0 + BUCKET_SECONDS) == {"main;c": 1}
+    for i in range(10):
+        profiler.record("main;d", 2000.0 + i * BUCKET_SECONDS)
+    assert len(profiler._buckets) == 3
+    assert profiler.stats()["samples"] == 15
+
+
+def busy(until: float) -> int:
+    n = 0
+    while time.perf_counter() < until:
+        n += 1
+    return n
+
+
+def test_samples_calling_thread():
+    profiler = SamplingProfiler(500, window=60)
+    profiler.start()
+    try:
+        busy(time.perf_counter() + 0.2)
+    finally:
+        profiler.stop()
+    assert not profiler.running
+    collapsed = profiler.collapsed()
+    assert "busy (test_sampler.py)" in collapsed
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in collapsed.splitlines())
+
+
+def test_flamegraph_svg():
+    svg = render_flamegraph(Counter({"main;a;<b>": 3, "main;c": 1}), title="t")
+    assert svg.startswith("<svg")
+    assert "&lt;b&gt; (3 samples, 75.0%)" in svg
+
+
+def test_admin_profiler_formats():
+    r = client.get("/admin/profiler", headers=HEADERS)
+    assert r.json()["running"] is False
+    r = client.get("/admin/profiler", params={"format": "svg"}, headers=HEADERS)
+    assert r.headers["content-type"] == "image/svg+xml"
+    r = client.get("/admin/profiler", params={"format": "collapsed"}, headers=HEADERS)
+    assert r.status_code == 200
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pytest
+
+from app.server import build_config
+from app.server import build_parser
+
+
+def test_uds_config():
+    options = build_parser().parse_args(
+        ["--uds", "/run/devil-api.sock", "--workers", "3", "--keep-alive", "15"]
+    )
+    config = build_config(options)
+    assert config.uds == "/run/devil-api.sock"
+    assert config.workers == 3
+    assert config.timeout_keep_alive == 15
+    assert config.app == "app.main:app"
+
+
+def test_tcp_config_from_env(monkeypatch):
+    monkeypatch.setenv("DEVIL_API_PORT", "9000")
+    monkeypatch.setenv("DEVIL_API_BACKLOG", "512")
+    monkeypatch.setenv("DEVIL_API_LOOP", "asyncio")
+    config = build_config(build_parser().parse_args([]))
+    assert config.uds is None
+    assert (config.host, config.port) == ("127.0.0.1", 9000)
+    assert config.backlog == 512
+    assert config.loop == "asyncio"
+    assert config.limit_max_requests is None
+
+
+def test_wildcard_forwarded_ips_only_over_uds():
+    parser = build_parser()
+    with pytest.raises(RuntimeError, match="X-Forwarded-For"):
+        build_config(parser.parse_args(["--forwarded-allow-ips", "10.0.0.1, *"]))
+    config = build_config(
+        parser.parse_args(["--uds", "/run/a.sock", "--forwarded-allow-ips", "*"])
+    )
+    assert config.forwarded_allow_ips == "*"
+    config = build_config(parser.parse_args(["--forwarded-allow-ips", "127.0.0.1"]))
+    assert config.forwarded_allow_ips == "127.0.0.1"
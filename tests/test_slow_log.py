@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import inspect
+import logging
+import os
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+os.environ.setdefault("DEVIL_API_KEY", "devil")
+from app.api.registry import COMMANDS
+from app.main import app
+from app.services import socket_client
+from app.services.slow_log import REDACTED
+from app.services.slow_log import SLOW_COMMANDS
+from app.services.slow_log import SlowCommandLog
+from app.services.slow_log import redact
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": os.environ["DEVIL_API_KEY"]}
+
+
+def test_redact_masks_positional_passwords():
+    assert redact(["--json", "mail", "passwd", "a@b.pl", "s3cret"]) == [
+        "--json",
+        "mail",
+        "passwd",
+        "a@b.pl",
+        REDACTED,
+    ]
+    assert redact(["--json", "ftp", "add", "u", "/home", "100", "s3cret"])[-1] == (
+        REDACTED
+    )
+    # the password is last whether or not a domain is given
+    assert redact(["ssl", "www", "get", "1.2.3.4", "s3cret"])[-1] == REDACTED
+    assert redact(["ssl", "www", "get", "1.2.3.4", "a.pl", "s3cret"])[-2:] == [
+        "a.pl",
+        REDACTED,
+    ]
+    assert redact(["--json", "mysql", "user", "add", "u"]) == [
+        "--json",
+        "mysql",
+        "user",
+        "add",
+        "u",
+    ]
+    assert redact(["--json", "dns", "list"]) == ["--json", "dns", "list"]
+
+
+def _body_model(spec) -> type[BaseModel] | None:
+    for param in inspect.signature(spec.build).parameters.values():
+        annotation = param.annotation
+        if isinstance(annotation, str):
+            annotation = spec.build.__globals__.get(annotation)
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return annotation
+    return None
+
+
+@pytest.mark.parametrize("optional", [True, False])
+def test_every_command_taking_a_password_is_redacted(optional):
+    checked = 0
+    for spec in COMMANDS.values():
+        model = _body_model(spec)
+        if model is None or "password" not in model.model_fields:
+            continue
+        values = {
+            name: "1" if optional or field.is_required() else None
+            for name, field in model.model_fields.items()
+        }
+        values["password"] = "SECRET"
+        data = model.model_construct(**values)
+        name = next(iter(inspect.signature(spec.build).parameters))
+        args = spec.argv({name: data})
+        assert "SECRET" in args, spec.name
+        assert "SECRET" not in redact(args), spec.name
+        checked += 1
+    assert checked >= 10
+
+
+def test_ring_buffer_keeps_slowest_recent_commands():
+    log = SlowCommandLog(threshold_ms=100, size=3)
+    assert not log.record(["--json", "dns", "list"], "ci", 0.05, {"daemon": 0.05})
+    for seconds in (0.2, 0.5, 0.3, 0.4):
+        log.record(["--json", "dns", "list"], "ci", seconds, {"daemon": seconds})
+    assert len(log) == 3
+    assert [e["total_ms"] for e in log.entries()] == [500, 400, 300]
+    assert [e["total_ms"] for e in log.entries(order="recent")] == [400, 300, 500]
+    assert log.stats()["recorded"] == 4
+
+
+@pytest.mark.asyncio
+async def test_slow_command_logged_with_phases_and_redacted(monkeypatch, caplog):
+    log = SlowCommandLog(threshold_ms=0, size=10)
+    monkeypatch.setattr(socket_client, "SLOW_COMMANDS", log)
+
+    async def send(arg_list, timeout, phases):
+        phases.update(connect=0.001, send=0.001, daemon=0.2, parse=0.001)
+        return {"code": "OK"}
+
+    monkeypatch.setattr(socket_client, "_send_command", send)
+    with caplog.at_level(logging.WARNING, logger="app.services.slow_log"):
+        await socket_client.execute_devil_command(
+            ["--json", "mysql", "passwd", "u", "s3cret"]
+        )
+    (entry,) = log.entries()
+    assert entry["command"] == "--json mysql passwd u ***"
+    assert entry["client"] == socket_client.INTERNAL_CLIENT
+    assert set(entry["phases_ms"]) == {"queue", "connect", "send", "daemon", "parse"}
+    assert entry["error"] is None
+    assert "s3cret" not in caplog.text
+    assert "mysql passwd u ***" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_failed_command_is_recorded(monkeypatch):
+    log = SlowCommandLog(threshold_ms=0, size=10)
+    monkeypatch.setattr(socket_client, "SLOW_COMMANDS", log)
+    monkeypatch.setattr(
+        socket_client,
+        "_send_command",
+        AsyncMock(side_effect=socket_client.DevilSocketConnectionError("down")),
+    )
+    with pytest.raises(socket_client.DevilSocketConnectionError):
+        await socket_client.execute_devil_command(["--json", "dns", "list"])
+    assert log.entries()[0]["error"] == "DevilSocketConnectionError"
+
+
+def test_admin_lists_slow_commands():
+    SLOW_COMMANDS.clear()
+    with patch.object(SLOW_COMMANDS, "threshold_ms", 0):
+        SLOW_COMMANDS.record(["--json", "ftp", "passwd", "u", "pw"], "ci", 2, {})
+        SLOW_COMMANDS.record(["--json", "dns", "list"], "ci", 3, {})
+    try:
+        r = client.get("/admin/socket/slow", params={"limit": 1}, headers=HEADERS)
+        assert r.status_code == 200
+        body = r.json()
+        assert body["size"] == 2
+        assert [c["command"] for c in body["commands"]] == ["--json dns list"]
+        r = client.get(
+            "/admin/socket/slow", params={"order": "recent"}, headers=HEADERS
+        )
+        assert r.json()["commands"][1]["command"] == "--json ftp passwd u ***"
+    finally:
+        SLOW_COMMANDS.clear()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from app.startup_profile import format_report
+from app.startup_profile import parse_importtime
+from app.startup_profile import profile
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      1500 |       4000 |   app.schemas.dns
+import time:       900 |       5200 | app.main
+"""
+
+
+def test_parse_importtime():
+    modules = parse_importtime(IMPORTTIME)
+    assert modules["app.main"] == (0.9, 5.2)
+    assert modules["app.schemas.dns"] == (1.5, 4.0)
+    assert "imported package" not in modules
+
+
+def test_profile_reports_ranked_phases(monkeypatch):
+    monkeypatch.setenv("DEVIL_API_FEATURES", "info")
+    report = profile(runs=1, top=5)
+    phases = report["phases"]
+    assert {"import app.main", "first request", "first openapi"} <= set(phases)
+    values = [v for v in phases.values() if v is not None]
+    assert values == sorted(values, reverse=True)
+    assert report["total_ms"] >= phases["import app.main"]
+    assert len(report["imports"]) == 5
+    assert "app" in report["packages"]
+    assert "first request" in format_report(report)